@@ -1,26 +1,82 @@
+from __future__ import annotations
+
 import os
 import re
 import time
+import zlib
 import logging
+import threading
 import subprocess
-from typing import Optional, List, Tuple, Union
-from PIL import Image, ImageDraw, ImageFilter
-import pytesseract
-import cv2
-import numpy as np
+from typing import Optional, List, Tuple, Union, Iterator, Dict, Sequence
+from concurrent.futures import Future
 from io import BytesIO
+from lazyimport import LazyModule
+from adbwire import AdbWireClient, AdbProtocolError
+from adbshell import ShellSession, ShellResult
+from inputqueue import InputDispatcher
+from inputmacro import InputMacro
+from randomxy import path_command
+from coordspace import CoordinateSpace
+from touchinput import TouchDevice, TouchInjector, TOUCH_DISCOVERY_COMMAND, find_touchscreen
+from framebuffer import (CaptureStats, RawFrameHeader, parse_screencap_header, decode_screencap, decode_pixels,
+                         frame_to_image, inflate)
+from framestream import Frame, FrameGrabber
+from framebus import FrameBus, SharedFrame
+from windowstate import WindowState, WINDOW_STATE_COMMAND, parse_window_state
+from deviceprops import DeviceProperties
+from deviceprofile import ProfileCache
+from ocrengine import OcrEngine, PytesseractEngine, get_default_engine
+from ocrcache import OcrCache
+from ocrregion import HitRegionMemory, clamp_box, intersect_box, scale_box, union_box
+from templatematch import TemplateMatcher
+from phrasematch import PhraseMatcher
+from debugsink import DebugSink, get_debug_sink
+from changedetect import wait_for_change, wait_until_stable, wait_for_result
+
+# The OCR/vision stack is imported on first use, tap-only processes never load it
+Image = LazyModule('PIL.Image')
+ImageDraw = LazyModule('PIL.ImageDraw')
+ImageFilter = LazyModule('PIL.ImageFilter')
+cv2 = LazyModule('cv2')
+np = LazyModule('numpy')
 
-os.environ['OMP_THREAD_LIMIT'] = '8'
-os.environ['TESSDATA_PREFIX'] = os.path.join(os.getcwd(), 'tessdata')
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger('ADBAPI')
+_logging_configured = False
+_ocr_environment_configured = False
+
+
+def _configure_logging() -> None:
+    # Configure logging once the first device or OCR object is created, not at import
+    global _logging_configured
+    if not _logging_configured:
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        )
+        _logging_configured = True
+
+
+def _configure_ocr_environment() -> None:
+    global _ocr_environment_configured
+    if not _ocr_environment_configured:
+        os.environ['OMP_THREAD_LIMIT'] = '8'
+        os.environ['TESSDATA_PREFIX'] = os.path.join(os.getcwd(), 'tessdata')
+        _ocr_environment_configured = True
+
 
 class BaseDevice:
-    def __init__(self, adb_path: Optional[str] = None) -> None:
+    # Map base x along the display height while the device is upright (Phone)
+    PORTRAIT_SWAP = False
+
+    def __init__(
+        self,
+        adb_path: Optional[str] = None,
+        transport: str = 'auto',
+        profile_cache: Optional[ProfileCache] = None,
+        wire: Optional[AdbWireClient] = None
+    ) -> None:
+        _configure_logging()
+
         # Original resolution constants
         self.BASE_RESOLUTION_EMU = [1920, 1080]  # 16:9 aspect ratio
         self.BASE_RESOLUTION_PHN = [2400, 1080]  # 20:9 aspect ratio (Samsung Galaxy S21)
@@ -39,8 +95,61 @@ class BaseDevice:
         if not self.adb:
             raise FileNotFoundError("adb executable not found in the current directory or subdirectories.")
         
-        # Establish connection (improved version)
-        self._establish_secure_connection()
+        # Talk to the adb server socket directly when possible, the adb
+        # executable stays as the fallback ('auto', 'wire' or 'subprocess').
+        # wire replaces the default client (ANDROID_ADB_SERVER_PORT or 5037)
+        self.transport = transport
+        self.wire: Optional[AdbWireClient] = None
+        if transport not in ('auto', 'wire', 'subprocess'):
+            raise ValueError(f"Unknown transport: {transport}")
+        if transport != 'subprocess':
+            client = wire or AdbWireClient()
+            if client.is_available():
+                self.wire = client
+            elif transport == 'wire':
+                raise ConnectionError(f"ADB server socket not reachable on port {client.port}")
+            else:
+                logger.warning("ADB server socket not reachable, using adb subprocesses")
+
+        # Establish connection (improved version), a responding server
+        # socket already proves the server is up
+        if self.wire is None:
+            self._establish_secure_connection()
+
+        # Persisted per-serial profiles that let construction skip rediscovery
+        self.profile_cache = profile_cache
+
+        # Optional long-lived shell that input commands are pipelined into
+        self.shell_session: Optional[ShellSession] = None
+
+        # Ordered queue all input commands go through, see open_input_queue
+        self.input_queue: Optional[InputDispatcher] = None
+
+        # 'input' runs the Android input tool per gesture, 'sendevent' writes
+        # raw events to the touchscreen node found by touch_device
+        self.input_backend = 'input'
+        self._touch_devices: Dict[str, TouchDevice] = {}
+
+        # Base to device transforms, follows the cached window state
+        self.coords: Optional[CoordinateSpace] = None
+
+        # Where locate_text last found each phrase on this device, pass it to ImageOcr(hit_memory=...)
+        self.hit_memory = HitRegionMemory()
+
+        # Background capture thread feeding a ring buffer of recent frames
+        self.frame_grabber: Optional[FrameGrabber] = None
+        # screencap pixel format of the last raw capture, for frame_to_image
+        self.frame_format = 1
+        # Bytes, decoded size and latency of the last screenshot
+        self.last_capture_stats: Optional[CaptureStats] = None
+        self._frame_headers: Dict[str, Tuple[str, RawFrameHeader]] = {}
+
+        # Parsed dumpsys window snapshots per device, reused for window_state_ttl seconds
+        self.window_state_ttl = 2.0
+        self._window_states: Dict[str, WindowState] = {}
+        # Devices whose window state is being refreshed off the input path
+        self._window_refreshing: set = set()
+        self._window_lock = threading.Lock()
 
     def find_executable(self, filename: str, search_path: str) -> Optional[str]:
         for root, dirs, files in os.walk(search_path):
@@ -88,33 +197,240 @@ class BaseDevice:
                     raise ConnectionError("ADB server not responding after multiple attempts")
                 time.sleep(1)
 
+    def warm_transport(self, device_identifier: str) -> None:
+        """Keep transport sockets for the device ready in the background, see AdbWireClient.warm"""
+        if self.wire is not None:
+            self.wire.warm(device_identifier, background=True)
+
+    def _shell(self, device_identifier: str, command: str, timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """Run a shell command on the device, the command line is interpreted by the device shell"""
+        if self.wire is not None:
+            try:
+                stdout, stderr, returncode = self.wire.shell(device_identifier, command, timeout)
+                return subprocess.CompletedProcess(
+                    command, returncode,
+                    stdout.decode('utf-8', errors='replace'),
+                    stderr.decode('utf-8', errors='replace')
+                )
+            except (OSError, AdbProtocolError) as e:
+                if self.transport == 'wire':
+                    raise ConnectionError(str(e)) from e
+                logger.warning(f"Wire shell failed ({e}), falling back to adb subprocess")
+        return subprocess.run(
+            [self.adb, '-s', device_identifier, 'shell', command],
+            text=True, capture_output=True, timeout=timeout
+        )
+
+    def _exec_out(self, device_identifier: str, command: str, timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """Run a command on the device and return its raw stdout as bytes"""
+        if self.wire is not None:
+            try:
+                return subprocess.CompletedProcess(command, 0, self.wire.exec_out(device_identifier, command, timeout), b'')
+            except (OSError, AdbProtocolError) as e:
+                if self.transport == 'wire':
+                    raise ConnectionError(str(e)) from e
+                logger.warning(f"Wire exec failed ({e}), falling back to adb subprocess")
+        return subprocess.run(
+            [self.adb, '-s', device_identifier, 'exec-out', command],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout
+        )
+
+    def _exec_stream(self, device_identifier: str, command: str, timeout: Optional[float] = None) -> Iterator[bytes]:
+        """Run a command on the device and yield its raw stdout in chunks as they arrive"""
+        if self.wire is not None:
+            try:
+                conn = self.wire.open_service(device_identifier, f'exec:{command}', timeout)
+            except (OSError, AdbProtocolError) as e:
+                if self.transport == 'wire':
+                    raise ConnectionError(str(e)) from e
+                logger.warning(f"Wire exec failed ({e}), falling back to adb subprocess")
+            else:
+                with conn:
+                    yield from conn.iter_chunks()
+                return
+        proc = subprocess.Popen(
+            [self.adb, '-s', device_identifier, 'exec-out', command],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        try:
+            while True:
+                chunk = proc.stdout.read1(256 * 1024)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            proc.stdout.close()
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+
+    def open_shell_session(self, device_identifier: str) -> ShellSession:
+        if self.shell_session is None or self.shell_session.closed:
+            self.shell_session = ShellSession(self.adb, device_identifier, self.wire)
+        return self.shell_session
+
+    def close_shell_session(self) -> None:
+        if self.shell_session is not None:
+            self.shell_session.close()
+            self.shell_session = None
+
+    def open_input_queue(self, device_identifier: str, max_in_flight: Optional[int] = None,
+                         max_queue: int = 64) -> InputDispatcher:
+        """Ordered input queue, created on the first input command otherwise.
+
+        Commands are always written in submission order. max_in_flight is how
+        many of them may be waiting for the shell session's acknowledgement,
+        1 by default or 8 with a session open.
+        """
+        if self.input_queue is None:
+            if max_in_flight is None:
+                session = self.shell_session is not None and not self.shell_session.closed
+                max_in_flight = 8 if session else 1
+            self.input_queue = InputDispatcher(
+                lambda command: self._run_input(device_identifier, command), max_in_flight, max_queue
+            )
+        return self.input_queue
+
+    def close_input_queue(self) -> None:
+        if self.input_queue is not None:
+            self.input_queue.close()
+            self.input_queue = None
+
+    def flush_input(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the input commands sent so far have been applied"""
+        if self.input_queue is None:
+            return True
+        return self.input_queue.flush(timeout)
+
+    def _run_input(self, device_identifier: str, command: str) -> Union[ShellResult, 'Future[ShellResult]']:
+        if self.shell_session is not None and not self.shell_session.closed:
+            return self.shell_session.submit(command)
+        started = time.time()
+        result = self._shell(device_identifier, command)
+        return ShellResult(command, result.stdout, result.returncode, time.time() - started)
+
+    def _input(self, device_identifier: str, command: str, blocking: bool = True) -> 'Future[ShellResult]':
+        """Queue an input command behind the ones before it.
+
+        blocking waits until it was applied and raises what the command
+        failed with (a lost connection, ...), a non-zero exit code is only
+        reported in the ShellResult.
+        """
+        future = self.open_input_queue(device_identifier).submit(command)
+        if blocking:
+            future.result()
+        return future
+
+    def save_profile(self, device_identifier: str, props: Optional[Dict[str, str]] = None) -> None:
+        """Persist adb path, display size and static properties for the next start"""
+        if self.profile_cache is None:
+            return
+        state = self._window_state(device_identifier)
+        self.profile_cache.save(device_identifier, {
+            'adb_path': os.path.abspath(self.adb),
+            'physical_size': list(state.physical_size),
+            'override_size': list(state.override_size) if state.override_size else None,
+            'props': props or {},
+        })
+
+    def _profile_matches(self, profile: Optional[dict], state: WindowState) -> bool:
+        if profile is None:
+            return False
+        override = profile.get('override_size')
+        return (tuple(profile.get('physical_size', ())) == state.physical_size
+                and (tuple(override) if override else None) == state.override_size)
+
     def get_info(self, device_identifier: str) -> None:
         logger.info(f"\nInfo for device: {device_identifier}")
         logger.info(f"Resolution: {self.resolution()}")
         logger.info(f"App in focus: {self._currentapp}")
         logger.info(f"Orientation: {self.ORIENTATION}")
         logger.info(f"wlan ip: {self.wlan_ip(device_identifier)}")
-        subprocess.run(f'"{self.adb}" -s {device_identifier} get-serialno', shell=True)
+        logger.info(f"Serial: {device_identifier}")
+
+    def window_state(self, device_identifier: str, max_age: Optional[float] = None) -> WindowState:
+        """Rotation, focus, app and display size from one on-device command, cached for window_state_ttl"""
+        return self._window_state(device_identifier, max_age)
+
+    def _window_state(self, device_identifier: str, max_age: Optional[float] = None) -> WindowState:
+        max_age = self.window_state_ttl if max_age is None else max_age
+        state = self._window_states.get(device_identifier)
+        if state is None or state.age > max_age:
+            result = self._shell(device_identifier, WINDOW_STATE_COMMAND)
+            self.check_connection(result)
+            state = parse_window_state(result.stdout)
+            self._window_states[device_identifier] = state
+        return state
+
+    def _current_window_state(self, device_identifier: str) -> WindowState:
+        """Cached window state for taps and swipes, only blocks when nothing is cached yet.
+
+        A snapshot older than window_state_ttl is still returned and a
+        background refresh is started, so a rotation is picked up a round
+        trip later instead of every input waiting on dumpsys window.
+        """
+        state = self._window_states.get(device_identifier)
+        if state is None:
+            return self._window_state(device_identifier)
+        if state.age > self.window_state_ttl:
+            self._refresh_window_state(device_identifier)
+        return state
+
+    def _refresh_window_state(self, device_identifier: str) -> None:
+        with self._window_lock:
+            if device_identifier in self._window_refreshing:
+                return
+            self._window_refreshing.add(device_identifier)
+        threading.Thread(target=self._refresh_window_worker, args=(device_identifier,),
+                         name='window-state-refresh', daemon=True).start()
+
+    def _refresh_window_worker(self, device_identifier: str) -> None:
+        try:
+            self._window_state(device_identifier, max_age=0)
+        except (ConnectionError, OSError, subprocess.SubprocessError, ValueError) as e:
+            logger.debug(f"Could not refresh the window state of {device_identifier}: {e}")
+        finally:
+            with self._window_lock:
+                self._window_refreshing.discard(device_identifier)
+
+    def invalidate_window_state(self, device_identifier: Optional[str] = None) -> None:
+        if device_identifier is None:
+            self._window_states.clear()
+        else:
+            self._window_states.pop(device_identifier, None)
 
     def app_resolution(self, device_identifier: str) -> List[float]:
-        text = subprocess.run(
-            f'"{self.adb}" -s {device_identifier} shell dumpsys window | find "app="',
-            shell=True, text=True, capture_output=True
-        )
-        words = [i.split() for i in text.stdout.splitlines()]
-        current_app_info = words[0]
-        current_app_res = [i for i in current_app_info if 'app=' in i]
-        app_res = current_app_res[0].replace('app=', "").replace('x', ' ')
-        return [float(i) for i in app_res.split()]
+        state = self._window_state(device_identifier)
+        if state.app_size is None:
+            return [float(i) for i in state.resolution]
+        return list(state.app_size)
 
-    def screenshot(self, device_identifier: str) -> Image.Image:
+    def screenshot(
+        self,
+        device_identifier: str,
+        raw: bool = False,
+        as_image: bool = False,
+        compress: Optional[str] = None,
+        region: Optional[Tuple[int, int, int, int]] = None
+    ) -> Union[Image.Image, np.ndarray]:
+        """Capture the screen as a PIL image, or with raw=True as an ndarray view over the framebuffer
+
+        compress='gzip' compresses the raw framebuffer on the device, region (base 1920x1080
+        coordinates) transfers only the rows it covers and returns just that part. Both imply raw.
+        """
+        # Inputs sent before the screenshot have to be applied first
+        self.flush_input()
         timestamp = time.time()
 
-        # Run the screencap command to capture the screenshot directly to stdout
-        result = subprocess.run(
-            f'"{self.adb}" -s {device_identifier} exec-out screencap -p',
-            shell=True, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-        )
+        if compress is not None or region is not None:
+            frame = self._capture_compressed(device_identifier, compress, region)
+            print(f'Screenshot time: {time.time() - timestamp}')
+            return frame_to_image(np.ascontiguousarray(frame), self.frame_format) if as_image else frame
+
+        # Run the screencap command to capture the screenshot directly to stdout,
+        # raw mode skips PNG encoding on the device and decoding on the host
+        result = self._exec_out(device_identifier, 'screencap' if raw else 'screencap -p')
+        self.check_connection(result)
 
         # Check for errors in stderr
         if result.stderr:
@@ -124,68 +440,239 @@ class BaseDevice:
         # The screenshot image is now in stdout, which we can read directly into a PIL Image
         screenshot_data = result.stdout
 
+        if raw:
+            header = parse_screencap_header(screenshot_data)
+            frame = decode_screencap(screenshot_data)
+            self.last_capture_stats = CaptureStats(
+                'raw', len(screenshot_data), len(screenshot_data), time.time() - timestamp, frame.shape
+            )
+            print(f'Screenshot time: {time.time() - timestamp}')
+            return frame_to_image(frame, header.pixel_format) if as_image else frame
+
         # Create a BytesIO object from the screenshot data
         image = Image.open(BytesIO(screenshot_data))
+        self.last_capture_stats = CaptureStats(
+            'png', len(screenshot_data), len(screenshot_data), time.time() - timestamp, (image.height, image.width)
+        )
 
         print(f'Screenshot time: {time.time() - timestamp}')
         return image
 
+    def frame_header(self, device_identifier: str) -> RawFrameHeader:
+        """Raw screencap header for the current rotation, read once per rotation"""
+        return self._frame_header(device_identifier)
+
+    def _frame_header(self, device_identifier: str) -> RawFrameHeader:
+        rotation = self._window_state(device_identifier).rotation
+        cached = self._frame_headers.get(device_identifier)
+        if cached is not None and cached[0] == rotation:
+            return cached[1]
+        # Android 9 (sdk 28) added the colorspace word to the header
+        result = self._shell(device_identifier, 'getprop ro.build.version.sdk; screencap | head -c 12 | od -An -tu4')
+        self.check_connection(result)
+        lines = result.stdout.split()
+        sdk, (width, height, pixel_format) = int(lines[0]), (int(v) for v in lines[1:4])
+        header = RawFrameHeader(width, height, pixel_format, 16 if sdk >= 28 else 12)
+        self._frame_headers[device_identifier] = (rotation, header)
+        return header
+
+    def _capture_compressed(self, device_identifier: str, compress: Optional[str],
+                            region: Optional[Tuple[int, int, int, int]], retry: bool = True) -> np.ndarray:
+        if compress not in (None, 'gzip'):
+            raise ValueError(f"Unsupported screenshot compression: {compress}")
+        started = time.time()
+        header = self._frame_header(device_identifier)
+        width, height = header.width, header.height
+        row_bytes = width * header.bytes_per_pixel
+
+        if region is not None:
+            # Whole rows are cut on the device, columns are sliced on the host
+            x1, y1, x2, y2 = clamp_box(
+                scale_box(region, width / self.BASE_RESOLUTION_EMU[0], height / self.BASE_RESOLUTION_EMU[1]),
+                width, height
+            )
+            rows = max(y2 - y1, 1)
+            offset = header.header_size + y1 * row_bytes
+            size = rows * row_bytes
+            command = f'screencap | tail -c +{offset + 1} | head -c {size}'
+            pixels_offset = 0
+        else:
+            x1, x2, rows = 0, width, height
+            size = header.header_size + header.frame_size
+            command = 'screencap'
+            pixels_offset = header.header_size
+        if compress == 'gzip':
+            command += ' | gzip -1'
+
+        try:
+            chunks = self._exec_stream(device_identifier, command)
+            if compress == 'gzip':
+                data, transferred = inflate(chunks, size)
+            else:
+                data = b''.join(chunks)
+                transferred = len(data)
+                if len(data) != size:
+                    raise ValueError(f"Screencap returned {len(data)} bytes, expected {size}")
+        except (zlib.error, EOFError) as e:
+            if compress != 'gzip':
+                raise
+            # gzip missing on the device, or its stream cut off
+            logger.warning(f"Compressed capture on {device_identifier} failed ({e}), capturing uncompressed")
+            return self._capture_compressed(device_identifier, None, region, retry)
+        except ValueError:
+            # Display size changed since the header was read
+            self._frame_headers.pop(device_identifier, None)
+            self._window_states.pop(device_identifier, None)
+            if not retry:
+                raise
+            return self._capture_compressed(device_identifier, compress, region, retry=False)
+
+        self.frame_format = header.pixel_format
+        frame = decode_pixels(data, width, rows, header.pixel_format, pixels_offset)
+        if region is not None:
+            frame = frame[:, x1:max(x2, x1 + 1)]
+        mode = (compress or 'raw') + ('-band' if region is not None else '')
+        self.last_capture_stats = CaptureStats(mode, transferred, size, time.time() - started, frame.shape)
+        return frame
+
+
+    def _capture_raw(self, device_identifier: str) -> np.ndarray:
+        self.flush_input()
+        result = self._exec_out(device_identifier, 'screencap')
+        self.check_connection(result)
+        self.frame_format = parse_screencap_header(result.stdout).pixel_format
+        return decode_screencap(result.stdout)
+
+    def start_capture(self, device_identifier: str, capacity: int = 8, interval: float = 0.0,
+                      bus: Optional[FrameBus] = None) -> FrameGrabber:
+        """Capture raw frames continuously in the background, see latest_frame. Every frame also goes to bus"""
+        if self.frame_grabber is None:
+            if bus is None:
+                capture = lambda: self._capture_raw(device_identifier)
+            else:
+                capture = lambda: self._publish_frame(device_identifier, bus)
+            self.frame_grabber = FrameGrabber(capture, capacity, interval)
+        return self.frame_grabber.start()
+
+    def publish_frame(self, device_identifier: str, bus: FrameBus) -> np.ndarray:
+        """Capture a raw frame and publish it to a shared-memory frame bus"""
+        return self._publish_frame(device_identifier, bus)
+
+    def _publish_frame(self, device_identifier: str, bus: FrameBus) -> np.ndarray:
+        frame = self._capture_raw(device_identifier)
+        bus.publish(frame, device_identifier, self.frame_format)
+        return frame
+
+    def stop_capture(self) -> None:
+        if self.frame_grabber is not None:
+            self.frame_grabber.stop()
+            self.frame_grabber = None
+
+    def latest_frame(self, max_age: Optional[float] = None) -> Optional[Frame]:
+        """Newest frame from the background capture without blocking, None if missing or older than max_age"""
+        if self.frame_grabber is None:
+            return None
+        return self.frame_grabber.latest(max_age)
+
+    def stream_frames(
+        self,
+        device_identifier: str,
+        max_frames: Optional[int] = None,
+        interval: float = 0.0
+    ) -> Iterator[Frame]:
+        """Yield frames in order, from the background capture when it runs or by capturing in a loop"""
+        if self.frame_grabber is not None and self.frame_grabber.running:
+            source = self.frame_grabber.frames()
+        else:
+            source = self._capture_loop(device_identifier, interval)
+        for count, frame in enumerate(source, 1):
+            yield frame
+            if max_frames is not None and count >= max_frames:
+                return
+
+    def _capture_loop(self, device_identifier: str, interval: float) -> Iterator[Frame]:
+        seq = 0
+        while True:
+            started = time.time()
+            seq += 1
+            yield Frame(seq, started, self._capture_raw(device_identifier))
+            if interval:
+                time.sleep(max(0.0, interval - (time.time() - started)))
+
+    def _wait_capture(self, device_identifier: str) -> np.ndarray:
+        """Frame for the wait helpers, taken from the background capture when it runs"""
+        if self.frame_grabber is not None and self.frame_grabber.running:
+            frame = self.frame_grabber.latest()
+            if frame is not None:
+                return frame.image
+        return self._capture_raw(device_identifier)
+
+    def wait_for_change(
+        self,
+        device_identifier: str,
+        region: Optional[Tuple[int, int, int, int]] = None,
+        timeout: float = 10.0,
+        cancel: Optional[threading.Event] = None
+    ) -> Optional[np.ndarray]:
+        """Raw frame once the screen (or region, base coordinates) changed, None on timeout or cancel"""
+        return wait_for_change(lambda: self._wait_capture(device_identifier), region, timeout, cancel)
+
+    def wait_until_stable(
+        self,
+        device_identifier: str,
+        region: Optional[Tuple[int, int, int, int]] = None,
+        stable_for: float = 0.5,
+        timeout: float = 10.0,
+        cancel: Optional[threading.Event] = None
+    ) -> Optional[np.ndarray]:
+        """Raw frame once nothing changed for stable_for seconds, None on timeout or cancel"""
+        return wait_until_stable(lambda: self._wait_capture(device_identifier), region, stable_for, timeout, cancel)
+
+    def wait_for_text(
+        self,
+        device_identifier: str,
+        target_text: Union[str, List[str]],
+        region: Optional[Tuple[int, int, int, int]] = None,
+        timeout: float = 10.0,
+        cancel: Optional[threading.Event] = None,
+        engine: Optional[OcrEngine] = None,
+        cache: Optional[OcrCache] = None
+    ) -> List[List[int]]:
+        """Boxes of target_text once it appears, [] on timeout or cancel.
+
+        OCR only runs when the region changed since the last frame it read.
+        """
+        def find(frame: np.ndarray) -> List[List[int]]:
+            image = frame_to_image(frame, self.frame_format)
+            return ImageOcr(image, engine, hit_memory=self.hit_memory).locate_text(target_text, region=region, cache=cache)
+
+        return wait_for_result(lambda: self._wait_capture(device_identifier), find, region, timeout, cancel) or []
 
     def currentfocus(self, device_identifier: str) -> str:
-        _currentfocus = subprocess.run(
-            f'"{self.adb}" -s {device_identifier} shell dumpsys window | find "mCurrentFocus"',
-            shell=True, text=True, capture_output=True
-        )
-        self.check_connection(_currentfocus)
-        return _currentfocus.stdout.replace("mCurrentFocus=", "").strip()
+        return self._window_state(device_identifier).focus
 
-    def text_input(self, device_identifier: str, text: str) -> None:
+    def text_input(self, device_identifier: str, text: str) -> Optional['Future[ShellResult]']:
         text = text.replace(" ", "%s")
-        subprocess.run(
-            f'"{self.adb}" -s {device_identifier} shell input text {text}',
-            shell=True, text=True, capture_output=True
-        )
+        return self._input(device_identifier, f'input text {text}')
 
-    def keyevent_input(self, device_identifier: str, code: Union[int, str]) -> None:
+    def keyevent_input(self, device_identifier: str, code: Union[int, str]) -> Optional['Future[ShellResult]']:
         try:
             code = int(code)
-            subprocess.run(
-                f'"{self.adb}" -s {device_identifier} shell input keyevent {code}',
-                shell=True, text=True, capture_output=True
-            )
         except ValueError:
             logger.error(f"Invalid keyevent code: {code}")
+            return None
+        return self._input(device_identifier, f'input keyevent {code}')
 
     def orientation(self, device_identifier: str) -> str:
-        orientation = subprocess.run(
-            f'"{self.adb}" -s {device_identifier} shell dumpsys window | find "mCurrentRotation"',
-            shell=True, text=True, capture_output=True
-        )
-        self.check_connection(orientation)
-        return orientation.stdout.replace("mCurrentRotation=", "").strip()
+        return self._window_state(device_identifier).rotation
 
     def resolution(self, device_identifier: str) -> List[int]:
-        orientation = self.orientation()
-
-        res = subprocess.run(
-            f'"{self.adb}" -s {device_identifier} shell wm size',
-            shell=True, text=True, capture_output=True
-        )
-        self.check_connection(res)
-        res = res.stdout.split()[-1]
-
-        if orientation == 'ROTATION_90' or orientation == 'ROTATION_270': #roation logic
-            res = res.replace('x', ' ').split()[1] + 'x' + res.replace('x', ' ').split()[0]
-        return list(map(int, res.replace('x', ' ').split()))
+        # swapped for ROTATION_90/ROTATION_270 by WindowState
+        return self._window_state(device_identifier).resolution
 
     def wlan_ip(self, device_identifier: str) -> str:
         try:
-            result = subprocess.run(
-                f'"{self.adb}" -s {device_identifier} shell ip addr show wlan0',
-                shell=True, 
-                text=True, 
-                capture_output=True
-            )
+            result = self._shell(device_identifier, 'ip addr show wlan0')
             if result.returncode != 0:
                 return "N/A"
                 
@@ -194,27 +681,108 @@ class BaseDevice:
         except Exception:
             return "N/A"
 
-    def screenInput(self, device_identifier: str, x: int, y: int) -> None:
-        subprocess.Popen(
-            f'"{self.adb}" -s {device_identifier} shell input tap {x} {y}',
-            shell=True, text=True
-        )
-
-    def screenSwipe(self, device_identifier: str, x1: int, y1: int, x2: int, y2: int) -> None:
+    def coordinate_space(self, device_identifier: str) -> CoordinateSpace:
+        """Base/device/app/screenshot transforms, rebuilt when the cached window state shows a rotation or resize.
+
+        Never waits on the device once a window state is cached, a stale one
+        is refreshed in the background (invalidate_window_state forces a
+        fresh read on the next call).
+        """
+        return self._coordinate_space(device_identifier)
+
+    def _coordinate_space(self, device_identifier: str) -> CoordinateSpace:
+        state = self._current_window_state(device_identifier)
+        if self.coords is None:
+            self.coords = CoordinateSpace(state, self.BASE_RESOLUTION_EMU, self.PORTRAIT_SWAP)
+        elif self.coords.update(state):
+            logger.info(f"Display changed to {state.rotation} {state.resolution}, rescaling coordinates")
+        else:
+            return self.coords
+        # Kept in sync for code that reads the scalars directly
+        self.abs_res_scalar_x, self.abs_res_scalar_y = self.coords.abs_scalars
+        self.rel_res_scalar_x, self.rel_res_scalar_y = self.coords.rel_scalars
+        self.ORIENTATION = state.rotation
+        return self.coords
+
+    def touch_device(self, device_identifier: str) -> TouchDevice:
+        """Touchscreen event node and axis ranges, discovered once per device"""
+        return self._touch_device(device_identifier)
+
+    def _touch_device(self, device_identifier: str) -> TouchDevice:
+        device = self._touch_devices.get(device_identifier)
+        if device is None:
+            result = self._shell(device_identifier, TOUCH_DISCOVERY_COMMAND)
+            device = find_touchscreen(result.stdout)
+            if device is None:
+                raise ConnectionError(f"No touchscreen input device found on {device_identifier}")
+            logger.info(f"Touchscreen {device.name} at {device.path}")
+            self._touch_devices[device_identifier] = device
+        return device
+
+    def touch_injector(self, device_identifier: str) -> TouchInjector:
+        return self._touch_injector(device_identifier)
+
+    def _touch_injector(self, device_identifier: str) -> TouchInjector:
+        # mapped with the cached window state, a stale one is refreshed in the background
+        state = self._current_window_state(device_identifier)
+        return TouchInjector(self._touch_device(device_identifier), state.resolution, state.rotation)
+
+    def set_input_backend(self, device_identifier: str, backend: str) -> None:
+        """'input' (the Android input tool) or 'sendevent' (raw touchscreen events)"""
+        if backend not in ('input', 'sendevent'):
+            raise ValueError(f"Unknown input backend: {backend}")
+        if backend == 'sendevent':
+            self._touch_device(device_identifier)
+        self.input_backend = backend
+
+    def screenInput(self, device_identifier: str, x: int, y: int) -> Optional['Future[ShellResult]']:
+        if self.input_backend == 'sendevent':
+            return self._input(device_identifier, self._touch_injector(device_identifier).tap_command(x, y), blocking=False)
+        return self._input(device_identifier, f'input tap {x} {y}', blocking=False)
+
+    def screenSwipe(self, device_identifier: str, x1: int, y1: int, x2: int, y2: int) -> Optional['Future[ShellResult]']:
         print('swipe')
-        subprocess.Popen(
-            f'"{self.adb}" -s {device_identifier} shell input touchscreen swipe {x1} {y1} {x2} {y2}',
-            shell=True
-        )
+        if self.input_backend == 'sendevent':
+            command = self._touch_injector(device_identifier).swipe_command(x1, y1, x2, y2)
+            return self._input(device_identifier, command, blocking=False)
+        return self._input(device_identifier, f'input touchscreen swipe {x1} {y1} {x2} {y2}', blocking=False)
+
+    def swipe_path(self, device_identifier: str, path: Sequence[Sequence[float]],
+                   times: Sequence[float]) -> 'Future[ShellResult]':
+        """Swipe through every point of path (display pixels) at times (seconds) in one shell command"""
+        injector = self._touch_injector(device_identifier) if self.input_backend == 'sendevent' else None
+        return self._input(device_identifier, path_command(path, times, injector), blocking=False)
+
+    def run_macro(self, device_identifier: str, macro: InputMacro, blocking: bool = True) -> 'Future[ShellResult]':
+        """Run all steps of a macro in one shell call, scaled by abs_res_scalar_x/y, through the input backend"""
+        scalar_x, scalar_y = self._coordinate_space(device_identifier).abs_scalars
+        injector = self._touch_injector(device_identifier) if self.input_backend == 'sendevent' else None
+        script = macro.compile(scalar_x, scalar_y, injector)
+        return self._input(device_identifier, script, blocking)
 
     def kill_connection(self, device_identifier: str) -> None:
-        subprocess.Popen(f'"{self.adb}" -s {device_identifier} kill-server',shell=True)
+        self.close_input_queue()
+        self.close_shell_session()
+        subprocess.run([self.adb, '-s', device_identifier, 'kill-server'], capture_output=True)
 
 class Phone(BaseDevice):
-    def __init__(self, name: str, vertical: bool = True, adb_path: Optional[str] = None) -> None:
-        super().__init__(adb_path)
+    PORTRAIT_SWAP = True
+
+    def __init__(
+        self,
+        name: str,
+        vertical: bool = True,
+        adb_path: Optional[str] = None,
+        transport: str = 'auto',
+        persistent_shell: bool = False,
+        profile_cache: Optional[ProfileCache] = None,
+        show_info: bool = True,
+        input_backend: str = 'input',
+        wire: Optional[AdbWireClient] = None
+    ) -> None:
+        profile = profile_cache.load(name) if profile_cache is not None and name else None
+        super().__init__(adb_path or (profile['adb_path'] if profile else None), transport, profile_cache, wire)
         self.name = name
-        self.identifier = self.name
         
         if not name:
             found = self.find_device()
@@ -223,24 +791,40 @@ class Phone(BaseDevice):
             self.name = found[0]
 
             logger.info(f"Auto-selected device: {self.name}")
+        self.identifier = self.name
+        self.warm_transport(self.name)
+
+        if persistent_shell:
+            self.open_shell_session(self.name)
+
+        # Original resolution scaling logic, all read from one window snapshot
+        state = self.window_state()
+        if profile is not None and not self._profile_matches(profile, state):
+            logger.info(f"Profile for {self.name} is out of date, refreshing")
+            profile = None
+
+        # Static getprop values are fetched once, battery/storage/ip together
+        self.properties = DeviceProperties(
+            lambda command: self._shell(self.name, command),
+            props=(profile.get('props') or None) if profile else None,
+            on_load=lambda props: self.save_profile(props)
+        )
 
-        # Original resolution scaling logic
-        phone_res = self.resolution()
-        app_res = self.app_resolution()
-        self.ORIENTATION = self.orientation()
-        self._currentapp = self.currentfocus()
+        # Scalars come from the coordinate space, which follows rotation changes
+        self._currentapp = state.focus
+        self._coordinate_space(self.name)
 
-        if self.ORIENTATION in ('ROTATION_90', 'ROTATION_270'):
-            self.abs_res_scalar_x = phone_res[0] / self.BASE_RESOLUTION_EMU[0]
-            self.abs_res_scalar_y = phone_res[1] / self.BASE_RESOLUTION_EMU[1]
-        else:
-            self.abs_res_scalar_x = phone_res[1] / self.BASE_RESOLUTION_EMU[0]
-            self.abs_res_scalar_y = phone_res[0] / self.BASE_RESOLUTION_EMU[1]
+        if profile is None:
+            self.save_profile()
 
-        self.rel_res_scalar_x = app_res[0] / self.BASE_RESOLUTION_EMU[0]
-        self.rel_res_scalar_y = app_res[1] / self.BASE_RESOLUTION_EMU[1]
+        if input_backend != 'input':
+            self.set_input_backend(input_backend)
         
-        self.get_info()
+        if show_info:
+            self.get_info()
+
+    def save_profile(self, props: Optional[Dict[str, str]] = None) -> None:
+        super().save_profile(self.name, props if props is not None else self.properties.loaded())
 
     def find_device(self) -> List[str]:
         devices_output = subprocess.run(
@@ -253,54 +837,22 @@ class Phone(BaseDevice):
         return [i for i in phones if i != 'device' and 'emulator' not in i]
 
     def get_battery_info(self) -> dict:
-        result = subprocess.run(
-            f'"{self.adb}" -s {self.name} shell dumpsys battery',
-            shell=True, text=True, capture_output=True
-        )
-        info = {}
-        for line in result.stdout.splitlines():
-            if ':' in line:
-                key, value = line.strip().split(':', 1)
-                info[key.strip()] = value.strip()
-        return info
+        return self.properties.volatile().battery
 
     def get_android_version(self) -> str:
-        result = subprocess.run(
-            f'"{self.adb}" -s {self.name} shell getprop ro.build.version.release',
-            shell=True, text=True, capture_output=True
-        )
-        return result.stdout.strip()
+        return self.properties.get('ro.build.version.release')
 
     def get_sdk_version(self) -> str:
-        result = subprocess.run(
-            f'"{self.adb}" -s {self.name} shell getprop ro.build.version.sdk',
-            shell=True, text=True, capture_output=True
-        )
-        return result.stdout.strip()
+        return self.properties.get('ro.build.version.sdk')
 
     def get_device_model(self) -> str:
-        result = subprocess.run(
-            f'"{self.adb}" -s {self.name} shell getprop ro.product.model',
-            shell=True, text=True, capture_output=True
-        )
-        return result.stdout.strip()
+        return self.properties.get('ro.product.model')
 
     def get_manufacturer(self) -> str:
-        result = subprocess.run(
-            f'"{self.adb}" -s {self.name} shell getprop ro.product.manufacturer',
-            shell=True, text=True, capture_output=True
-        )
-        return result.stdout.strip()
+        return self.properties.get('ro.product.manufacturer')
 
     def get_total_storage(self) -> str:
-        result = subprocess.run(
-            f'"{self.adb}" -s {self.name} shell df /data',
-            shell=True, text=True, capture_output=True
-        )
-        lines = result.stdout.splitlines()
-        if len(lines) >= 2:
-            return lines[1].split()[1]  # 2nd line, 2nd column typically = total space
-        return "Unknown"
+        return self.properties.volatile().total_storage
     
     def get_current_wifi_info(self) -> dict:
         output = subprocess.check_output(["adb", "shell", "dumpsys", "wifi"], text=True)
@@ -332,20 +884,14 @@ class Phone(BaseDevice):
         return info
 
     def get_current_wifi_info(self):
-        result = subprocess.run(
-            f'"{self.adb}" -s {self.name} shell dumpsys wifi',
-            shell=True, text=True, capture_output=True
-        )
+        result = self._shell(self.name, 'dumpsys wifi')
 
         output = result.stdout
         # Optionally parse output here, e.g. SSID, BSSID, RSSI, etc.
         return output
 
     def get_wifi_verbose_info(self):
-        result = subprocess.run(
-            f'"{self.adb}" -s {self.name} shell cmd wifi status',
-            shell=True, text=True, capture_output=True
-        )
+        result = self._shell(self.name, 'cmd wifi status')
 
         return result.stdout
 
@@ -356,31 +902,43 @@ class Phone(BaseDevice):
         logger.info(f"SDK Version: {self.get_sdk_version()}")
         logger.info(f"Battery Info: {self.get_battery_info()}")
         logger.info(f"Total Storage: {self.get_total_storage()}")
-        logger.info(f"WLAN IP: {self.wlan_ip(self.name)}")
+        logger.info(f"WLAN IP: {self.properties.volatile().wlan_ip}")
 
     def get_info(self) -> None:
         super().get_info(self.name)
     
-    def screenshot(self) -> Image.Image:
-        return super().screenshot(self.name)
-
-    def screenInput(self, x: int, y: int) -> None:
-        x_scaled = x * self.abs_res_scalar_x
-        y_scaled = y * self.abs_res_scalar_y
-        super().screenInput(self.name, x_scaled, y_scaled)
-
-    def screenSwipe(self, x1: int, y1: int, x2: int, y2: int) -> None:
-        x1_scaled = x1 * self.abs_res_scalar_x
-        y1_scaled = y1 * self.abs_res_scalar_y
-        x2_scaled = x2 * self.abs_res_scalar_x
-        y2_scaled = y2 * self.abs_res_scalar_y
-        super().screenSwipe(self.name, x1_scaled, y1_scaled, x2_scaled, y2_scaled)
-
-    def text_input(self, text: str) -> None:
-        super().text_input(self.name, text)
-
-    def keyevent_input(self, code: Union[int, str]) -> None:
-        super().keyevent_input(self.name, code)
+    def screenshot(self, raw: bool = False, as_image: bool = False, compress: Optional[str] = None,
+                   region: Optional[Tuple[int, int, int, int]] = None) -> Union[Image.Image, np.ndarray]:
+        return super().screenshot(self.name, raw, as_image, compress, region)
+
+    def frame_header(self) -> RawFrameHeader:
+        return super().frame_header(self.name)
+
+    def start_capture(self, capacity: int = 8, interval: float = 0.0,
+                      bus: Optional[FrameBus] = None) -> FrameGrabber:
+        return super().start_capture(self.name, capacity, interval, bus)
+
+    def publish_frame(self, bus: FrameBus) -> np.ndarray:
+        return super().publish_frame(self.name, bus)
+
+    def stream_frames(self, max_frames: Optional[int] = None, interval: float = 0.0) -> Iterator[Frame]:
+        return super().stream_frames(self.name, max_frames, interval)
+
+    def screenInput(self, x: int, y: int) -> Optional['Future[ShellResult]']:
+        x_scaled, y_scaled = self.coordinate_space().to_device(x, y)
+        return super().screenInput(self.name, x_scaled, y_scaled)
+
+    def screenSwipe(self, x1: int, y1: int, x2: int, y2: int) -> Optional['Future[ShellResult]']:
+        space = self.coordinate_space()
+        x1_scaled, y1_scaled = space.to_device(x1, y1)
+        x2_scaled, y2_scaled = space.to_device(x2, y2)
+        return super().screenSwipe(self.name, x1_scaled, y1_scaled, x2_scaled, y2_scaled)
+
+    def text_input(self, text: str) -> Optional['Future[ShellResult]']:
+        return super().text_input(self.name, text)
+
+    def keyevent_input(self, code: Union[int, str]) -> Optional['Future[ShellResult]']:
+        return super().keyevent_input(self.name, code)
         
     def resolution(self) -> List[int]:
         return super().resolution(self.name)
@@ -394,6 +952,45 @@ class Phone(BaseDevice):
     def app_resolution(self) -> List[float]:
         return super().app_resolution(self.name)
 
+    def window_state(self, max_age: Optional[float] = None) -> WindowState:
+        return super().window_state(self.name, max_age)
+
+    def invalidate_window_state(self) -> None:
+        super().invalidate_window_state(self.name)
+
+    def swipe_path(self, path: Sequence[Sequence[float]], times: Sequence[float]) -> 'Future[ShellResult]':
+        """path in base 1920x1080 coordinates, e.g. one of GestureGenerator.swipe_paths"""
+        scaled = self.coordinate_space().map(path)
+        return super().swipe_path(self.name, np.rint(scaled).astype(int), times)
+
+    def run_macro(self, macro: InputMacro, blocking: bool = True) -> 'Future[ShellResult]':
+        return super().run_macro(self.name, macro, blocking)
+
+    def set_input_backend(self, backend: str) -> None:
+        super().set_input_backend(self.name, backend)
+
+    def coordinate_space(self) -> CoordinateSpace:
+        return super().coordinate_space(self.name)
+
+    def touch_device(self) -> TouchDevice:
+        return super().touch_device(self.name)
+
+    def touch_injector(self) -> TouchInjector:
+        return super().touch_injector(self.name)
+
+    def wait_for_change(self, region: Optional[Tuple[int, int, int, int]] = None, timeout: float = 10.0,
+                        cancel: Optional[threading.Event] = None) -> Optional[np.ndarray]:
+        return super().wait_for_change(self.name, region, timeout, cancel)
+
+    def wait_until_stable(self, region: Optional[Tuple[int, int, int, int]] = None, stable_for: float = 0.5,
+                          timeout: float = 10.0, cancel: Optional[threading.Event] = None) -> Optional[np.ndarray]:
+        return super().wait_until_stable(self.name, region, stable_for, timeout, cancel)
+
+    def wait_for_text(self, target_text: Union[str, List[str]], region: Optional[Tuple[int, int, int, int]] = None,
+                      timeout: float = 10.0, cancel: Optional[threading.Event] = None,
+                      engine: Optional[OcrEngine] = None, cache: Optional[OcrCache] = None) -> List[List[int]]:
+        return super().wait_for_text(self.name, target_text, region, timeout, cancel, engine, cache)
+
     def wlan_ip(self, device_identifier: str) -> str:
         return super().wlan_ip(self.name)
 
@@ -404,32 +1001,52 @@ class Emulator(BaseDevice):
         devices: int = 0,
         emulator: bool = True,
         name: Optional[str] = None,
-        adb_path: Optional[str] = None
+        adb_path: Optional[str] = None,
+        transport: str = 'auto',
+        persistent_shell: bool = False,
+        profile_cache: Optional[ProfileCache] = None,
+        show_info: bool = True,
+        input_backend: str = 'input',
+        wire: Optional[AdbWireClient] = None
     ) -> None:
-        super().__init__(adb_path)
+        if not emulator:
+            raise SystemError("Only emulator devices are supported")
+
+        profile = profile_cache.load(f"emulator-{port}") if profile_cache is not None else None
+        super().__init__(adb_path or (profile['adb_path'] if profile else None), transport, profile_cache, wire)
         self.port = str(port)
-        self.devices = self.find_devices()
         self.emulator = emulator
         self.name = name
-        
-        if not emulator:
-            raise SystemError("Only emulator devices are supported")
-        
-        self._connect_emulators()
+
+        # A known emulator skips the adb devices/connect subprocesses, the
+        # window snapshot below still proves it is reachable
+        if profile is None:
+            self.devices = self.find_devices()
+            self._connect_emulators()
+        else:
+            self.devices = -1
         self.identifier = f"emulator-{self.port}"
+        self.warm_transport(self.identifier)
+
+        if persistent_shell:
+            self.open_shell_session(self.identifier)
         
-        # Original resolution scaling logic
-        emu_res = self.resolution()
-        app_res = self.app_resolution()
-        self.ORIENTATION = self.orientation()
-        self._currentapp = self.currentfocus()
-
-        self.abs_res_scalar_x = emu_res[0] / self.BASE_RESOLUTION_EMU[0]
-        self.abs_res_scalar_y = emu_res[1] / self.BASE_RESOLUTION_EMU[1]
-        self.rel_res_scalar_x = app_res[0] / self.BASE_RESOLUTION_EMU[0]
-        self.rel_res_scalar_y = app_res[1] / self.BASE_RESOLUTION_EMU[1]
+        # Original resolution scaling logic, all read from one window snapshot
+        state = self.window_state()
+        self._currentapp = state.focus
+        self._coordinate_space(self.identifier)
+
+        if not self._profile_matches(profile, state):
+            self.save_profile()
+
+        if input_backend != 'input':
+            self.set_input_backend(input_backend)
         
-        self.get_info()
+        if show_info:
+            self.get_info()
+
+    def save_profile(self) -> None:
+        super().save_profile(self.identifier)
 
     def find_devices(self) -> List[str]:
         devices_output = subprocess.run(
@@ -479,26 +1096,38 @@ class Emulator(BaseDevice):
     def get_info(self) -> None:
         super().get_info(self.identifier)
     
-    def screenshot(self) -> Image.Image:
-        return super().screenshot(self.identifier)
+    def screenshot(self, raw: bool = False, as_image: bool = False, compress: Optional[str] = None,
+                   region: Optional[Tuple[int, int, int, int]] = None) -> Union[Image.Image, np.ndarray]:
+        return super().screenshot(self.identifier, raw, as_image, compress, region)
+
+    def frame_header(self) -> RawFrameHeader:
+        return super().frame_header(self.identifier)
+
+    def start_capture(self, capacity: int = 8, interval: float = 0.0,
+                      bus: Optional[FrameBus] = None) -> FrameGrabber:
+        return super().start_capture(self.identifier, capacity, interval, bus)
+
+    def publish_frame(self, bus: FrameBus) -> np.ndarray:
+        return super().publish_frame(self.identifier, bus)
 
-    def screenInput(self, x: int, y: int) -> None:
-        x_scaled = x * self.abs_res_scalar_x
-        y_scaled = y * self.abs_res_scalar_y
-        super().screenInput(self.identifier, x_scaled, y_scaled)
+    def stream_frames(self, max_frames: Optional[int] = None, interval: float = 0.0) -> Iterator[Frame]:
+        return super().stream_frames(self.identifier, max_frames, interval)
 
-    def screenSwipe(self, x1: int, y1: int, x2: int, y2: int) -> None:
-        x1_scaled = x1 * self.abs_res_scalar_x
-        y1_scaled = y1 * self.abs_res_scalar_y
-        x2_scaled = x2 * self.abs_res_scalar_x
-        y2_scaled = y2 * self.abs_res_scalar_y
-        super().screenSwipe(self.identifier, x1_scaled, y1_scaled, x2_scaled, y2_scaled)
+    def screenInput(self, x: int, y: int) -> Optional['Future[ShellResult]']:
+        x_scaled, y_scaled = self.coordinate_space().to_device(x, y)
+        return super().screenInput(self.identifier, x_scaled, y_scaled)
 
-    def text_input(self, text: str) -> None:
-        super().text_input(self.identifier, text)
+    def screenSwipe(self, x1: int, y1: int, x2: int, y2: int) -> Optional['Future[ShellResult]']:
+        space = self.coordinate_space()
+        x1_scaled, y1_scaled = space.to_device(x1, y1)
+        x2_scaled, y2_scaled = space.to_device(x2, y2)
+        return super().screenSwipe(self.identifier, x1_scaled, y1_scaled, x2_scaled, y2_scaled)
 
-    def keyevent_input(self, code: Union[int, str]) -> None:
-        super().keyevent_input(self.identifier, code)
+    def text_input(self, text: str) -> Optional['Future[ShellResult]']:
+        return super().text_input(self.identifier, text)
+
+    def keyevent_input(self, code: Union[int, str]) -> Optional['Future[ShellResult]']:
+        return super().keyevent_input(self.identifier, code)
 
     def resolution(self) -> List[int]:
         return super().resolution(self.identifier)
@@ -512,15 +1141,49 @@ class Emulator(BaseDevice):
     def app_resolution(self) -> List[float]:
         return super().app_resolution(self.identifier)
 
+    def window_state(self, max_age: Optional[float] = None) -> WindowState:
+        return super().window_state(self.identifier, max_age)
+
+    def invalidate_window_state(self) -> None:
+        super().invalidate_window_state(self.identifier)
+
+    def swipe_path(self, path: Sequence[Sequence[float]], times: Sequence[float]) -> 'Future[ShellResult]':
+        """path in base 1920x1080 coordinates, e.g. one of GestureGenerator.swipe_paths"""
+        scaled = self.coordinate_space().map(path)
+        return super().swipe_path(self.identifier, np.rint(scaled).astype(int), times)
+
+    def run_macro(self, macro: InputMacro, blocking: bool = True) -> 'Future[ShellResult]':
+        return super().run_macro(self.identifier, macro, blocking)
+
+    def set_input_backend(self, backend: str) -> None:
+        super().set_input_backend(self.identifier, backend)
+
+    def coordinate_space(self) -> CoordinateSpace:
+        return super().coordinate_space(self.identifier)
+
+    def touch_device(self) -> TouchDevice:
+        return super().touch_device(self.identifier)
+
+    def touch_injector(self) -> TouchInjector:
+        return super().touch_injector(self.identifier)
+
+    def wait_for_change(self, region: Optional[Tuple[int, int, int, int]] = None, timeout: float = 10.0,
+                        cancel: Optional[threading.Event] = None) -> Optional[np.ndarray]:
+        return super().wait_for_change(self.identifier, region, timeout, cancel)
+
+    def wait_until_stable(self, region: Optional[Tuple[int, int, int, int]] = None, stable_for: float = 0.5,
+                          timeout: float = 10.0, cancel: Optional[threading.Event] = None) -> Optional[np.ndarray]:
+        return super().wait_until_stable(self.identifier, region, stable_for, timeout, cancel)
+
+    def wait_for_text(self, target_text: Union[str, List[str]], region: Optional[Tuple[int, int, int, int]] = None,
+                      timeout: float = 10.0, cancel: Optional[threading.Event] = None,
+                      engine: Optional[OcrEngine] = None, cache: Optional[OcrCache] = None) -> List[List[int]]:
+        return super().wait_for_text(self.identifier, target_text, region, timeout, cancel, engine, cache)
+
     def wlan_ip(self) -> str:  # No device_identifier parameter here
         try:
             # First try eth0 which emulators often use
-            result = subprocess.run(
-                f'"{self.adb}" -s {self.identifier} shell ip addr show eth0',
-                shell=True,
-                text=True,
-                capture_output=True
-            )
+            result = self._shell(self.identifier, 'ip addr show eth0')
             if result.returncode == 0:
                 lines = [line.split() for line in result.stdout.splitlines() if 'inet' in line]
                 if lines:
@@ -533,37 +1196,66 @@ class Emulator(BaseDevice):
 
     def get_info(self) -> None:
         logger.info(f"\nInfo for emulator: {self.identifier}")
-        subprocess.run(f'"{self.adb}" -s {self.identifier} shell wm size', check=True, shell=True)
+        logger.info(f"Resolution: {self.resolution()}")
         logger.info(f"App in focus: {self._currentapp}")
         logger.info(f"Orientation: {self.ORIENTATION}")
         
         # Call our parameter-less wlan_ip()
         logger.info(f"wlan ip: {self.wlan_ip()}")
         
-        subprocess.run(f'"{self.adb}" -s {self.identifier} get-serialno', shell=True)
+        logger.info(f"Serial: {self.identifier}")
 
     def kill_connection(self) -> None:
         super().kill_connection(self.identifier)
 
 class ImageOcr:
-    def __init__(self, im: Image.Image) -> None:
+    def __init__(self, im: Image.Image, engine: Optional[OcrEngine] = None,
+                 debug_sink: Optional[DebugSink] = None, hit_memory: Optional[HitRegionMemory] = None) -> None:
         self.im = im
+        # Where phrases were last found on the device this image came from (its hit_memory), None remembers nothing
+        self.hit_memory = hit_memory
         self.BASE_RESOLUTION_EMU = [1920, 1080]
         self.BASE_RESOLUTION_PHN = [2400, 1080]
+
+        _configure_logging()
+        _configure_ocr_environment()
+
+        # Shared, long-lived OCR backend unless one is passed in
+        self.engine = engine or get_default_engine()
+
+        # Where locate_text debug images go, disabled unless set_debug_sink or debug_sink says otherwise
+        self.debug_sink = debug_sink or get_debug_sink()
         
-        # Ensure Tesseract is configured correctly
-        current_dir = os.getcwd()
-        tesseract_path = self._find_executable('tesseract.exe' if os.name == 'nt' else 'tesseract', current_dir)
-        if not tesseract_path:
-            raise FileNotFoundError("Tesseract OCR not found")
-        pytesseract.pytesseract.tesseract_cmd = tesseract_path
-
-    def crop_image(self, x1: int, y1: int, x2: int, y2: int, res_scalar_x: float, res_scalar_y: float) -> Image.Image:
-        x1_scaled = x1 * res_scalar_x
-        y1_scaled = y1 * res_scalar_y
-        x2_scaled = x2 * res_scalar_x
-        y2_scaled = y2 * res_scalar_y
-        return self.im.crop((x1_scaled, y1_scaled, x2_scaled, y2_scaled))
+        # Ensure Tesseract is configured correctly, searched once per engine
+        if isinstance(self.engine, PytesseractEngine) and not self.engine.tesseract_cmd:
+            current_dir = os.getcwd()
+            tesseract_path = self._find_executable('tesseract.exe' if os.name == 'nt' else 'tesseract', current_dir)
+            if not tesseract_path:
+                raise FileNotFoundError("Tesseract OCR not found")
+            self.engine.tesseract_cmd = tesseract_path
+
+    @classmethod
+    def from_frame(cls, frame: Union[SharedFrame, Frame, np.ndarray], pixel_format: int = 1,
+                   engine: Optional[OcrEngine] = None, debug_sink: Optional[DebugSink] = None,
+                   hit_memory: Optional[HitRegionMemory] = None) -> 'ImageOcr':
+        """ImageOcr over a raw frame without copying it, a SharedFrame must stay held while it is used"""
+        if isinstance(frame, SharedFrame):
+            if frame.released:
+                raise ValueError("Shared frame was already released")
+            image, pixel_format = frame.image, frame.pixel_format
+        elif isinstance(frame, Frame):
+            image = frame.image
+        else:
+            image = frame
+        return cls(frame_to_image(image, pixel_format), engine, debug_sink, hit_memory)
+
+    def crop_image(self, x1: int, y1: int, x2: int, y2: int, res_scalar_x: Optional[float] = None,
+                   res_scalar_y: Optional[float] = None, space: Optional[CoordinateSpace] = None) -> Image.Image:
+        """Crop a box given in base coordinates, through space's base_to_screenshot transform when given"""
+        if space is not None:
+            return self.im.crop(space.map_box((x1, y1, x2, y2), 'base_to_screenshot'))
+        res_scalar_x, res_scalar_y = self._scalars(res_scalar_x, res_scalar_y)
+        return self.im.crop(scale_box((x1, y1, x2, y2), res_scalar_x, res_scalar_y))
     
     def _find_executable(self, filename: str, search_path: str) -> Optional[str]:
         """Locate the Tesseract executable"""
@@ -579,49 +1271,40 @@ class ImageOcr:
 
         return im
 
-    def get_text(self) -> str:
-        """Get OCR text from the image (preprocessed for best accuracy)"""
+    def get_text(self, cache: Optional[OcrCache] = None) -> str:
+        """Get OCR text from the image (preprocessed for best accuracy)
+
+        With an OcrCache only the text bands that changed since earlier calls are OCRed.
+        """
         preprocessed_im = self.im
 
         # Perform OCR using Tesseract
         custom_config = r'--oem 3 --psm 6'
-        text = pytesseract.image_to_string(preprocessed_im,config=custom_config)
+        if cache is not None:
+            return cache.words(self.engine, np.array(preprocessed_im.convert('L')), config=custom_config)
+        text = self.engine.image_to_string(preprocessed_im, config=custom_config)
         return text.split()
 
-    def match_all_phrases(self,words_data, phrase_words, y_tolerance=10):
-        matches = []
-        i = 0
-        matched = []
-
-        for w in words_data:
-            if w['text'] == phrase_words[i]:
-                if matched and abs(w['top'] - matched[-1]['top']) > y_tolerance:
-                    matched = []
-                    i = 0
-                    continue
-                matched.append(w)
-                i += 1
-                if i == len(phrase_words):
-                    matches.append(matched)
-                    matched = []  # reset to allow next match
-                    i = 0
-            elif w['text'] == phrase_words[0]:
-                matched = [w]
-                i = 1
-            else:
-                matched = []
-                i = 0
-        return matches
-
+    def match_all_phrases(self, words_data, phrase_words, y_tolerance=10, max_distance=0):
+        """Runs of consecutive same-line words spelling phrase_words"""
+        return PhraseMatcher(words_data, max_distance, y_tolerance).find(' '.join(phrase_words))
 
-    def locate_text(self, target_text: str):
-        start = time.time()
+    def _scalars(self, res_scalar_x: Optional[float], res_scalar_y: Optional[float]) -> Tuple[float, float]:
+        """Base-to-image scalars, derived from the image size unless given"""
+        if res_scalar_x is None:
+            res_scalar_x = self.im.width / self.BASE_RESOLUTION_EMU[0]
+        if res_scalar_y is None:
+            res_scalar_y = self.im.height / self.BASE_RESOLUTION_EMU[1]
+        return res_scalar_x, res_scalar_y
 
+    def _ocr_words(self, box: Optional[Tuple[int, int, int, int]] = None, cache: Optional[OcrCache] = None):
+        """OCR the image (or the pixel box of it), word boxes are returned in full-image coordinates"""
         allowed_chars = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789,. '
+        offset_x, offset_y = (box[0], box[1]) if box else (0, 0)
+        im = self.im.crop(box) if box else self.im
 
-        """Locate specific text and save image with bounding boxes"""
         # Convert the PIL image to OpenCV format (NumPy array)
-        open_cv_image = cv2.cvtColor(np.array(self.im), cv2.COLOR_RGB2BGR)
+        open_cv_image = cv2.cvtColor(np.array(im), cv2.COLOR_RGB2BGR)
 
         # Convert the image to grayscale (helps in text detection)
         gray_image = cv2.cvtColor(open_cv_image, cv2.COLOR_BGR2GRAY)
@@ -631,77 +1314,118 @@ class ImageOcr:
 
         # Perform OCR using Tesseract
         custom_config = r'--oem 1 --psm 3'
-        detection_result = pytesseract.image_to_data(threshold_image, output_type=pytesseract.Output.DICT, config=custom_config)
+        if cache is not None:
+            detection_result = cache.image_to_data(self.engine, threshold_image, config=custom_config)
+        else:
+            detection_result = self.engine.image_to_data(threshold_image, config=custom_config)
 
         words_data = []
+        detections = []
         for i in range(len(detection_result['text'])):
-            word = detection_result['text'][i].strip().lower()
-            if word:
-                # Filter out single-character words and words that only consist of non-alphanumeric characters
-                if len(word) > 1 and re.search(r'[a-zA-Z0-9]', word):
-                    # Filter out unwanted characters (only allow alphanumeric and basic punctuation)
-                    word = ''.join(c for c in word if c in allowed_chars)
-
-                    # Only keep the word if it has at least one alphanumeric character
-                    if word and re.search(r'[a-zA-Z0-9]', word):
-                        x = detection_result['left'][i]
-                        y = detection_result['top'][i]
-                        w = detection_result['width'][i]
-                        h = detection_result['height'][i]
-                        words_data.append({
-                            'text': word,
-                            'left': x,
-                            'top': y,
-                            'width': w,
-                            'height': h
-                        })
+            raw = detection_result['text'][i].strip()
+            word = raw.lower()
+            if not word:
+                continue
+            x = detection_result['left'][i] + offset_x
+            y = detection_result['top'][i] + offset_y
+            w = detection_result['width'][i]
+            h = detection_result['height'][i]
+            # Filter out single-character words and words that only consist of non-alphanumeric characters
+            if len(word) > 1 and re.search(r'[a-zA-Z0-9]', word):
+                detections.append((raw, x, y, w, h))
+                # Filter out unwanted characters (only allow alphanumeric and basic punctuation)
+                word = ''.join(c for c in word if c in allowed_chars)
+
+                # Only keep the word if it has at least one alphanumeric character
+                if word and re.search(r'[a-zA-Z0-9]', word):
+                    words_data.append({
+                        'text': word,
+                        'left': x,
+                        'top': y,
+                        'width': w,
+                        'height': h
+                    })
+        return words_data, detections
+
+    def _match_phrases(self, words_data, phrases: List[str], padding: int = 5,
+                       max_distance: int = 0) -> Dict[str, List[List[int]]]:
+        return PhraseMatcher(words_data, max_distance).boxes(phrases, padding)
+
+    def locate_text(self, target_text: Union[str, List[str]], region: Optional[Tuple[int, int, int, int]] = None,
+                    res_scalar_x: Optional[float] = None, res_scalar_y: Optional[float] = None,
+                    remember: bool = True, cache: Optional[OcrCache] = None,
+                    max_distance: int = 0) -> List[List[int]]:
+        """Locate specific text and save image with bounding boxes
+
+        region limits the search to (x1, y1, x2, y2) in base 1920x1080 coordinates, scaled like crop_image.
+        With remember and a hit_memory, the area where the phrases were last found (inside region) is
+        searched first and the full region/frame only on a miss. Boxes are always in full-image pixel coordinates.
+        With an OcrCache only the text bands that changed since earlier calls are OCRed.
+        max_distance > 0 lets phrase words differ by that many edits from the OCR words.
+        """
+        start = time.time()
 
-        targets = []
         if isinstance(target_text, str):
             phrases = [target_text.lower()]
         else:
             phrases = [p.lower() for p in target_text]
 
+        res_scalar_x, res_scalar_y = self._scalars(res_scalar_x, res_scalar_y)
+        width, height = self.im.size
+        search_box = clamp_box(scale_box(region, res_scalar_x, res_scalar_y), width, height) if region else None
+
+        found = None
+        detections = []
+        remember = remember and self.hit_memory is not None
+        hint = self.hit_memory.region_for(phrases) if remember else None
+        if hint is not None:
+            hint_box = clamp_box(scale_box(hint, res_scalar_x, res_scalar_y), width, height)
+            # Never look outside the region the caller asked for
+            hint_box = intersect_box(hint_box, search_box or (0, 0, width, height))
+            if hint_box is not None:
+                words_data, detections = self._ocr_words(hint_box, cache)
+                found = self._match_phrases(words_data, phrases, max_distance=max_distance)
+                if not all(found.values()):
+                    logger.debug(f"Remembered region missed {target_text!r}, searching the full frame")
+                    found = None
+
+        if found is None:
+            words_data, detections = self._ocr_words(search_box, cache)
+            found = self._match_phrases(words_data, phrases, max_distance=max_distance)
+
+        targets = []
         for phrase in phrases:
-            phrase_words = phrase.split()
-            all_matches = self.match_all_phrases(words_data, phrase_words)
-
-            for match in all_matches:
-                # Just append the coordinates to targets, no drawing bounding boxes
-                x1 = match[0]['left']
-                y1 = match[0]['top']
-                x2 = match[-1]['left'] + match[-1]['width']
-                y2 = match[-1]['top'] + match[-1]['height']
-
-                # Adding padding/margin for clarity
-                padding = 5
-                x1, y1, x2, y2 = x1 - padding, y1 - padding, x2 + padding, y2 + padding
-
-                # Draw bounding box on the image (around valid words)
-                cv2.rectangle(open_cv_image, (x1, y1), (x2, y2), (0, 255, 0), 2)  # green box
+            boxes = found[phrase]
+            for x1, y1, x2, y2 in boxes:
                 print(f"Found phrase '{target_text}' at: (x1: {x1}, y1: {y1}, x2: {x2}, y2: {y2})")
                 targets.append([x1, y1, x2, y2])
 
-            if not all_matches:
+            if not boxes:
                 print(f"Phrase '{target_text}' not found.")
+            elif remember:
+                hit = union_box(boxes)
+                self.hit_memory.remember(phrase, scale_box(hit, 1 / res_scalar_x, 1 / res_scalar_y))
 
-        debug_image = open_cv_image.copy()  # make a copy so your final result isn't overwritten
+        # Drawing and encoding only happen when a debug sink takes this call
+        if self.debug_sink.wants():
+            self.debug_sink.submit('detected_text_filtered', self._debug_image(targets, detections))
 
-        # Draw bounding boxes for all valid words (after filtering out unwanted words)
-        for i in range(len(detection_result['text'])):
-            word = detection_result['text'][i].strip()
-            if word:
-                x = detection_result['left'][i]
-                y = detection_result['top'][i]
-                w = detection_result['width'][i]
-                h = detection_result['height'][i]
-
-                # Draw bounding boxes for valid words
-                if len(word) > 1 and re.search(r'[a-zA-Z0-9]', word):
-                    cv2.rectangle(debug_image, (x, y), (x + w, y + h), (255, 0, 0), 2)  # blue boxes
-                    cv2.putText(debug_image, word, (x, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
-
-        # Save the debug image for review
-        cv2.imwrite("detected_text_filtered.jpg", debug_image)
         print(f'OCR time: {time.time() - start}')
         return targets
+
+    def _debug_image(self, targets: List[List[int]], detections) -> np.ndarray:
+        """Copy of the image with found phrases (green) and all valid words (blue) drawn on it"""
+        debug_image = cv2.cvtColor(np.array(self.im), cv2.COLOR_RGB2BGR)
+        for x1, y1, x2, y2 in targets:
+            cv2.rectangle(debug_image, (x1, y1), (x2, y2), (0, 255, 0), 2)  # green box
+        for word, x, y, w, h in detections:
+            cv2.rectangle(debug_image, (x, y), (x + w, y + h), (255, 0, 0), 2)  # blue boxes
+            cv2.putText(debug_image, word, (x, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
+        return debug_image
+
+    def locate_template(self, matcher: TemplateMatcher, name: str, region: Optional[Tuple[int, int, int, int]] = None,
+                        res_scalar_x: Optional[float] = None, res_scalar_y: Optional[float] = None,
+                        threshold: Optional[float] = None, max_results: int = 1) -> List[List[int]]:
+        """Locate a fixed icon or button with template matching, boxes in the locate_text format"""
+        res_scalar_x, res_scalar_y = self._scalars(res_scalar_x, res_scalar_y)
+        return matcher.locate(self.im, name, region, res_scalar_x, res_scalar_y, threshold, max_results)
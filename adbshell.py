@@ -0,0 +1,182 @@
+import re
+import time
+import uuid
+import struct
+import logging
+import threading
+import subprocess
+from concurrent.futures import Future
+from typing import Optional, Dict, Tuple, NamedTuple
+
+from adbwire import AdbWireClient, AdbConnection, SHELL_STDIN, SHELL_STDOUT, SHELL_STDERR, SHELL_EXIT
+
+logger = logging.getLogger('ADBAPI')
+
+
+class ShellResult(NamedTuple):
+    command: str
+    output: str
+    exit_code: int
+    latency: float
+
+
+class _ProcessChannel:
+    """adb shell subprocess, stdin is a pipe so adbd runs the shell without a pty"""
+
+    def __init__(self, adb: str, serial: str) -> None:
+        self.proc = subprocess.Popen(
+            [adb, '-s', serial, 'shell'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+        )
+
+    def write(self, data: bytes) -> None:
+        self.proc.stdin.write(data)
+        self.proc.stdin.flush()
+
+    def read(self) -> bytes:
+        return self.proc.stdout.read1(64 * 1024)
+
+    def close(self) -> None:
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.proc.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+
+
+class _SocketChannel:
+    """Interactive shell over the adb server socket using shell protocol v2 packets"""
+
+    def __init__(self, wire: AdbWireClient, serial: str) -> None:
+        self.conn: AdbConnection = wire.open_service(serial, 'shell,v2,raw:')
+        # The client timeout only bounds opening the service, an idle session
+        # must not read as EOF after a few seconds without output
+        self.conn.settimeout(None)
+
+    def write(self, data: bytes) -> None:
+        self.conn.sock.sendall(struct.pack('<BI', SHELL_STDIN, len(data)) + data)
+
+    def read(self) -> bytes:
+        while True:
+            try:
+                packet_id, length = struct.unpack('<BI', self.conn.read_exact(5))
+                data = self.conn.read_exact(length) if length else b''
+            except (OSError, ConnectionError):
+                return b''
+            if packet_id in (SHELL_STDOUT, SHELL_STDERR):
+                if data:
+                    return data
+            elif packet_id == SHELL_EXIT:
+                return b''
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class ShellSession:
+    """One long-lived device shell that runs commands written to its stdin.
+
+    Every command is followed by a printf of a unique marker carrying a
+    sequence number and the exit status, so commands can be pipelined and
+    each one still gets its own output and exit code through a Future.
+    """
+
+    def __init__(self, adb: str, serial: str, wire: Optional[AdbWireClient] = None) -> None:
+        self.serial = serial
+        self._marker = f'__ADBAPI_{uuid.uuid4().hex}__'
+        self._done = re.compile(rb'\n' + self._marker.encode() + rb'(\d+):(\d+)\n')
+        self._pending: Dict[int, Tuple[Future, str, float]] = {}
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self._channel = None
+        if wire is not None:
+            try:
+                self._channel = _SocketChannel(wire, serial)
+            except (OSError, ConnectionError) as e:
+                logger.warning(f"Shell socket for {serial} failed ({e}), using adb subprocess")
+        if self._channel is None:
+            self._channel = _ProcessChannel(adb, serial)
+
+        self._reader = threading.Thread(target=self._read_loop, name=f'adbshell-{serial}', daemon=True)
+        self._reader.start()
+
+    def submit(self, command: str) -> 'Future[ShellResult]':
+        """Queue command without waiting, the Future resolves to a ShellResult"""
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise ConnectionError(f"Shell session for {self.serial} is closed")
+            self._seq += 1
+            seq = self._seq
+            self._pending[seq] = (future, command, time.time())
+            # stdin is detached so a command can never swallow the ones queued after it
+            line = f'{{ {command}\n}} </dev/null 2>&1; printf "\\n{self._marker}{seq}:%d\\n" $?\n'
+            try:
+                self._channel.write(line.encode('utf-8'))
+            except (OSError, ConnectionError) as e:
+                del self._pending[seq]
+                raise ConnectionError(f"Shell session for {self.serial} lost: {e}") from e
+        return future
+
+    def run(self, command: str, timeout: Optional[float] = None) -> ShellResult:
+        return self.submit(command).result(timeout)
+
+    def _read_loop(self) -> None:
+        buffer = b''
+        while True:
+            chunk = self._channel.read()
+            if not chunk:
+                break
+            buffer += chunk
+            while True:
+                match = self._done.search(buffer)
+                if not match:
+                    break
+                output = buffer[:match.start()]
+                buffer = buffer[match.end():]
+                self._resolve(int(match.group(1)), output, int(match.group(2)))
+
+        with self._lock:
+            self._closed = True
+            pending, self._pending = self._pending, {}
+        for future, command, _ in pending.values():
+            future.set_exception(ConnectionError(f"Shell session for {self.serial} closed before '{command}' finished"))
+
+    def _resolve(self, seq: int, output: bytes, exit_code: int) -> None:
+        with self._lock:
+            entry = self._pending.pop(seq, None)
+        if entry is None:
+            return
+        future, command, started = entry
+        future.set_result(ShellResult(
+            command,
+            output.decode('utf-8', errors='replace'),
+            exit_code,
+            time.time() - started
+        ))
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            try:
+                self._channel.write(b'exit\n')
+            except (OSError, ConnectionError):
+                pass
+        self._channel.close()
+        self._reader.join(timeout=2)
@@ -0,0 +1,398 @@
+import os
+import queue
+import socket
+import struct
+import threading
+import logging
+from typing import Optional, List, Tuple, Dict, Iterator
+
+logger = logging.getLogger('ADBAPI')
+
+ADB_HOST = '127.0.0.1'
+ADB_PORT = 5037
+
+
+def server_port() -> int:
+    """adb server port, ANDROID_ADB_SERVER_PORT overrides 5037 like it does for adb itself"""
+    value = os.environ.get('ANDROID_ADB_SERVER_PORT')
+    return int(value) if value else ADB_PORT
+
+# shell protocol v2 packet ids
+SHELL_STDIN = 0
+SHELL_STDOUT = 1
+SHELL_STDERR = 2
+SHELL_EXIT = 3
+SHELL_CLOSE_STDIN = 4
+
+SYNC_DATA_MAX = 64 * 1024
+
+
+class AdbProtocolError(ConnectionError):
+    pass
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray(size)
+    view = memoryview(buf)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:], size - received)
+        if n == 0:
+            raise AdbProtocolError(f"Connection closed after {received} of {size} bytes")
+        received += n
+    return bytes(buf)
+
+
+def _recv_all(sock: socket.socket) -> bytes:
+    chunks = []
+    while True:
+        chunk = sock.recv(256 * 1024)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+
+class AdbConnection:
+    """A single socket to the adb server speaking the smart-socket protocol"""
+
+    def __init__(self, host: str = ADB_HOST, port: int = ADB_PORT, timeout: Optional[float] = 5.0) -> None:
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.serial: Optional[str] = None
+
+    def send_request(self, payload: str) -> None:
+        data = payload.encode('utf-8')
+        self.sock.sendall(b'%04x' % len(data) + data)
+        self._read_status(payload)
+
+    def _read_status(self, payload: str) -> None:
+        status = _recv_exact(self.sock, 4)
+        if status == b'OKAY':
+            return
+        if status == b'FAIL':
+            raise AdbProtocolError(f"{payload}: {self.read_string()}")
+        raise AdbProtocolError(f"{payload}: unexpected status {status!r}")
+
+    def read_string(self) -> str:
+        length = int(_recv_exact(self.sock, 4), 16)
+        return _recv_exact(self.sock, length).decode('utf-8', errors='replace')
+
+    def read_exact(self, size: int) -> bytes:
+        return _recv_exact(self.sock, size)
+
+    def read_all(self) -> bytes:
+        return _recv_all(self.sock)
+
+    def iter_chunks(self, size: int = 256 * 1024) -> Iterator[bytes]:
+        """Yield received data until the peer closes the stream"""
+        while True:
+            chunk = self.sock.recv(size)
+            if not chunk:
+                return
+            yield chunk
+
+    def settimeout(self, timeout: Optional[float]) -> None:
+        self.sock.settimeout(timeout)
+
+    def close(self) -> None:
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+    def __enter__(self) -> 'AdbConnection':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class AdbWireClient:
+    """Talks to the adb server directly instead of spawning adb.
+
+    The port defaults to server_port(), so ANDROID_ADB_SERVER_PORT is honoured.
+
+    After warm(serial) a small pool of sockets already switched to the
+    device transport is kept for that serial. A device service consumes its
+    socket, so every pooled socket that is taken is replaced by a
+    background thread, and commands only pay for sending the service
+    request. One sync session per device is reused for file transfers.
+    """
+
+    def __init__(
+        self,
+        host: str = ADB_HOST,
+        port: Optional[int] = None,
+        timeout: Optional[float] = 5.0,
+        pool_size: int = 2
+    ) -> None:
+        self.host = host
+        self.port = server_port() if port is None else port
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._idle: Dict[str, List[AdbConnection]] = {}
+        self._sync: Dict[str, AdbConnection] = {}
+        self._sync_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._shell_v2: Dict[str, bool] = {}
+        self._refill_queue: queue.Queue = queue.Queue()
+        self._refilling: set = set()
+        self._refiller: Optional[threading.Thread] = None
+
+    def connect(self) -> AdbConnection:
+        return AdbConnection(self.host, self.port, self.timeout)
+
+    # host services
+
+    def _host_query(self, service: str) -> str:
+        with self.connect() as conn:
+            conn.send_request(service)
+            return conn.read_string()
+
+    def version(self) -> int:
+        return int(self._host_query('host:version'), 16)
+
+    def devices(self) -> List[Tuple[str, str]]:
+        listing = self._host_query('host:devices')
+        return [tuple(line.split('\t', 1)) for line in listing.splitlines() if '\t' in line]
+
+    def features(self, serial: str) -> List[str]:
+        """Protocol features the device and server share, such as shell_v2"""
+        return self._host_query(f'host-serial:{serial}:features').split(',')
+
+    def supports_shell_v2(self, serial: str) -> bool:
+        """Checked once per device, errors reaching the device propagate and are not cached"""
+        supported = self._shell_v2.get(serial)
+        if supported is None:
+            supported = 'shell_v2' in self.features(serial)
+            if not supported:
+                logger.info(f"{serial} does not support shell protocol v2, using the legacy shell service")
+            self._shell_v2[serial] = supported
+        return supported
+
+    def is_available(self) -> bool:
+        try:
+            self.version()
+            return True
+        except (OSError, AdbProtocolError, ValueError):
+            return False
+
+    # transports
+
+    def _open_transport(self, serial: str) -> AdbConnection:
+        conn = self.connect()
+        try:
+            conn.send_request(f'host:transport:{serial}')
+        except Exception:
+            conn.close()
+            raise
+        conn.serial = serial
+        return conn
+
+    def warm(self, serial: str, background: bool = False) -> None:
+        """Pool transport sockets for serial from now on, filled up to pool_size right away or in the background"""
+        with self._lock:
+            self._idle.setdefault(serial, [])
+        if background:
+            self._schedule_refill(serial)
+        else:
+            self._fill(serial)
+
+    def _fill(self, serial: str) -> None:
+        while True:
+            with self._lock:
+                idle = self._idle.get(serial)
+                # close(serial) stops pooling
+                if idle is None or len(idle) >= self.pool_size:
+                    return
+            conn = self._open_transport(serial)
+            with self._lock:
+                idle = self._idle.get(serial)
+                if idle is None:
+                    conn.close()
+                    return
+                idle.append(conn)
+
+    def _schedule_refill(self, serial: str) -> None:
+        with self._lock:
+            if serial in self._refilling:
+                return
+            self._refilling.add(serial)
+            if self._refiller is None or not self._refiller.is_alive():
+                self._refiller = threading.Thread(target=self._refill_loop, name='adb-pool-refill', daemon=True)
+                self._refiller.start()
+        self._refill_queue.put(serial)
+
+    def _refill_loop(self) -> None:
+        while True:
+            serial = self._refill_queue.get()
+            try:
+                self._fill(serial)
+            except (OSError, AdbProtocolError) as e:
+                logger.debug(f"Could not refill the transport pool for {serial}: {e}")
+            finally:
+                with self._lock:
+                    self._refilling.discard(serial)
+
+    def _acquire(self, serial: str) -> Tuple[AdbConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(serial)
+            pooled = idle is not None
+            conn = idle.pop() if idle else None
+        if pooled:
+            self._schedule_refill(serial)
+        if conn is not None:
+            return conn, True
+        return self._open_transport(serial), False
+
+    def open_service(self, serial: str, service: str, timeout: Optional[float] = None) -> AdbConnection:
+        """Open a device service (shell:, exec:, sync:, ...) on a pooled transport.
+
+        Pooled sockets may have gone stale (device reconnected, server
+        restarted), so a failure on one of them is retried once on a fresh
+        socket.
+        """
+        conn, pooled = self._acquire(serial)
+        try:
+            conn.settimeout(self.timeout if timeout is None else timeout)
+            conn.send_request(service)
+            return conn
+        except (OSError, AdbProtocolError):
+            conn.close()
+            if not pooled:
+                raise
+        conn = self._open_transport(serial)
+        try:
+            conn.settimeout(self.timeout if timeout is None else timeout)
+            conn.send_request(service)
+            return conn
+        except Exception:
+            conn.close()
+            raise
+
+    # device services
+
+    def exec_out(self, serial: str, command: str, timeout: Optional[float] = None) -> bytes:
+        """Run command with exec: and return its raw, binary-safe stdout"""
+        with self.open_service(serial, f'exec:{command}', timeout) as conn:
+            return conn.read_all()
+
+    def shell(self, serial: str, command: str, timeout: Optional[float] = None) -> Tuple[bytes, bytes, int]:
+        """Run command with the shell service, returning (stdout, stderr, exit code).
+
+        Uses shell protocol v2 when the device supports it; the legacy
+        shell: service has no separate stderr and no exit status, so those
+        are reported as empty and 0.
+        """
+        if self.supports_shell_v2(serial):
+            with self.open_service(serial, f'shell,v2,raw:{command}', timeout) as conn:
+                return self._read_shell_v2(conn)
+        with self.open_service(serial, f'shell:{command}', timeout) as conn:
+            return conn.read_all(), b'', 0
+
+    @staticmethod
+    def _read_shell_v2(conn: AdbConnection) -> Tuple[bytes, bytes, int]:
+        stdout, stderr = [], []
+        exit_code = -1
+        while True:
+            try:
+                header = conn.read_exact(5)
+            except AdbProtocolError:
+                break
+            packet_id, length = struct.unpack('<BI', header)
+            data = conn.read_exact(length) if length else b''
+            if packet_id == SHELL_STDOUT:
+                stdout.append(data)
+            elif packet_id == SHELL_STDERR:
+                stderr.append(data)
+            elif packet_id == SHELL_EXIT:
+                exit_code = data[0] if data else 0
+                break
+        return b''.join(stdout), b''.join(stderr), exit_code
+
+    # sync service
+
+    def _sync_conn(self, serial: str) -> Tuple[AdbConnection, threading.Lock]:
+        with self._lock:
+            lock = self._sync_locks.setdefault(serial, threading.Lock())
+        with lock:
+            conn = self._sync.get(serial)
+            if conn is None:
+                conn = self.open_service(serial, 'sync:')
+                self._sync[serial] = conn
+        return conn, lock
+
+    def _drop_sync(self, serial: str) -> None:
+        conn = self._sync.pop(serial, None)
+        if conn is not None:
+            conn.close()
+
+    @staticmethod
+    def _sync_request(conn: AdbConnection, cmd: bytes, arg: bytes) -> None:
+        conn.sock.sendall(cmd + struct.pack('<I', len(arg)) + arg)
+
+    def stat(self, serial: str, path: str) -> Tuple[int, int, int]:
+        """Return (mode, size, mtime) of a device file; mode is 0 if it does not exist"""
+        conn, lock = self._sync_conn(serial)
+        with lock:
+            try:
+                self._sync_request(conn, b'STAT', path.encode('utf-8'))
+                reply = conn.read_exact(16)
+            except (OSError, AdbProtocolError):
+                self._drop_sync(serial)
+                raise
+        if reply[:4] != b'STAT':
+            self._drop_sync(serial)
+            raise AdbProtocolError(f"stat {path}: unexpected reply {reply[:4]!r}")
+        return struct.unpack('<III', reply[4:])
+
+    def pull(self, serial: str, path: str) -> bytes:
+        conn, lock = self._sync_conn(serial)
+        chunks = []
+        with lock:
+            try:
+                self._sync_request(conn, b'RECV', path.encode('utf-8'))
+                while True:
+                    cmd, length = struct.unpack('<4sI', conn.read_exact(8))
+                    if cmd == b'DATA':
+                        chunks.append(conn.read_exact(length))
+                    elif cmd == b'DONE':
+                        break
+                    elif cmd == b'FAIL':
+                        message = conn.read_exact(length).decode('utf-8', errors='replace')
+                        raise AdbProtocolError(f"pull {path}: {message}")
+                    else:
+                        raise AdbProtocolError(f"pull {path}: unexpected reply {cmd!r}")
+            except (OSError, AdbProtocolError):
+                self._drop_sync(serial)
+                raise
+        return b''.join(chunks)
+
+    def push(self, serial: str, data: bytes, path: str, mode: int = 0o644, mtime: int = 0) -> None:
+        conn, lock = self._sync_conn(serial)
+        with lock:
+            try:
+                self._sync_request(conn, b'SEND', f'{path},{mode}'.encode('utf-8'))
+                view = memoryview(data)
+                for offset in range(0, len(view), SYNC_DATA_MAX):
+                    chunk = view[offset:offset + SYNC_DATA_MAX]
+                    conn.sock.sendall(b'DATA' + struct.pack('<I', len(chunk)) + chunk)
+                conn.sock.sendall(b'DONE' + struct.pack('<I', mtime))
+                cmd, length = struct.unpack('<4sI', conn.read_exact(8))
+                if cmd == b'FAIL':
+                    message = conn.read_exact(length).decode('utf-8', errors='replace')
+                    raise AdbProtocolError(f"push {path}: {message}")
+                if cmd != b'OKAY':
+                    raise AdbProtocolError(f"push {path}: unexpected reply {cmd!r}")
+            except (OSError, AdbProtocolError):
+                self._drop_sync(serial)
+                raise
+
+    def close(self, serial: Optional[str] = None) -> None:
+        with self._lock:
+            serials = [serial] if serial else list(set(self._idle) | set(self._sync))
+            for s in serials:
+                for conn in self._idle.pop(s, []):
+                    conn.close()
+                self._drop_sync(s)
@@ -0,0 +1,496 @@
+from __future__ import annotations
+
+import os
+import struct
+import asyncio
+import logging
+from io import BytesIO
+from typing import Optional, List, Tuple, Union, Dict
+
+from lazyimport import LazyModule
+from adbwire import ADB_HOST, AdbProtocolError, server_port, SHELL_STDOUT, SHELL_STDERR, SHELL_EXIT
+from coordspace import CoordinateSpace
+from framebuffer import parse_screencap_header, decode_screencap, frame_to_image
+from windowstate import WindowState, WINDOW_STATE_COMMAND, parse_window_state
+
+np = LazyModule('numpy')
+Image = LazyModule('PIL.Image')
+
+logger = logging.getLogger('ADBAPI')
+
+
+async def _close(writer: asyncio.StreamWriter) -> None:
+    """Close the socket and wait until it is closed, errors of a dead connection are ignored"""
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except (OSError, ConnectionError):
+        pass
+
+
+class AsyncAdbClient:
+    """asyncio version of the adb smart-socket protocol, one connection per service"""
+
+    def __init__(self, host: str = ADB_HOST, port: Optional[int] = None) -> None:
+        self.host = host
+        self.port = server_port() if port is None else port
+        self._shell_v2: Dict[str, bool] = {}
+
+    async def _open(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        return await asyncio.open_connection(self.host, self.port)
+
+    @staticmethod
+    async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, payload: str) -> None:
+        data = payload.encode('utf-8')
+        writer.write(b'%04x' % len(data) + data)
+        await writer.drain()
+        try:
+            status = await reader.readexactly(4)
+            if status == b'OKAY':
+                return
+            if status == b'FAIL':
+                length = int(await reader.readexactly(4), 16)
+                message = (await reader.readexactly(length)).decode('utf-8', errors='replace')
+                raise AdbProtocolError(f"{payload}: {message}")
+        except asyncio.IncompleteReadError as e:
+            raise AdbProtocolError(f"{payload}: connection closed") from e
+        raise AdbProtocolError(f"{payload}: unexpected status {status!r}")
+
+    async def version(self) -> int:
+        reader, writer = await self._open()
+        try:
+            await self._request(reader, writer, 'host:version')
+            length = int(await reader.readexactly(4), 16)
+            return int(await reader.readexactly(length), 16)
+        finally:
+            await _close(writer)
+
+    async def features(self, serial: str) -> List[str]:
+        reader, writer = await self._open()
+        try:
+            await self._request(reader, writer, f'host-serial:{serial}:features')
+            length = int(await reader.readexactly(4), 16)
+            return (await reader.readexactly(length)).decode('utf-8', errors='replace').split(',')
+        finally:
+            await _close(writer)
+
+    async def supports_shell_v2(self, serial: str) -> bool:
+        """Checked once per device like AdbWireClient.supports_shell_v2"""
+        supported = self._shell_v2.get(serial)
+        if supported is None:
+            supported = 'shell_v2' in await self.features(serial)
+            self._shell_v2[serial] = supported
+        return supported
+
+    async def is_available(self) -> bool:
+        try:
+            await self.version()
+            return True
+        except (OSError, AdbProtocolError, ValueError, asyncio.IncompleteReadError):
+            return False
+
+    async def _service(self, serial: str, service: str) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await self._open()
+        try:
+            await self._request(reader, writer, f'host:transport:{serial}')
+            await self._request(reader, writer, service)
+        except BaseException:
+            await _close(writer)
+            raise
+        return reader, writer
+
+    async def exec_out(self, serial: str, command: str) -> bytes:
+        reader, writer = await self._service(serial, f'exec:{command}')
+        try:
+            return await reader.read()
+        finally:
+            await _close(writer)
+
+    async def shell(self, serial: str, command: str) -> Tuple[bytes, bytes, int]:
+        if not await self.supports_shell_v2(serial):
+            reader, writer = await self._service(serial, f'shell:{command}')
+            try:
+                return await reader.read(), b'', 0
+            finally:
+                await _close(writer)
+        reader, writer = await self._service(serial, f'shell,v2,raw:{command}')
+
+        stdout, stderr = [], []
+        exit_code = -1
+        try:
+            while True:
+                try:
+                    packet_id, length = struct.unpack('<BI', await reader.readexactly(5))
+                    data = await reader.readexactly(length) if length else b''
+                except asyncio.IncompleteReadError:
+                    break
+                if packet_id == SHELL_STDOUT:
+                    stdout.append(data)
+                elif packet_id == SHELL_STDERR:
+                    stderr.append(data)
+                elif packet_id == SHELL_EXIT:
+                    exit_code = data[0] if data else 0
+                    break
+        finally:
+            await _close(writer)
+        return b''.join(stdout), b''.join(stderr), exit_code
+
+
+class AsyncBaseDevice:
+    """asyncio counterpart of BaseDevice.
+
+    Every call runs on the event loop (adb server socket, or an adb child
+    process started with create_subprocess_exec as fallback), is bounded
+    by a timeout and can be cancelled; cancelling kills the child process
+    or closes the socket.
+    """
+    # Map base x along the display height while the device is upright (AsyncPhone)
+    PORTRAIT_SWAP = False
+
+    def __init__(self, adb_path: Optional[str] = None, transport: str = 'auto', timeout: float = 10.0,
+                 wire: Optional['AsyncAdbClient'] = None) -> None:
+        self.BASE_RESOLUTION_EMU = [1920, 1080]  # 16:9 aspect ratio
+        self.BASE_RESOLUTION_PHN = [2400, 1080]  # 20:9 aspect ratio (Samsung Galaxy S21)
+
+        self.abs_res_scalar_x = 1.0
+        self.abs_res_scalar_y = 1.0
+        self.rel_res_scalar_x = 1.0
+        self.rel_res_scalar_y = 1.0
+        self.ORIENTATION = ''
+        self._currentapp = ''
+
+        if transport not in ('auto', 'wire', 'subprocess'):
+            raise ValueError(f"Unknown transport: {transport}")
+        self.transport = transport
+        self.timeout = timeout
+        self._adb = adb_path
+        # An injected client (other host or port, a test server) is used instead of the default
+        self._client = wire
+        self.wire: Optional[AsyncAdbClient] = None
+
+        self.window_state_ttl = 2.0
+        self._window_states: Dict[str, WindowState] = {}
+        # Background refreshes of stale window states, one per device
+        self._window_refreshes: Dict[str, asyncio.Task] = {}
+
+        # Base to device transforms, follows the cached window state
+        self.coords: Optional[CoordinateSpace] = None
+
+    @property
+    def adb(self) -> str:
+        # only the subprocess fallback needs the executable, so look it up lazily
+        if self._adb is None:
+            self._adb = self.find_executable('adb.exe' if os.name == 'nt' else 'adb', os.getcwd())
+            if not self._adb:
+                raise FileNotFoundError("adb executable not found in the current directory or subdirectories.")
+        return self._adb
+
+    def find_executable(self, filename: str, search_path: str) -> Optional[str]:
+        for root, dirs, files in os.walk(search_path):
+            if filename in files:
+                return os.path.join(root, filename)
+        return None
+
+    async def start(self) -> None:
+        if self.transport == 'subprocess':
+            return
+        client = self._client or AsyncAdbClient()
+        if await client.is_available():
+            self.wire = client
+        elif self.transport == 'wire':
+            raise ConnectionError(f"ADB server socket not reachable on port {client.port}")
+        else:
+            logger.warning("ADB server socket not reachable, using adb subprocesses")
+
+    async def _run_process(self, *args: str) -> Tuple[bytes, bytes, int]:
+        proc = await asyncio.create_subprocess_exec(
+            self.adb, *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await proc.communicate()
+        except BaseException:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
+        return stdout, stderr, proc.returncode
+
+    async def _shell(self, device_identifier: str, command: str, timeout: Optional[float] = None) -> Tuple[str, str, int]:
+        async def run() -> Tuple[bytes, bytes, int]:
+            if self.wire is not None:
+                try:
+                    return await self.wire.shell(device_identifier, command)
+                except (OSError, AdbProtocolError) as e:
+                    if self.transport == 'wire':
+                        raise ConnectionError(str(e)) from e
+                    logger.warning(f"Wire shell failed ({e}), falling back to adb subprocess")
+            return await self._run_process('-s', device_identifier, 'shell', command)
+
+        stdout, stderr, returncode = await asyncio.wait_for(run(), self.timeout if timeout is None else timeout)
+        return stdout.decode('utf-8', errors='replace'), stderr.decode('utf-8', errors='replace'), returncode
+
+    async def _exec_out(self, device_identifier: str, command: str, timeout: Optional[float] = None) -> bytes:
+        async def run() -> bytes:
+            if self.wire is not None:
+                try:
+                    return await self.wire.exec_out(device_identifier, command)
+                except (OSError, AdbProtocolError) as e:
+                    if self.transport == 'wire':
+                        raise ConnectionError(str(e)) from e
+                    logger.warning(f"Wire exec failed ({e}), falling back to adb subprocess")
+            stdout, stderr, returncode = await self._run_process('-s', device_identifier, 'exec-out', command)
+            if returncode != 0:
+                raise ConnectionError(stderr.decode('utf-8', errors='replace'))
+            return stdout
+
+        return await asyncio.wait_for(run(), self.timeout if timeout is None else timeout)
+
+    async def _window_state(self, device_identifier: str, max_age: Optional[float] = None) -> WindowState:
+        max_age = self.window_state_ttl if max_age is None else max_age
+        state = self._window_states.get(device_identifier)
+        if state is None or state.age > max_age:
+            stdout, stderr, returncode = await self._shell(device_identifier, WINDOW_STATE_COMMAND)
+            if returncode != 0:
+                raise ConnectionError(stderr)
+            state = parse_window_state(stdout)
+            self._window_states[device_identifier] = state
+        return state
+
+    async def window_state(self, device_identifier: str, max_age: Optional[float] = None) -> WindowState:
+        return await self._window_state(device_identifier, max_age)
+
+    async def _current_window_state(self, device_identifier: str) -> WindowState:
+        """Cached window state for taps and swipes, a stale one is refreshed in the background like BaseDevice"""
+        state = self._window_states.get(device_identifier)
+        if state is None:
+            return await self._window_state(device_identifier)
+        if state.age > self.window_state_ttl and device_identifier not in self._window_refreshes:
+            self._window_refreshes[device_identifier] = asyncio.ensure_future(
+                self._refresh_window_state(device_identifier)
+            )
+        return state
+
+    async def _refresh_window_state(self, device_identifier: str) -> None:
+        try:
+            await self._window_state(device_identifier, max_age=0)
+        except (ConnectionError, OSError, asyncio.TimeoutError, ValueError) as e:
+            logger.debug(f"Could not refresh the window state of {device_identifier}: {e}")
+        finally:
+            self._window_refreshes.pop(device_identifier, None)
+
+    async def coordinate_space(self, device_identifier: str) -> CoordinateSpace:
+        """Base/device/app transforms, rebuilt when the cached window state shows a rotation or resize"""
+        state = await self._current_window_state(device_identifier)
+        if self.coords is None:
+            self.coords = CoordinateSpace(state, self.BASE_RESOLUTION_EMU, self.PORTRAIT_SWAP)
+        elif self.coords.update(state):
+            logger.info(f"Display changed to {state.rotation} {state.resolution}, rescaling coordinates")
+        else:
+            return self.coords
+        # Kept in sync for code that reads the scalars directly
+        self.abs_res_scalar_x, self.abs_res_scalar_y = self.coords.abs_scalars
+        self.rel_res_scalar_x, self.rel_res_scalar_y = self.coords.rel_scalars
+        self.ORIENTATION = state.rotation
+        return self.coords
+
+    def invalidate_window_state(self, device_identifier: Optional[str] = None) -> None:
+        if device_identifier is None:
+            self._window_states.clear()
+        else:
+            self._window_states.pop(device_identifier, None)
+
+    async def orientation(self, device_identifier: str) -> str:
+        return (await self._window_state(device_identifier)).rotation
+
+    async def resolution(self, device_identifier: str) -> List[int]:
+        return (await self._window_state(device_identifier)).resolution
+
+    async def currentfocus(self, device_identifier: str) -> str:
+        return (await self._window_state(device_identifier)).focus
+
+    async def app_resolution(self, device_identifier: str) -> List[float]:
+        state = await self._window_state(device_identifier)
+        if state.app_size is None:
+            return [float(i) for i in state.resolution]
+        return list(state.app_size)
+
+    async def screenshot(
+        self,
+        device_identifier: str,
+        raw: bool = False,
+        as_image: bool = False,
+        timeout: Optional[float] = None
+    ) -> Union[Image.Image, np.ndarray]:
+        data = await self._exec_out(device_identifier, 'screencap' if raw else 'screencap -p', timeout)
+        if raw:
+            frame = decode_screencap(data)
+            return frame_to_image(frame, parse_screencap_header(data).pixel_format) if as_image else frame
+        return Image.open(BytesIO(data))
+
+    async def screenInput(self, device_identifier: str, x: int, y: int, timeout: Optional[float] = None) -> int:
+        return (await self._shell(device_identifier, f'input tap {x} {y}', timeout))[2]
+
+    async def screenSwipe(
+        self,
+        device_identifier: str,
+        x1: int, y1: int, x2: int, y2: int,
+        timeout: Optional[float] = None
+    ) -> int:
+        return (await self._shell(device_identifier, f'input touchscreen swipe {x1} {y1} {x2} {y2}', timeout))[2]
+
+    async def text_input(self, device_identifier: str, text: str, timeout: Optional[float] = None) -> int:
+        text = text.replace(" ", "%s")
+        return (await self._shell(device_identifier, f'input text {text}', timeout))[2]
+
+    async def keyevent_input(self, device_identifier: str, code: Union[int, str], timeout: Optional[float] = None) -> int:
+        code = int(code)
+        return (await self._shell(device_identifier, f'input keyevent {code}', timeout))[2]
+
+    async def wlan_ip(self, device_identifier: str) -> str:
+        stdout, _, returncode = await self._shell(device_identifier, 'ip addr show wlan0')
+        if returncode != 0:
+            return "N/A"
+        lines = [line.split() for line in stdout.splitlines() if 'inet' in line]
+        return lines[0][1].split('/')[0] if lines else "N/A"
+
+
+class AsyncPhone(AsyncBaseDevice):
+    PORTRAIT_SWAP = True
+
+    def __init__(self, name: str, adb_path: Optional[str] = None, transport: str = 'auto', timeout: float = 10.0,
+                 wire: Optional[AsyncAdbClient] = None) -> None:
+        super().__init__(adb_path, transport, timeout, wire)
+        self.name = name
+        self.identifier = name
+
+    @classmethod
+    async def create(cls, name: str, **kwargs) -> 'AsyncPhone':
+        phone = cls(name, **kwargs)
+        await phone.connect()
+        return phone
+
+    async def connect(self) -> None:
+        await self.start()
+        if not self.name:
+            stdout, _, _ = await self._run_process('devices')
+            found = [i for i in stdout.decode().split()[4:] if i != 'device' and 'emulator' not in i]
+            if not found:
+                raise ConnectionError("No phone devices found")
+            self.name = self.identifier = found[0]
+            logger.info(f"Auto-selected device: {self.name}")
+
+        # Scalars come from the coordinate space, which follows rotation changes
+        state = await self.window_state()
+        self._currentapp = state.focus
+        await self.coordinate_space()
+
+    async def window_state(self, max_age: Optional[float] = None) -> WindowState:
+        return await super().window_state(self.name, max_age)
+
+    def invalidate_window_state(self) -> None:
+        super().invalidate_window_state(self.name)
+
+    async def coordinate_space(self) -> CoordinateSpace:
+        return await super().coordinate_space(self.name)
+
+    async def screenshot(self, raw: bool = False, as_image: bool = False, timeout: Optional[float] = None) -> Union[Image.Image, np.ndarray]:
+        return await super().screenshot(self.name, raw, as_image, timeout)
+
+    async def screenInput(self, x: int, y: int, timeout: Optional[float] = None) -> int:
+        x_scaled, y_scaled = (await self.coordinate_space()).to_device(x, y)
+        return await super().screenInput(self.name, x_scaled, y_scaled, timeout)
+
+    async def screenSwipe(self, x1: int, y1: int, x2: int, y2: int, timeout: Optional[float] = None) -> int:
+        space = await self.coordinate_space()
+        x1_scaled, y1_scaled = space.to_device(x1, y1)
+        x2_scaled, y2_scaled = space.to_device(x2, y2)
+        return await super().screenSwipe(self.name, x1_scaled, y1_scaled, x2_scaled, y2_scaled, timeout)
+
+    tap = screenInput
+    swipe = screenSwipe
+
+    async def text_input(self, text: str, timeout: Optional[float] = None) -> int:
+        return await super().text_input(self.name, text, timeout)
+
+    async def keyevent_input(self, code: Union[int, str], timeout: Optional[float] = None) -> int:
+        return await super().keyevent_input(self.name, code, timeout)
+
+    async def resolution(self) -> List[int]:
+        return await super().resolution(self.name)
+
+    async def orientation(self) -> str:
+        return await super().orientation(self.name)
+
+    async def currentfocus(self) -> str:
+        return await super().currentfocus(self.name)
+
+    async def app_resolution(self) -> List[float]:
+        return await super().app_resolution(self.name)
+
+    async def wlan_ip(self) -> str:
+        return await super().wlan_ip(self.name)
+
+
+class AsyncEmulator(AsyncBaseDevice):
+    def __init__(self, port: int = 5554, adb_path: Optional[str] = None, transport: str = 'auto', timeout: float = 10.0,
+                 wire: Optional[AsyncAdbClient] = None) -> None:
+        super().__init__(adb_path, transport, timeout, wire)
+        self.port = str(port)
+        self.identifier = f"emulator-{self.port}"
+
+    @classmethod
+    async def create(cls, port: int = 5554, **kwargs) -> 'AsyncEmulator':
+        emulator = cls(port, **kwargs)
+        await emulator.connect()
+        return emulator
+
+    async def connect(self) -> None:
+        await self.start()
+
+        # Scalars come from the coordinate space, which follows rotation changes
+        state = await self.window_state()
+        self._currentapp = state.focus
+        await self.coordinate_space()
+
+    async def window_state(self, max_age: Optional[float] = None) -> WindowState:
+        return await super().window_state(self.identifier, max_age)
+
+    def invalidate_window_state(self) -> None:
+        super().invalidate_window_state(self.identifier)
+
+    async def coordinate_space(self) -> CoordinateSpace:
+        return await super().coordinate_space(self.identifier)
+
+    async def screenshot(self, raw: bool = False, as_image: bool = False, timeout: Optional[float] = None) -> Union[Image.Image, np.ndarray]:
+        return await super().screenshot(self.identifier, raw, as_image, timeout)
+
+    async def screenInput(self, x: int, y: int, timeout: Optional[float] = None) -> int:
+        x_scaled, y_scaled = (await self.coordinate_space()).to_device(x, y)
+        return await super().screenInput(self.identifier, x_scaled, y_scaled, timeout)
+
+    async def screenSwipe(self, x1: int, y1: int, x2: int, y2: int, timeout: Optional[float] = None) -> int:
+        space = await self.coordinate_space()
+        x1_scaled, y1_scaled = space.to_device(x1, y1)
+        x2_scaled, y2_scaled = space.to_device(x2, y2)
+        return await super().screenSwipe(self.identifier, x1_scaled, y1_scaled, x2_scaled, y2_scaled, timeout)
+
+    tap = screenInput
+    swipe = screenSwipe
+
+    async def text_input(self, text: str, timeout: Optional[float] = None) -> int:
+        return await super().text_input(self.identifier, text, timeout)
+
+    async def keyevent_input(self, code: Union[int, str], timeout: Optional[float] = None) -> int:
+        return await super().keyevent_input(self.identifier, code, timeout)
+
+    async def resolution(self) -> List[int]:
+        return await super().resolution(self.identifier)
+
+    async def orientation(self) -> str:
+        return await super().orientation(self.identifier)
+
+    async def currentfocus(self) -> str:
+        return await super().currentfocus(self.identifier)
+
+    async def app_resolution(self) -> List[float]:
+        return await super().app_resolution(self.identifier)
@@ -0,0 +1,63 @@
+"""Per-command latency of the adb transports.
+
+    python -m benchmarks.bench_adbwire                 # fake server, wire client only
+    python -m benchmarks.bench_adbwire --serial R58M   # real adb server and device, adds `adb shell`
+
+Compares a fresh transport per command, the warmed transport pool and,
+against a real server, one adb subprocess per command.
+"""
+import argparse
+import shutil
+import statistics
+import subprocess
+import time
+
+from adbwire import AdbWireClient, server_port
+from tests.fakeadb import FakeAdbServer
+
+
+def measure(label, call, runs):
+    call()
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - started) * 1000)
+    print(f'{label:<28} median {statistics.median(samples):8.3f} ms   p95 {sorted(samples)[int(runs * 0.95) - 1]:8.3f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--serial', help='device on the real adb server, default is the fake server')
+    parser.add_argument('--runs', type=int, default=200)
+    args = parser.parse_args()
+
+    server = None
+    if args.serial:
+        serial, port = args.serial, server_port()
+    else:
+        server = FakeAdbServer()
+        serial, port = server.serials[0], server.port
+
+    fresh = AdbWireClient(port=port)
+    measure('wire, new transport', lambda: fresh.shell(serial, 'true'), args.runs)
+
+    pooled = AdbWireClient(port=port)
+    pooled.warm(serial)
+    measure('wire, pooled transport', lambda: pooled.shell(serial, 'true'), args.runs)
+
+    adb = shutil.which('adb')
+    if args.serial and adb:
+        measure('adb subprocess', lambda: subprocess.run([adb, '-s', serial, 'shell', 'true'],
+                                                         capture_output=True), min(args.runs, 50))
+    elif args.serial:
+        print('adb not on PATH, skipping the subprocess comparison')
+
+    fresh.close()
+    pooled.close()
+    if server is not None:
+        server.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Screen classification against a few thousand signatures.
+
+    python -m benchmarks.bench_classifier [--screens 5000] [--runs 200]
+
+Compares ScreenClassifier.classify (one pass over an inverted index)
+with calling are_n_elements_present_set once per screen, on random OCR
+word lists drawn from the same vocabulary.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from elementlist import ScreenClassifier, are_n_elements_present_set
+
+
+def make_signatures(rng, vocabulary, screens):
+    signatures = {}
+    for i in range(screens):
+        keywords = rng.sample(vocabulary, rng.randint(3, 8))
+        signatures[f'screen{i}'] = (keywords, rng.randint(2, len(keywords)))
+    return signatures
+
+
+def measure(label, call, word_lists):
+    samples = []
+    for words in word_lists:
+        started = time.perf_counter()
+        call(words)
+        samples.append((time.perf_counter() - started) * 1000)
+    print(f'{label:<28} median {statistics.median(samples):8.3f} ms   p95 {sorted(samples)[int(len(samples) * 0.95) - 1]:8.3f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--screens', type=int, default=5000)
+    parser.add_argument('--vocabulary', type=int, default=3000)
+    parser.add_argument('--runs', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = [f'word{i}' for i in range(args.vocabulary)]
+    signatures = make_signatures(rng, vocabulary, args.screens)
+    word_lists = [rng.sample(vocabulary, 60) for _ in range(args.runs)]
+
+    started = time.perf_counter()
+    classifier = ScreenClassifier(signatures)
+    print(f'index of {args.screens} screens built in {(time.perf_counter() - started) * 1000:.1f} ms')
+
+    def linear(words):
+        return [name for name, (keywords, n) in signatures.items() if are_n_elements_present_set(words, keywords, n)]
+
+    for words in word_lists[:20]:
+        assert sorted(m.name for m in classifier.classify(words)) == sorted(linear(words))
+    measure('ScreenClassifier.classify', classifier.classify, word_lists)
+    measure('are_n_elements_present_set', linear, word_lists)
+
+
+if __name__ == '__main__':
+    main()
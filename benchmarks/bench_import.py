@@ -0,0 +1,67 @@
+"""Time of `import adbapi2` in a fresh interpreter.
+
+    python -m benchmarks.bench_import [--runs 10] [--rev 03ccbb7~1]
+
+Every sample is a new subprocess, so nothing is cached in sys.modules.
+Compares the lazy import against importing adbapi2 together with the
+stack it used to load eagerly (cv2, numpy, PIL, pytesseract), and with
+--rev against the tree of an older git revision.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ('numpy', 'cv2', 'PIL.Image', 'pytesseract')
+
+PROBE = '''
+import importlib, sys, time
+started = time.perf_counter()
+import adbapi2
+for name in sys.argv[1:]:
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        pass
+elapsed = time.perf_counter() - started
+print(elapsed, ','.join(m for m in ('numpy', 'cv2', 'PIL', 'pytesseract') if m in sys.modules))
+'''
+
+
+def sample(cwd, modules=()):
+    output = subprocess.run([sys.executable, '-c', PROBE, *modules], cwd=cwd, capture_output=True, text=True,
+                            check=True).stdout.split()
+    return float(output[0]) * 1000, output[1] if len(output) > 1 else ''
+
+
+def measure(label, cwd, runs, modules=()):
+    samples, loaded = [], ''
+    for _ in range(runs):
+        elapsed, loaded = sample(cwd, modules)
+        samples.append(elapsed)
+    print(f'{label:<26} median {statistics.median(samples):8.1f} ms   loaded: {loaded or "-"}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--rev', help='git revision to compare against, e.g. the commit before the lazy imports')
+    args = parser.parse_args()
+
+    measure('import adbapi2', ROOT, args.runs)
+    measure('import adbapi2 + stack', ROOT, args.runs, HEAVY)
+    if args.rev:
+        with tempfile.TemporaryDirectory() as tree:
+            archive = os.path.join(tree, 'tree.tar')
+            subprocess.run(['git', 'archive', '-o', archive, args.rev], cwd=ROOT, check=True)
+            with tarfile.open(archive) as tar:
+                tar.extractall(tree)
+            measure(f'import adbapi2 @ {args.rev}', tree, args.runs)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""OCR calls per second of the engines.
+
+    python -m benchmarks.bench_ocr [--calls 20] [--image screenshot.png]
+
+Runs image_to_data on the same image with PytesseractEngine (one
+tesseract process per call) and TesserocrEngine (resident instances),
+skipping an engine whose backend is not installed.
+"""
+import argparse
+import time
+
+from PIL import Image, ImageDraw
+
+from ocrengine import PytesseractEngine, TesserocrEngine
+
+
+def sample_image():
+    image = Image.new('L', (1920, 1080), 255)
+    draw = ImageDraw.Draw(image)
+    for row in range(12):
+        draw.text((80, 60 + row * 80), f'Settings  Play  Shop  Level {row}  Continue', fill=0)
+    return image.resize((1920 * 2, 1080 * 2))
+
+
+def bench(label, engine, image, calls):
+    try:
+        engine.image_to_data(image, config='--oem 3 --psm 11')
+    except Exception as e:
+        print(f'{label:<18} skipped: {e}')
+        return
+    started = time.perf_counter()
+    for _ in range(calls):
+        engine.image_to_data(image, config='--oem 3 --psm 11')
+    elapsed = time.perf_counter() - started
+    print(f'{label:<18} {calls / elapsed:8.2f} calls/s   {elapsed / calls * 1000:8.1f} ms/call')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=20)
+    parser.add_argument('--image', help='image to OCR, default is rendered text')
+    args = parser.parse_args()
+    image = Image.open(args.image) if args.image else sample_image()
+
+    bench('pytesseract', PytesseractEngine(), image, args.calls)
+    try:
+        engine = TesserocrEngine()
+    except ImportError:
+        print(f'{"tesserocr":<18} skipped: not installed (pip install -r requirements-optional.txt)')
+        return
+    bench('tesserocr', engine, image, args.calls)
+    engine.close()
+
+
+if __name__ == '__main__':
+    main()
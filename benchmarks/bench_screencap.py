@@ -0,0 +1,99 @@
+"""Screenshot latency and transferred bytes, PNG against raw framebuffer.
+
+    python -m benchmarks.bench_screencap                 # fake server with a rendered 1080x2400 frame
+    python -m benchmarks.bench_screencap --serial R58M   # real adb server and device
+
+Times screenshot() as PNG, raw, and raw compressed with gzip on the
+device. The fake server only measures transfer and host side decoding,
+the device's PNG encoding cost shows up against a real device.
+"""
+import argparse
+import contextlib
+import gzip
+import io
+import statistics
+import struct
+import time
+
+from PIL import Image, ImageDraw
+
+from adbapi2 import Phone
+from adbwire import AdbWireClient
+from tests.fakeadb import FakeAdbServer
+
+WIDTH, HEIGHT = 1080, 2400
+
+
+def sample_frame():
+    image = Image.new('RGBA', (WIDTH, HEIGHT), (24, 26, 32, 255))
+    draw = ImageDraw.Draw(image)
+    for row in range(24):
+        top = 40 + row * 96
+        draw.rectangle((40, top, WIDTH - 40, top + 80), fill=(40 + row * 5, 90, 160, 255))
+        draw.text((70, top + 30), f'Item {row}   Settings   Play   Shop', fill=(255, 255, 255, 255))
+    return image
+
+
+def fake_device(image):
+    raw = struct.pack('<IIII', WIDTH, HEIGHT, 1, 0) + image.tobytes()
+    png = io.BytesIO()
+    image.save(png, 'PNG')
+    outputs = {'screencap': raw, 'screencap -p': png.getvalue(), 'screencap | gzip -1': gzip.compress(raw, 1)}
+    window = (b'Physical size: 1080x2400\n    mDisplayId=0 rotation=0 app=1080x2400 cur=1080x2400\n'
+              b'  mCurrentFocus=Window{1 u0 com.app/.Main}\n    mCurrentRotation=ROTATION_0\n')
+
+    def shell(command):
+        if command.startswith('wm size;'):
+            return window, b'', 0
+        if 'od -An -tu4' in command:
+            return f'34\n {WIDTH} {HEIGHT} 1\n'.encode(), b'', 0
+        return b'', b'', 0
+
+    return FakeAdbServer(serials=('fake',), shell=shell, exec_=lambda command: outputs[command])
+
+
+def capture(device, **kwargs):
+    frame = device.screenshot(**kwargs)
+    if isinstance(frame, Image.Image):
+        # Image.open is lazy, the PNG is only decoded on first pixel access
+        frame.load()
+
+
+def measure(label, device, runs, **kwargs):
+    samples = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        capture(device, **kwargs)
+        for _ in range(runs):
+            started = time.perf_counter()
+            capture(device, **kwargs)
+            samples.append((time.perf_counter() - started) * 1000)
+    stats = device.last_capture_stats
+    print(f'{label:<12} median {statistics.median(samples):8.1f} ms   '
+          f'transferred {stats.transferred / 1024:8.0f} KiB   ratio {stats.ratio:5.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--serial', help='device on the real adb server, default is the fake server')
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    server = None
+    if args.serial:
+        device = Phone(args.serial, show_info=False)
+    else:
+        server = fake_device(sample_frame())
+        device = Phone('fake', adb_path='adb', transport='wire', wire=AdbWireClient(port=server.port),
+                       show_info=False)
+
+    measure('png', device, args.runs)
+    measure('raw', device, args.runs, raw=True)
+    measure('raw gzip', device, args.runs, compress='gzip')
+
+    if server is not None:
+        device.wire.close()
+        server.close()
+
+
+if __name__ == '__main__':
+    main()
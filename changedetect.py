@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import time
+import threading
+from typing import Callable, Optional, Sequence, Tuple, TypeVar, Union
+
+from lazyimport import LazyModule
+
+cv2 = LazyModule('cv2')
+np = LazyModule('numpy')
+Image = LazyModule('PIL.Image')
+
+BASE_RESOLUTION = (1920, 1080)
+
+T = TypeVar('T')
+
+
+def signature(frame: Union[np.ndarray, Image.Image], size: Tuple[int, int] = (96, 54)) -> np.ndarray:
+    """Small grayscale thumbnail of a frame (raw screencap array or PIL image) for cheap diffs"""
+    if not isinstance(frame, np.ndarray):
+        frame = np.asarray(frame.convert('L'))
+    if frame.dtype == np.uint16:
+        # RGB_565, unpack before averaging so the packed bits do not mix
+        frame = ((frame >> 11) * 8 + ((frame >> 5) & 0x3F) * 4 + (frame & 0x1F) * 8).astype(np.float32) / 3
+    small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = small[:, :, :3].mean(axis=2)
+    return small.astype(np.float32)
+
+
+def region_slice(shape: Tuple[int, ...], region: Optional[Sequence[float]]) -> Tuple[slice, slice]:
+    """Cells of a signature covering a region in base 1920x1080 coordinates"""
+    if region is None:
+        return slice(None), slice(None)
+    height, width = shape[:2]
+    x1, y1, x2, y2 = region
+    cols = slice(int(x1 * width / BASE_RESOLUTION[0]), max(int(np.ceil(x2 * width / BASE_RESOLUTION[0])), 1))
+    rows = slice(int(y1 * height / BASE_RESOLUTION[1]), max(int(np.ceil(y2 * height / BASE_RESOLUTION[1])), 1))
+    return rows, cols
+
+
+class ChangeDetector:
+    """Compares frame signatures; a change is more than min_fraction of cells moving by pixel_threshold"""
+
+    def __init__(self, size: Tuple[int, int] = (96, 54), pixel_threshold: float = 12.0,
+                 min_fraction: float = 0.002) -> None:
+        self.size = size
+        self.pixel_threshold = pixel_threshold
+        self.min_fraction = min_fraction
+
+    def signature(self, frame: Union[np.ndarray, Image.Image]) -> np.ndarray:
+        return signature(frame, self.size)
+
+    def difference(self, a: np.ndarray, b: np.ndarray, region: Optional[Sequence[float]] = None) -> float:
+        """Fraction of cells (inside region) that changed between two signatures"""
+        rows, cols = region_slice(a.shape, region)
+        diff = np.abs(a[rows, cols] - b[rows, cols])
+        return float((diff > self.pixel_threshold).mean()) if diff.size else 0.0
+
+    def changed(self, a: np.ndarray, b: np.ndarray, region: Optional[Sequence[float]] = None) -> bool:
+        return self.difference(a, b, region) > self.min_fraction
+
+
+class AdaptivePoll:
+    """Poll interval that backs off while nothing changes and resets on a change"""
+
+    def __init__(self, min_interval: float = 0.05, max_interval: float = 1.0, factor: float = 1.5) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.factor = factor
+        self.interval = min_interval
+
+    def reset(self) -> None:
+        self.interval = self.min_interval
+
+    def backoff(self) -> float:
+        current = self.interval
+        self.interval = min(self.interval * self.factor, self.max_interval)
+        return current
+
+
+def _sleep(seconds: float, deadline: float, cancel: Optional[threading.Event]) -> bool:
+    """Wait until the next poll, False once the deadline passed or cancel was set"""
+    seconds = min(seconds, deadline - time.time())
+    if seconds > 0:
+        if cancel is not None:
+            cancel.wait(seconds)
+        else:
+            time.sleep(seconds)
+    return time.time() < deadline and not (cancel is not None and cancel.is_set())
+
+
+def wait_for_change(
+    capture: Callable[[], np.ndarray],
+    region: Optional[Sequence[float]] = None,
+    timeout: float = 10.0,
+    cancel: Optional[threading.Event] = None,
+    detector: Optional[ChangeDetector] = None,
+    poll: Optional[AdaptivePoll] = None,
+    reference: Optional[np.ndarray] = None
+) -> Optional[np.ndarray]:
+    """First captured frame that differs from reference (default: the first capture), None on timeout or cancel"""
+    detector = detector or ChangeDetector()
+    poll = poll or AdaptivePoll()
+    deadline = time.time() + timeout
+    base = detector.signature(reference if reference is not None else capture())
+    while _sleep(poll.backoff(), deadline, cancel):
+        frame = capture()
+        if detector.changed(base, detector.signature(frame), region):
+            return frame
+    return None
+
+
+def wait_until_stable(
+    capture: Callable[[], np.ndarray],
+    region: Optional[Sequence[float]] = None,
+    stable_for: float = 0.5,
+    timeout: float = 10.0,
+    cancel: Optional[threading.Event] = None,
+    detector: Optional[ChangeDetector] = None,
+    poll: Optional[AdaptivePoll] = None
+) -> Optional[np.ndarray]:
+    """Frame once the screen has not changed for stable_for seconds, None on timeout or cancel"""
+    detector = detector or ChangeDetector()
+    poll = poll or AdaptivePoll()
+    deadline = time.time() + timeout
+    frame = capture()
+    last = detector.signature(frame)
+    since = time.time()
+    while True:
+        if time.time() - since >= stable_for:
+            return frame
+        if not _sleep(min(poll.backoff(), stable_for), deadline, cancel):
+            return None
+        frame = capture()
+        current = detector.signature(frame)
+        if detector.changed(last, current, region):
+            last = current
+            since = time.time()
+            poll.reset()
+
+
+def wait_for_result(
+    capture: Callable[[], np.ndarray],
+    check: Callable[[np.ndarray], T],
+    region: Optional[Sequence[float]] = None,
+    timeout: float = 10.0,
+    cancel: Optional[threading.Event] = None,
+    detector: Optional[ChangeDetector] = None,
+    poll: Optional[AdaptivePoll] = None
+) -> Optional[T]:
+    """Poll until check(frame) is truthy and return it, None on timeout or cancel.
+
+    check (e.g. OCR) only runs on the first frame and on frames whose
+    region changed since the last frame it ran on.
+    """
+    detector = detector or ChangeDetector()
+    poll = poll or AdaptivePoll()
+    deadline = time.time() + timeout
+    checked = None
+    while True:
+        frame = capture()
+        current = detector.signature(frame)
+        if checked is None or detector.changed(checked, current, region):
+            checked = current
+            poll.reset()
+            result = check(frame)
+            if result:
+                return result
+        if not _sleep(poll.backoff(), deadline, cancel):
+            return None
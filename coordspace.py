@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from typing import Dict, Optional, Sequence, Tuple
+
+from lazyimport import LazyModule
+from windowstate import WindowState
+
+np = LazyModule('numpy')
+
+# 3x3 affine matrices as nested tuples, so mapping a single tap needs no numpy
+Matrix = Tuple[Tuple[float, float, float], Tuple[float, float, float], Tuple[float, float, float]]
+
+IDENTITY: Matrix = ((1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0))
+
+
+def scaling(scalar_x: float, scalar_y: float, offset_x: float = 0.0, offset_y: float = 0.0) -> Matrix:
+    return ((scalar_x, 0.0, offset_x), (0.0, scalar_y, offset_y), (0.0, 0.0, 1.0))
+
+
+def compose(a: Matrix, b: Matrix) -> Matrix:
+    """a after b"""
+    return tuple(
+        tuple(sum(a[i][k] * b[k][j] for k in range(3)) for j in range(3)) for i in range(3)
+    )
+
+
+def invert(m: Matrix) -> Matrix:
+    (a, b, tx), (c, d, ty), _ = m
+    det = a * d - b * c
+    if det == 0:
+        raise ValueError("Transform is not invertible")
+    ia, ib, ic, id_ = d / det, -b / det, -c / det, a / det
+    return ((ia, ib, -(ia * tx + ib * ty)), (ic, id_, -(ic * tx + id_ * ty)), (0.0, 0.0, 1.0))
+
+
+def apply(m: Matrix, x: float, y: float) -> Tuple[float, float]:
+    return m[0][0] * x + m[0][1] * y + m[0][2], m[1][0] * x + m[1][1] * y + m[1][2]
+
+
+class CoordinateSpace:
+    """Affine transforms between base 1920x1080 coordinates and the device.
+
+    - base_to_device: base to display pixels in the current rotation (abs_res_scalar)
+    - base_to_app: base to the app area (rel_res_scalar)
+    - device_to_screenshot: display pixels to pixels of a (possibly downscaled) screenshot
+    - base_to_screenshot: the two combined
+    Every transform has an inverse under the reversed name (device_to_base, ...).
+    The transforms are rebuilt by update() only when the window state
+    reports a different rotation, display size or app size.
+    portrait_swap keeps the Phone behaviour of mapping base x along the
+    display height while the device is upright.
+    """
+
+    def __init__(self, state: WindowState, base: Sequence[int] = (1920, 1080), portrait_swap: bool = False,
+                 screenshot_size: Optional[Sequence[int]] = None) -> None:
+        self.base = tuple(base)
+        self.portrait_swap = portrait_swap
+        self.screenshot_size = tuple(screenshot_size) if screenshot_size else None
+        self.state: Optional[WindowState] = None
+        self._transforms: Dict[str, Matrix] = {}
+        self.update(state)
+
+    @staticmethod
+    def _key(state: WindowState) -> tuple:
+        return state.rotation, state.display_size, state.app_size
+
+    def update(self, state: WindowState, force: bool = False) -> bool:
+        """Adopt a newer window state, True when the transforms had to be rebuilt"""
+        changed = force or self.state is None or self._key(state) != self._key(self.state)
+        self.state = state
+        if changed:
+            self._build()
+        return changed
+
+    def set_screenshot_size(self, size: Optional[Sequence[int]]) -> None:
+        self.screenshot_size = tuple(size) if size else None
+        self._build()
+
+    def _build(self) -> None:
+        state = self.state
+        resolution = state.resolution
+        base_x, base_y = self.base
+        if self.portrait_swap and not state.rotated:
+            abs_scalars = (resolution[1] / base_x, resolution[0] / base_y)
+        else:
+            abs_scalars = (resolution[0] / base_x, resolution[1] / base_y)
+        app = state.app_size or resolution
+        rel_scalars = (app[0] / base_x, app[1] / base_y)
+        if self.screenshot_size:
+            shot = scaling(self.screenshot_size[0] / resolution[0], self.screenshot_size[1] / resolution[1])
+        else:
+            shot = IDENTITY
+
+        forward = {
+            'base_to_device': scaling(*abs_scalars),
+            'base_to_app': scaling(*rel_scalars),
+            'device_to_screenshot': shot,
+        }
+        forward['base_to_screenshot'] = compose(shot, forward['base_to_device'])
+        transforms = dict(forward)
+        for name, matrix in forward.items():
+            source, target = name.split('_to_')
+            transforms[f'{target}_to_{source}'] = invert(matrix)
+        self._transforms = transforms
+        self.abs_scalars = abs_scalars
+        self.rel_scalars = rel_scalars
+
+    @property
+    def rotation(self) -> str:
+        return self.state.rotation
+
+    def matrix(self, transform: str = 'base_to_device') -> np.ndarray:
+        return np.array(self._transforms[transform], dtype=float)
+
+    def map_point(self, x: float, y: float, transform: str = 'base_to_device') -> Tuple[float, float]:
+        return apply(self._transforms[transform], x, y)
+
+    def map(self, points: Sequence[Sequence[float]], transform: str = 'base_to_device') -> np.ndarray:
+        """(N, 2) points in one call"""
+        m = self._transforms[transform]
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        linear = np.array([row[:2] for row in m[:2]])
+        offset = np.array([m[0][2], m[1][2]])
+        return points @ linear.T + offset
+
+    def map_box(self, box: Sequence[float], transform: str = 'base_to_device') -> Tuple[float, float, float, float]:
+        x1, y1 = self.map_point(box[0], box[1], transform)
+        x2, y2 = self.map_point(box[2], box[3], transform)
+        return min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)
+
+    def to_device(self, x: float, y: float) -> Tuple[float, float]:
+        return self.map_point(x, y, 'base_to_device')
+
+    def to_base(self, x: float, y: float) -> Tuple[float, float]:
+        return self.map_point(x, y, 'device_to_base')
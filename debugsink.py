@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import os
+import queue
+import logging
+import threading
+from typing import Optional
+
+from lazyimport import LazyModule
+
+cv2 = LazyModule('cv2')
+np = LazyModule('numpy')
+
+logger = logging.getLogger('ADBAPI')
+
+
+class DebugSink:
+    """Destination for debug images such as the boxes drawn by locate_text.
+
+    Callers ask wants() first and only draw and submit when it is True,
+    so a disabled sink costs nothing on the OCR path.
+    """
+
+    def wants(self) -> bool:
+        return False
+
+    def submit(self, name: str, image: np.ndarray) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class NullSink(DebugSink):
+    """Discards everything (the default)"""
+
+
+class FileSink(DebugSink):
+    """Writes every image synchronously, one unique file per call"""
+
+    def __init__(self, directory: str = 'debug', extension: str = '.jpg') -> None:
+        self.directory = directory
+        self.extension = extension
+        self._count = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def wants(self) -> bool:
+        return True
+
+    def _path(self, name: str) -> str:
+        with self._lock:
+            self._count += 1
+            count = self._count
+        return os.path.join(self.directory, f'{name}_{os.getpid()}_{count:06d}{self.extension}')
+
+    def write(self, path: str, image: np.ndarray) -> None:
+        if not cv2.imwrite(path, image):
+            logger.warning(f"Could not write debug image {path}")
+
+    def submit(self, name: str, image: np.ndarray) -> None:
+        self.write(self._path(name), image)
+
+
+class BackgroundSink(FileSink):
+    """Encodes and writes on a background thread through a bounded queue.
+
+    When the queue is full the image is dropped (counted in dropped)
+    instead of blocking the caller.
+    """
+
+    def __init__(self, directory: str = 'debug', extension: str = '.jpg', max_pending: int = 16) -> None:
+        super().__init__(directory, extension)
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(max_pending)
+        self._thread = threading.Thread(target=self._run, name='debug-sink', daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self.write(*item)
+            except Exception as e:
+                logger.warning(f"Debug image write failed: {e}")
+
+    def submit(self, name: str, image: np.ndarray) -> None:
+        try:
+            self._queue.put_nowait((self._path(name), image))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Write what is queued and stop the thread"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+
+class SampledSink(DebugSink):
+    """Passes one in every n calls on to another sink"""
+
+    def __init__(self, sink: DebugSink, every: int = 10) -> None:
+        if every < 1:
+            raise ValueError("every must be at least 1")
+        self.sink = sink
+        self.every = every
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    def wants(self) -> bool:
+        with self._lock:
+            self._calls += 1
+            return self._calls % self.every == 1 % self.every and self.sink.wants()
+
+    def submit(self, name: str, image: np.ndarray) -> None:
+        self.sink.submit(name, image)
+
+    def close(self) -> None:
+        self.sink.close()
+
+
+_default_sink: DebugSink = NullSink()
+_default_lock = threading.Lock()
+
+
+def get_debug_sink() -> DebugSink:
+    return _default_sink
+
+
+def set_debug_sink(sink: Optional[DebugSink]) -> None:
+    """Sink used by every ImageOcr that is not given one, None disables debug images"""
+    global _default_sink
+    with _default_lock:
+        _default_sink = sink or NullSink()
@@ -0,0 +1,213 @@
+import time
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, Future, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Union
+
+from adbapi2 import BaseDevice, ImageOcr
+
+logger = logging.getLogger('ADBAPI')
+
+# Worker threads when max_workers is not given
+DEFAULT_MAX_WORKERS = 32
+
+
+class DeviceBusyError(RuntimeError):
+    """The device's previous pool operation timed out and is still running"""
+
+
+class PoolResult(NamedTuple):
+    device: str
+    value: Any
+    error: Optional[BaseException]
+    elapsed: float
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class _Task:
+    """Start time and timeout state of one device operation"""
+
+    def __init__(self) -> None:
+        self.started: Optional[float] = None
+        self.timed_out = False
+        self.lock = threading.Lock()
+
+
+class DevicePool:
+    """Runs the same operation on many Phone/Emulator objects concurrently.
+
+    Every device gets its own PoolResult, so one failing or slow device
+    never hides the others. The timeout applies to each operation from the
+    moment it starts, and a device that misses it is reported with a
+    TimeoutError. The worker stays busy until the adb call returns,
+    because a blocked call cannot be interrupted from another thread, and
+    until then further operations on that device fail at once with
+    DeviceBusyError instead of taking another worker. The thread pool is
+    capped at max_workers (DEFAULT_MAX_WORKERS), threads are only started
+    as operations need them.
+    """
+
+    def __init__(
+        self,
+        devices: Iterable[BaseDevice] = (),
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> None:
+        self._devices: Dict[str, BaseDevice] = {}
+        self._lock = threading.Lock()
+        for device in devices:
+            self.add(device)
+        self.max_workers = max_workers or DEFAULT_MAX_WORKERS
+        self.timeout = timeout
+        # Devices whose timed-out operation is still holding a worker
+        self._busy: Dict[str, _Task] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @staticmethod
+    def _key(device: BaseDevice) -> str:
+        return getattr(device, 'identifier', None) or getattr(device, 'name', None) or str(id(device))
+
+    def add(self, device: BaseDevice) -> str:
+        key = self._key(device)
+        with self._lock:
+            self._devices[key] = device
+        return key
+
+    def remove(self, key: str) -> Optional[BaseDevice]:
+        with self._lock:
+            return self._devices.pop(key, None)
+
+    def get(self, key: str) -> BaseDevice:
+        return self._devices[key]
+
+    @property
+    def names(self) -> List[str]:
+        with self._lock:
+            return list(self._devices)
+
+    def __len__(self) -> int:
+        return len(self._devices)
+
+    def __iter__(self) -> Iterator[BaseDevice]:
+        with self._lock:
+            return iter(list(self._devices.values()))
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='devicepool')
+            return self._executor
+
+    @property
+    def busy(self) -> List[str]:
+        """Devices still running an operation that timed out"""
+        with self._lock:
+            return list(self._busy)
+
+    @staticmethod
+    def _call(device: BaseDevice, operation: Union[str, Callable], args: tuple, kwargs: dict) -> Any:
+        if isinstance(operation, str):
+            value = getattr(device, operation)(*args, **kwargs)
+        else:
+            value = operation(device, *args, **kwargs)
+        # Queued input returns a Future, the operation is done when it resolves
+        return value.result() if isinstance(value, Future) else value
+
+    def run(
+        self,
+        operation: Union[str, Callable],
+        *args,
+        timeout: Optional[float] = None,
+        devices: Optional[Iterable[str]] = None,
+        **kwargs
+    ) -> Dict[str, PoolResult]:
+        """Call operation on every device (a method name or a callable taking the device first)"""
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            targets = {k: d for k, d in self._devices.items() if devices is None or k in devices}
+            busy = [k for k in targets if k in self._busy]
+
+        results: Dict[str, PoolResult] = {}
+        for key in busy:
+            del targets[key]
+            error = DeviceBusyError(f"{key} is still running an operation that timed out")
+            results[key] = PoolResult(key, None, error, 0.0)
+
+        executor = self._get_executor()
+        tasks = {key: _Task() for key in targets}
+        pending: Dict[str, Future] = {
+            key: executor.submit(self._timed, device, operation, args, kwargs, tasks[key])
+            for key, device in targets.items()
+        }
+        while pending:
+            if timeout is None:
+                wait(pending.values())
+            else:
+                # Wake up at the earliest deadline, or soon when some operation has not started yet
+                now = time.time()
+                deadlines = [tasks[k].started + timeout for k in pending if tasks[k].started is not None]
+                waits = [max(0.0, d - now) for d in deadlines]
+                if len(deadlines) < len(pending):
+                    waits.append(0.05)
+                wait(pending.values(), min(waits), return_when=FIRST_COMPLETED)
+            now = time.time()
+            for key in list(pending):
+                future, task = pending[key], tasks[key]
+                if future.done():
+                    results[key] = future.result()
+                    del pending[key]
+                    continue
+                with task.lock:
+                    if timeout is None or task.started is None or now - task.started < timeout or future.done():
+                        continue
+                    task.timed_out = True
+                    with self._lock:
+                        self._busy[key] = task
+                results[key] = PoolResult(key, None, TimeoutError(f"{key} did not finish within {timeout}s"),
+                                          now - task.started)
+                logger.warning(f"Pool operation timed out on {key}")
+                del pending[key]
+        return results
+
+    def _timed(self, device: BaseDevice, operation: Union[str, Callable], args: tuple, kwargs: dict,
+               task: _Task) -> PoolResult:
+        key = self._key(device)
+        started = time.time()
+        task.started = started
+        try:
+            value = self._call(device, operation, args, kwargs)
+            return PoolResult(key, value, None, time.time() - started)
+        except Exception as e:
+            logger.warning(f"Pool operation failed on {key}: {e}")
+            return PoolResult(key, None, e, time.time() - started)
+        finally:
+            with task.lock:
+                if task.timed_out:
+                    with self._lock:
+                        self._busy.pop(key, None)
+
+    def tap_all(self, x: int, y: int, timeout: Optional[float] = None) -> Dict[str, PoolResult]:
+        """Tap on every device, each result holds the input command's ShellResult once it was applied"""
+        return self.run('screenInput', x, y, timeout=timeout)
+
+    def screenshot_all(self, timeout: Optional[float] = None, **kwargs) -> Dict[str, PoolResult]:
+        return self.run('screenshot', timeout=timeout, **kwargs)
+
+    def ocr_all(self, target_text: Union[str, List[str]], timeout: Optional[float] = None) -> Dict[str, PoolResult]:
+        """Screenshot every device and locate target_text on it"""
+        return self.run(lambda device: ImageOcr(device.screenshot(), hit_memory=device.hit_memory).locate_text(target_text), timeout=timeout)
+
+    def close(self, wait_for_running: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait_for_running)
+
+    def __enter__(self) -> 'DevicePool':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
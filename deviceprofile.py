@@ -0,0 +1,68 @@
+import os
+import re
+import json
+import time
+import logging
+from typing import Optional, Dict, Any
+
+logger = logging.getLogger('ADBAPI')
+
+DEFAULT_PROFILE_DIR = os.path.join(os.path.expanduser('~'), '.adbapi', 'profiles')
+PROFILE_VERSION = 1
+
+
+class ProfileCache:
+    """Device profiles persisted as one JSON file per serial.
+
+    A profile holds what is expensive to rediscover on every start (adb
+    path, display size, static getprop values). Loading only checks cheap
+    things: the file version, its age and that the adb path still exists.
+    Whether the device still matches is checked by the caller against a
+    live window snapshot. Scalars are not stored, they follow the rotation
+    and are rebuilt from that snapshot.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_age: float = 7 * 24 * 3600) -> None:
+        self.directory = directory or DEFAULT_PROFILE_DIR
+        self.max_age = max_age
+
+    def _path(self, serial: str) -> str:
+        # serials like 192.168.1.5:5555 are not valid file names everywhere
+        return os.path.join(self.directory, re.sub(r'[^A-Za-z0-9._-]', '_', serial) + '.json')
+
+    def load(self, serial: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(serial), 'r', encoding='utf-8') as f:
+                profile = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if profile.get('version') != PROFILE_VERSION or profile.get('serial') != serial:
+            return None
+        if time.time() - profile.get('saved_at', 0) > self.max_age:
+            logger.debug(f"Profile for {serial} expired")
+            return None
+        adb_path = profile.get('adb_path')
+        if not adb_path or not os.path.isfile(adb_path):
+            logger.debug(f"Profile for {serial} points to a missing adb executable")
+            return None
+        return profile
+
+    def save(self, serial: str, profile: Dict[str, Any]) -> None:
+        profile = dict(profile, serial=serial, version=PROFILE_VERSION, saved_at=time.time())
+        path = self._path(serial)
+        os.makedirs(self.directory, exist_ok=True)
+        # write then rename so concurrent workers never read a half-written file
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(profile, f, indent=2)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not save profile for {serial}: {e}")
+
+    def remove(self, serial: str) -> None:
+        try:
+            os.remove(self._path(serial))
+        except FileNotFoundError:
+            pass
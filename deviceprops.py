@@ -0,0 +1,107 @@
+import re
+import time
+import subprocess
+from typing import Callable, Dict, NamedTuple, Optional
+
+_GETPROP_RE = re.compile(r'^\[([^\]]+)\]: \[(.*)\]$')
+_SECTION = '__ADBAPI_SECTION__'
+
+# battery, storage and wlan address change while a session runs, so they
+# are read together in one shell command instead of being cached for good
+VOLATILE_COMMAND = f'dumpsys battery; echo {_SECTION}; df /data; echo {_SECTION}; ip addr show wlan0'
+
+
+class VolatileState(NamedTuple):
+    battery: Dict[str, str]
+    total_storage: str
+    wlan_ip: str
+    timestamp: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.timestamp
+
+
+def parse_getprop(text: str) -> Dict[str, str]:
+    props = {}
+    for line in text.splitlines():
+        match = _GETPROP_RE.match(line.strip())
+        if match:
+            props[match.group(1)] = match.group(2)
+    return props
+
+
+def parse_battery(text: str) -> Dict[str, str]:
+    info = {}
+    for line in text.splitlines():
+        if ':' in line:
+            key, value = line.strip().split(':', 1)
+            info[key.strip()] = value.strip()
+    return info
+
+
+def parse_total_storage(text: str) -> str:
+    lines = text.strip().splitlines()
+    if len(lines) >= 2:
+        return lines[1].split()[1]  # 2nd line, 2nd column typically = total space
+    return "Unknown"
+
+
+def parse_inet(text: str) -> str:
+    lines = [line.split() for line in text.splitlines() if 'inet' in line]
+    return lines[0][1].split('/')[0] if lines else "N/A"
+
+
+def parse_volatile(text: str, timestamp: Optional[float] = None) -> VolatileState:
+    sections = text.split(_SECTION)
+    sections += [''] * (3 - len(sections))
+    return VolatileState(
+        parse_battery(sections[0]),
+        parse_total_storage(sections[1]),
+        parse_inet(sections[2]),
+        time.time() if timestamp is None else timestamp
+    )
+
+
+class DeviceProperties:
+    """getprop read once per session plus a short-lived cache of volatile state"""
+
+    def __init__(
+        self,
+        shell: Callable[[str], subprocess.CompletedProcess],
+        volatile_ttl: float = 5.0,
+        props: Optional[Dict[str, str]] = None,
+        on_load: Optional[Callable[[Dict[str, str]], None]] = None
+    ) -> None:
+        self._shell = shell
+        self.volatile_ttl = volatile_ttl
+        self._props = props
+        self._on_load = on_load
+        self._volatile: Optional[VolatileState] = None
+
+    def props(self, refresh: bool = False) -> Dict[str, str]:
+        if self._props is None or refresh:
+            result = self._shell('getprop')
+            if result.returncode != 0:
+                raise ConnectionError(result.stderr)
+            self._props = parse_getprop(result.stdout)
+            if self._on_load is not None:
+                self._on_load(self._props)
+        return self._props
+
+    def loaded(self) -> Optional[Dict[str, str]]:
+        """getprop values if they were already fetched, without a round trip"""
+        return self._props
+
+    def get(self, key: str, default: str = '') -> str:
+        return self.props().get(key, default)
+
+    def volatile(self, max_age: Optional[float] = None) -> VolatileState:
+        max_age = self.volatile_ttl if max_age is None else max_age
+        if self._volatile is None or self._volatile.age > max_age:
+            self._volatile = parse_volatile(self._shell(VOLATILE_COMMAND).stdout)
+        return self._volatile
+
+    def invalidate(self) -> None:
+        self._props = None
+        self._volatile = None
@@ -1,4 +1,111 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+Threshold = Union[int, float]
+
+
 def are_n_elements_present_set(lst, elements, n):
     # Use set intersection for efficiency
-    common = set(elements) & set(lst)
-    return len(common) >= n
\ No newline at end of file
+    common = set(elements).intersection(lst)
+    return len(common) >= n
+
+
+class ScreenMatch(NamedTuple):
+    name: str
+    hits: int
+    total: int
+
+    @property
+    def score(self) -> float:
+        return self.hits / self.total
+
+
+class ScreenClassifier:
+    """Tells which known screen an OCR word list belongs to.
+
+    Every screen is a keyword set with a threshold: a count of keywords
+    that must be present (like n in are_n_elements_present_set) as an
+    int, or a fraction of the set as a float (1.0 = all). signatures maps
+    a name to its keywords, or to a (keywords, threshold) pair. An inverted
+    index from word to screens is built once, so all screens are scored in
+    one pass over the words.
+    """
+
+    def __init__(self, signatures: Optional[Dict[str, Union[Iterable[str], Tuple[Iterable[str], Threshold]]]] = None,
+                 case_sensitive: bool = False) -> None:
+        self.case_sensitive = case_sensitive
+        # None marks the slot of a removed screen
+        self._names: List[Optional[str]] = []
+        self._totals: List[int] = []
+        self._required: List[int] = []
+        self._slots: Dict[str, int] = {}
+        self._index: Dict[str, List[int]] = {}
+        for name, signature in (signatures or {}).items():
+            # Keywords are strings, so a number in second place can only be a threshold
+            if isinstance(signature, tuple) and len(signature) == 2 and isinstance(signature[1], (int, float)):
+                self.add(name, *signature)
+            else:
+                self.add(name, signature)
+
+    def _key(self, word: str) -> str:
+        return word if self.case_sensitive else word.lower()
+
+    def add(self, name: str, keywords: Iterable[str], threshold: Optional[Threshold] = None) -> None:
+        """Register a screen, threshold defaults to every keyword"""
+        keywords = {self._key(k) for k in keywords}
+        if not keywords:
+            raise ValueError(f"Screen {name!r} has no keywords")
+        if threshold is None:
+            required = len(keywords)
+        elif isinstance(threshold, float):
+            if not 0 < threshold <= 1:
+                raise ValueError(f"Fractional threshold must be in (0, 1], got {threshold}")
+            required = max(1, round(threshold * len(keywords)))
+        else:
+            required = int(threshold)
+            if not 1 <= required <= len(keywords):
+                raise ValueError(f"Threshold for {name!r} must be between 1 and {len(keywords)} keywords, got {threshold}")
+
+        # Replaced only once the new signature is known to be valid
+        if name in self._slots:
+            self.remove(name)
+        slot = len(self._names)
+        self._names.append(name)
+        self._totals.append(len(keywords))
+        self._required.append(required)
+        self._slots[name] = slot
+        for keyword in keywords:
+            self._index.setdefault(keyword, []).append(slot)
+
+    def remove(self, name: str) -> None:
+        slot = self._slots.pop(name)
+        # slots stay in place so the index does not need renumbering
+        self._names[slot] = None
+        for keyword in [k for k, slots in self._index.items() if slot in slots]:
+            self._index[keyword].remove(slot)
+            if not self._index[keyword]:
+                del self._index[keyword]
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._slots)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def classify(self, words: Iterable[str], limit: Optional[int] = None) -> List[ScreenMatch]:
+        """Screens whose threshold is met, best score first"""
+        hits: Dict[int, int] = {}
+        for word in {self._key(w) for w in words}:
+            for slot in self._index.get(word, ()):
+                hits[slot] = hits.get(slot, 0) + 1
+
+        matches = [
+            ScreenMatch(self._names[slot], count, self._totals[slot])
+            for slot, count in hits.items() if count >= self._required[slot]
+        ]
+        matches.sort(key=lambda m: (m.score, m.hits), reverse=True)
+        return matches[:limit] if limit is not None else matches
+
+    def best(self, words: Iterable[str]) -> Optional[str]:
+        matches = self.classify(words, 1)
+        return matches[0].name if matches else None
\ No newline at end of file
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import zlib
+import struct
+from typing import Iterable, NamedTuple, Optional, Tuple, Union
+
+from lazyimport import LazyModule
+
+np = LazyModule('numpy')
+Image = LazyModule('PIL.Image')
+
+# android.graphics.PixelFormat values written by screencap
+PIXEL_FORMATS = {
+    1: ('RGBA', 4),    # RGBA_8888
+    2: ('RGBX', 4),    # RGBX_8888
+    3: ('RGB', 3),     # RGB_888
+    4: ('BGR;16', 2),  # RGB_565, red in the high bits
+    5: ('BGRA', 4),    # BGRA_8888
+}
+
+
+class RawFrameHeader(NamedTuple):
+    width: int
+    height: int
+    pixel_format: int
+    header_size: int
+
+    @property
+    def bytes_per_pixel(self) -> int:
+        return PIXEL_FORMATS[self.pixel_format][1]
+
+    @property
+    def frame_size(self) -> int:
+        return self.width * self.height * self.bytes_per_pixel
+
+
+class CaptureStats(NamedTuple):
+    mode: str
+    transferred: int
+    frame_bytes: int
+    latency: float
+    shape: Tuple[int, ...]
+
+    @property
+    def ratio(self) -> float:
+        """Decoded bytes per transferred byte"""
+        return self.frame_bytes / self.transferred if self.transferred else 0.0
+
+
+def parse_screencap_header(data: Union[bytes, bytearray, memoryview]) -> RawFrameHeader:
+    """Read width/height/format from raw screencap output.
+
+    Android 9+ appends a colorspace word, so the header is 12 or 16 bytes;
+    which one is inferred from the payload size.
+    """
+    if len(data) < 12:
+        raise ValueError(f"Raw screencap output too short: {len(data)} bytes")
+    width, height, pixel_format = struct.unpack_from('<III', data, 0)
+    if pixel_format not in PIXEL_FORMATS:
+        raise ValueError(f"Unsupported screencap pixel format: {pixel_format}")
+    frame_size = width * height * PIXEL_FORMATS[pixel_format][1]
+    header_size = len(data) - frame_size
+    if header_size not in (12, 16):
+        raise ValueError(f"Raw screencap size mismatch: {len(data)} bytes for {width}x{height} format {pixel_format}")
+    return RawFrameHeader(width, height, pixel_format, header_size)
+
+
+def decode_pixels(data: Union[bytes, bytearray, memoryview], width: int, height: int,
+                  pixel_format: int, offset: int = 0) -> np.ndarray:
+    """View over headerless pixel rows, (height, width, channels) uint8 or (height, width) uint16 for RGB_565"""
+    if pixel_format == 4:
+        return np.frombuffer(data, dtype='<u2', count=width * height, offset=offset).reshape(height, width)
+    channels = PIXEL_FORMATS[pixel_format][1]
+    return np.frombuffer(data, dtype=np.uint8, count=width * height * channels,
+                         offset=offset).reshape(height, width, channels)
+
+
+def decode_screencap(data: Union[bytes, bytearray, memoryview]) -> np.ndarray:
+    """Return an (height, width, channels) uint8 view over raw screencap output without copying.
+
+    RGB_565 frames come back as an (height, width) uint16 view. The array
+    shares memory with data and is read-only when data is bytes.
+    """
+    header = parse_screencap_header(data)
+    return decode_pixels(data, header.width, header.height, header.pixel_format, header.header_size)
+
+
+def _check_complete(eof: bool, received: int) -> None:
+    if not received:
+        raise EOFError("No compressed data received")
+    if not eof:
+        raise EOFError(f"Compressed stream ended early after {received} bytes")
+
+
+def inflate(chunks: Iterable[bytes], size: Optional[int] = None) -> Tuple[bytearray, int]:
+    """Decompress a gzip stream chunk by chunk, returns (buffer, compressed bytes read).
+
+    With the expected size the output is written straight into one
+    preallocated buffer that decode_pixels can wrap without another copy.
+    A stream that is empty or ends before the gzip trailer raises EOFError,
+    data that is not gzip raises zlib.error, and a complete stream of the
+    wrong size raises ValueError.
+    """
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    received = 0
+    if size is None:
+        parts = []
+        for chunk in chunks:
+            received += len(chunk)
+            parts.append(inflater.decompress(chunk))
+        parts.append(inflater.flush())
+        _check_complete(inflater.eof, received)
+        return bytearray(b''.join(parts)), received
+
+    out = bytearray(size)
+    view = memoryview(out)
+    position = 0
+    for chunk in chunks:
+        received += len(chunk)
+        data = inflater.decompress(chunk)
+        view[position:position + len(data)] = data
+        position += len(data)
+    tail = inflater.flush()
+    view[position:position + len(tail)] = tail
+    position += len(tail)
+    _check_complete(inflater.eof, received)
+    if position != size:
+        raise ValueError(f"Compressed frame inflated to {position} bytes, expected {size}")
+    return out, received
+
+
+def frame_to_image(frame: np.ndarray, pixel_format: int = 1) -> Image.Image:
+    """Wrap a decoded frame in a PIL image, RGBA frames share memory with the array"""
+    height, width = frame.shape[:2]
+    raw_mode = PIXEL_FORMATS[pixel_format][0]
+    if pixel_format == 1:
+        return Image.frombuffer('RGBA', (width, height), frame, 'raw', 'RGBA', 0, 1)
+    if pixel_format == 5:
+        return Image.frombytes('RGBA', (width, height), frame, 'raw', 'BGRA')
+    return Image.frombytes('RGB', (width, height), frame, 'raw', raw_mode)
@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import time
+import struct
+import logging
+import multiprocessing
+from multiprocessing import shared_memory
+from typing import Any, NamedTuple, Optional, Tuple
+
+from lazyimport import LazyModule
+
+np = LazyModule('numpy')
+
+logger = logging.getLogger('ADBAPI')
+
+# Bus header: latest sequence number, latest slot (-1 when empty)
+_BUS_HEADER = struct.Struct('<Qi4x')
+# Slot header: seq, timestamp, height, width, channels, pixel format, refcount,
+# epoch (bumped when a lease is reclaimed), last acquire time, item size, device
+_SLOT_HEADER = struct.Struct('<QdIIIIiIdI4x32s')
+_REFS, _EPOCH, _ACQUIRED = 6, 7, 8
+
+# Item size to dtype, RGB_565 frames are published as they are decoded (uint16)
+_DTYPES = {1: 'u1', 2: '<u2'}
+
+
+class FrameBusHandle(NamedTuple):
+    """Everything a worker process needs to attach to a bus.
+
+    Pass it to workers when they are started (Process args or a Pool
+    initializer), the lock can only be shared that way.
+    """
+    name: str
+    slots: int
+    slot_bytes: int
+    lock: Any
+
+
+class FrameHeader(NamedTuple):
+    seq: int
+    timestamp: float
+    shape: Tuple[int, ...]
+    pixel_format: int
+    device: str
+    dtype: str = 'u1'
+
+
+class SharedFrame:
+    """A published frame held by a consumer.
+
+    image is a read-only ndarray over the shared slot, no copy. The slot
+    is not reused while the frame is held, release() (or leaving the with
+    block, or garbage collection) gives it back. Views and PIL images made
+    from image must not be used after that. A frame held longer than the
+    publisher's lease may be reclaimed and overwritten.
+    """
+
+    def __init__(self, bus: 'FrameBus', slot: int, header: FrameHeader, epoch: int = 0) -> None:
+        self.bus = bus
+        self.slot = slot
+        self.header = header
+        self.epoch = epoch
+        self.image: Optional[np.ndarray] = bus._view(slot, header.shape, header.dtype)
+
+    @property
+    def seq(self) -> int:
+        return self.header.seq
+
+    @property
+    def timestamp(self) -> float:
+        return self.header.timestamp
+
+    @property
+    def device(self) -> str:
+        return self.header.device
+
+    @property
+    def pixel_format(self) -> int:
+        return self.header.pixel_format
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.header.timestamp
+
+    @property
+    def released(self) -> bool:
+        return self.image is None
+
+    def release(self) -> None:
+        if self.image is not None:
+            self.image = None
+            self.bus._release(self.slot, self.epoch)
+
+    def __del__(self) -> None:
+        try:
+            self.release()
+        except Exception:
+            # The bus may already be closed or the interpreter shutting down
+            pass
+
+    def __enter__(self) -> 'SharedFrame':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.release()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Open an existing block, leaving unlinking to the owner"""
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching always registers the block, harmless in workers
+        # started by the owner since they share its resource tracker
+        return shared_memory.SharedMemory(name)
+
+
+class FrameBus:
+    """Fixed set of shared-memory frame slots for handing frames to other processes.
+
+    The producer publishes decoded frames, consumers in any process that
+    attached through handle() get zero-copy views. Every slot has a
+    reference count: the bus holds one on the newest frame and each held
+    SharedFrame one more. publish() writes into a slot nobody holds and
+    drops the frame (counted in dropped) when every slot is in use, so a
+    slow consumer never blocks capture.
+
+    A consumer that dies or never releases would pin its slot, so publish()
+    reclaims older slots whose last reference was taken more than lease
+    seconds ago (counted in reclaimed). A reclaimed SharedFrame's release()
+    is ignored.
+    """
+
+    def __init__(self, handle: FrameBusHandle, owner: bool = False, lease: Optional[float] = 30.0) -> None:
+        self.name = handle.name
+        self.slots = handle.slots
+        self.slot_bytes = handle.slot_bytes
+        self._lock = handle.lock
+        self.owner = owner
+        self.lease = lease
+        self.dropped = 0
+        self.reclaimed = 0
+        if owner:
+            self._meta = shared_memory.SharedMemory(
+                f'{handle.name}_meta', create=True, size=_BUS_HEADER.size + _SLOT_HEADER.size * handle.slots
+            )
+            self._data = shared_memory.SharedMemory(f'{handle.name}_data', create=True,
+                                                    size=handle.slots * handle.slot_bytes)
+            _BUS_HEADER.pack_into(self._meta.buf, 0, 0, -1)
+            for slot in range(handle.slots):
+                _SLOT_HEADER.pack_into(self._meta.buf, self._slot_offset(slot), 0, 0.0, 0, 0, 0, 0, 0, 0, 0.0, 1, b'')
+        else:
+            self._meta = _attach(f'{handle.name}_meta')
+            self._data = _attach(f'{handle.name}_data')
+
+    @classmethod
+    def create(cls, slots: int = 4, slot_bytes: int = 2400 * 1080 * 4, name: Optional[str] = None,
+               lease: Optional[float] = 30.0) -> 'FrameBus':
+        """New bus owned by this process, slot_bytes must fit the largest frame, lease=None never reclaims"""
+        if slots < 2:
+            raise ValueError("A frame bus needs at least 2 slots")
+        name = name or f'adbapi_{multiprocessing.current_process().pid}_{time.time_ns() % 10 ** 9}'
+        return cls(FrameBusHandle(name, slots, slot_bytes, multiprocessing.Lock()), owner=True, lease=lease)
+
+    @classmethod
+    def attach(cls, handle: FrameBusHandle) -> 'FrameBus':
+        return cls(handle)
+
+    def handle(self) -> FrameBusHandle:
+        return FrameBusHandle(self.name, self.slots, self.slot_bytes, self._lock)
+
+    def _slot_offset(self, slot: int) -> int:
+        return _BUS_HEADER.size + slot * _SLOT_HEADER.size
+
+    def _read_slot(self, slot: int) -> tuple:
+        return _SLOT_HEADER.unpack_from(self._meta.buf, self._slot_offset(slot))
+
+    def _write_slot(self, slot: int, fields: list) -> None:
+        _SLOT_HEADER.pack_into(self._meta.buf, self._slot_offset(slot), *fields)
+
+    def _add_ref(self, slot: int, delta: int) -> int:
+        """Change the refcount, a new reference renews the lease, returns the slot's epoch"""
+        fields = list(self._read_slot(slot))
+        fields[_REFS] += delta
+        if delta > 0:
+            fields[_ACQUIRED] = time.time()
+        self._write_slot(slot, fields)
+        return fields[_EPOCH]
+
+    def _header(self, slot: int) -> FrameHeader:
+        seq, timestamp, height, width, channels, pixel_format, _, _, _, itemsize, device = self._read_slot(slot)
+        shape = (height, width, channels) if channels else (height, width)
+        return FrameHeader(seq, timestamp, shape, pixel_format, device.rstrip(b'\0').decode(), _DTYPES[itemsize])
+
+    def _view(self, slot: int, shape: Tuple[int, ...], dtype: str = 'u1') -> np.ndarray:
+        view = np.ndarray(shape, dtype, self._data.buf, slot * self.slot_bytes)
+        view.flags.writeable = False
+        return view
+
+    def _release(self, slot: int, epoch: int) -> None:
+        with self._lock:
+            # A reclaimed slot no longer counts this reference
+            if self._read_slot(slot)[_EPOCH] == epoch:
+                self._add_ref(slot, -1)
+
+    def _reclaim(self, lease: float) -> int:
+        """Drop the consumer references of older slots held past the lease, the lock must be held"""
+        _, latest_slot = _BUS_HEADER.unpack_from(self._meta.buf, 0)
+        now = time.time()
+        count = 0
+        for slot in range(self.slots):
+            fields = list(self._read_slot(slot))
+            if slot == latest_slot or fields[_REFS] <= 0 or now - fields[_ACQUIRED] <= lease:
+                continue
+            logger.warning(f"Frame bus {self.name}: slot {slot} held for over {lease}s by "
+                           f"{fields[_REFS]} reference(s), reclaiming it")
+            fields[_REFS] = 0
+            fields[_EPOCH] += 1
+            self._write_slot(slot, fields)
+            count += 1
+        self.reclaimed += count
+        return count
+
+    def reclaim(self, lease: Optional[float] = None) -> int:
+        """Free slots whose holders kept them longer than lease seconds (default self.lease), returns how many"""
+        lease = self.lease if lease is None else lease
+        if lease is None:
+            return 0
+        with self._lock:
+            return self._reclaim(lease)
+
+    def publish(self, image: np.ndarray, device: str = '', pixel_format: int = 1,
+                timestamp: Optional[float] = None) -> Optional[int]:
+        """Copy a frame into a free slot and make it the newest, its seq or None when dropped.
+
+        Frames are uint8 or, for RGB_565 (pixel_format 4) as decode_pixels
+        returns them, uint16.
+        """
+        image = np.asarray(image)
+        if image.dtype == np.uint16:
+            image = image.astype('<u2', copy=False)
+        if image.dtype.kind != 'u' or image.dtype.itemsize not in _DTYPES or image.ndim not in (2, 3):
+            raise ValueError(f"Frames must be 2 or 3 dimensional uint8 or uint16 arrays, got {image.dtype} {image.shape}")
+        if image.nbytes > self.slot_bytes:
+            raise ValueError(f"Frame of {image.nbytes} bytes does not fit a {self.slot_bytes} byte slot")
+        height, width = image.shape[:2]
+        channels = image.shape[2] if image.ndim == 3 else 0
+        with self._lock:
+            free = self._free_slot()
+            if free is None and self.lease is not None and self._reclaim(self.lease):
+                free = self._free_slot()
+            if free is None:
+                self.dropped += 1
+                return None
+            # Held by the writer until the copy is done so no consumer picks it up half written
+            epoch = self._add_ref(free, 1)
+        np.copyto(np.ndarray(image.shape, image.dtype, self._data.buf, free * self.slot_bytes), image)
+        with self._lock:
+            latest_seq, latest_slot = _BUS_HEADER.unpack_from(self._meta.buf, 0)
+            seq = latest_seq + 1
+            # The writer's reference becomes the bus reference on the newest frame
+            self._write_slot(free, [
+                seq, time.time() if timestamp is None else timestamp, height, width, channels, pixel_format,
+                1, epoch, time.time(), image.dtype.itemsize, device.encode()[:32]
+            ])
+            _BUS_HEADER.pack_into(self._meta.buf, 0, seq, free)
+            if latest_slot >= 0:
+                self._add_ref(latest_slot, -1)
+        return seq
+
+    def _free_slot(self) -> Optional[int]:
+        return next((slot for slot in range(self.slots) if self._read_slot(slot)[_REFS] == 0), None)
+
+    @property
+    def seq(self) -> int:
+        """Sequence number of the newest frame, 0 before the first"""
+        return _BUS_HEADER.unpack_from(self._meta.buf, 0)[0]
+
+    def latest(self, max_age: Optional[float] = None) -> Optional[SharedFrame]:
+        """Hold the newest frame, None if there is none or it is older than max_age seconds"""
+        with self._lock:
+            _, slot = _BUS_HEADER.unpack_from(self._meta.buf, 0)
+            if slot < 0:
+                return None
+            header = self._header(slot)
+            if max_age is not None and time.time() - header.timestamp > max_age:
+                return None
+            epoch = self._add_ref(slot, 1)
+        return SharedFrame(self, slot, header, epoch)
+
+    def next_after(self, seq: int, timeout: Optional[float] = None, poll: float = 0.005) -> Optional[SharedFrame]:
+        """Hold the newest frame once one newer than seq is published, None after timeout"""
+        deadline = None if timeout is None else time.time() + timeout
+        while self.seq <= seq:
+            if deadline is not None and time.time() >= deadline:
+                return None
+            time.sleep(poll)
+        return self.latest()
+
+    def refcounts(self) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._read_slot(slot)[_REFS] for slot in range(self.slots))
+
+    def close(self) -> None:
+        """Detach, and unlink the shared memory when this process created it.
+
+        Fails with BufferError while SharedFrames of this process are still held.
+        """
+        self._meta.close()
+        self._data.close()
+        if self.owner:
+            self._meta.unlink()
+            self._data.unlink()
+
+    def __enter__(self) -> 'FrameBus':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import time
+import logging
+import threading
+from collections import deque
+from typing import Callable, Deque, Iterator, NamedTuple, Optional
+
+from lazyimport import LazyModule
+
+np = LazyModule('numpy')
+
+logger = logging.getLogger('ADBAPI')
+
+
+class Frame(NamedTuple):
+    seq: int
+    timestamp: float
+    image: np.ndarray
+
+    @property
+    def age(self) -> float:
+        """Seconds since the frame was captured"""
+        return time.time() - self.timestamp
+
+
+class FrameRingBuffer:
+    """Bounded buffer of the most recent frames.
+
+    A frame that falls out of the buffer before any reader received it is
+    counted in dropped.
+    """
+
+    def __init__(self, capacity: int = 8) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._frames: Deque[Frame] = deque()
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._last_read = 0
+        self.dropped = 0
+
+    def push(self, image: np.ndarray, timestamp: Optional[float] = None) -> Frame:
+        with self._cond:
+            self._seq += 1
+            frame = Frame(self._seq, time.time() if timestamp is None else timestamp, image)
+            self._frames.append(frame)
+            if len(self._frames) > self.capacity:
+                evicted = self._frames.popleft()
+                if evicted.seq > self._last_read:
+                    self.dropped += 1
+            self._cond.notify_all()
+            return frame
+
+    def _mark_read(self, frame: Frame) -> Frame:
+        self._last_read = max(self._last_read, frame.seq)
+        return frame
+
+    def latest(self, max_age: Optional[float] = None) -> Optional[Frame]:
+        """Newest frame, or None if there is none or it is older than max_age seconds"""
+        with self._cond:
+            if not self._frames:
+                return None
+            frame = self._frames[-1]
+            if max_age is not None and frame.age > max_age:
+                return None
+            return self._mark_read(frame)
+
+    def next_after(self, seq: int, timeout: Optional[float] = None) -> Optional[Frame]:
+        """Oldest buffered frame newer than seq, waiting up to timeout for one to arrive"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > seq, timeout):
+                return None
+            for frame in self._frames:
+                if frame.seq > seq:
+                    return self._mark_read(frame)
+            return None
+
+    def staleness(self) -> Optional[float]:
+        with self._cond:
+            return self._frames[-1].age if self._frames else None
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._frames)
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+
+class FrameGrabber:
+    """Background thread that keeps a FrameRingBuffer filled from a capture callable"""
+
+    def __init__(self, capture: Callable[[], np.ndarray], capacity: int = 8, interval: float = 0.0) -> None:
+        self.capture = capture
+        self.interval = interval
+        self.buffer = FrameRingBuffer(capacity)
+        self.errors = 0
+        self.last_capture_time = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'FrameGrabber':
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='frame-grabber', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            started = time.time()
+            try:
+                image = self.capture()
+            except StopIteration:
+                break
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Frame capture failed: {e}")
+                self._stop.wait(max(self.interval, 0.5))
+                continue
+            if image is not None:
+                self.buffer.push(image, started)
+            self.last_capture_time = time.time() - started
+            if self.interval:
+                self._stop.wait(max(0.0, self.interval - self.last_capture_time))
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def latest(self, max_age: Optional[float] = None) -> Optional[Frame]:
+        return self.buffer.latest(max_age)
+
+    def frames(self, timeout: Optional[float] = None) -> Iterator[Frame]:
+        """Yield frames in capture order until the grabber stops or no frame arrives within timeout"""
+        seq = self.buffer.seq
+        while True:
+            frame = self.buffer.next_after(seq, timeout if timeout is not None else 1.0)
+            if frame is None:
+                if timeout is not None or not self.running:
+                    return
+                continue
+            seq = frame.seq
+            yield frame
+
+    @property
+    def dropped(self) -> int:
+        return self.buffer.dropped
+
+    def staleness(self) -> Optional[float]:
+        return self.buffer.staleness()
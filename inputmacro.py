@@ -0,0 +1,121 @@
+import json
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from touchinput import TouchInjector
+
+MACRO_VERSION = 1
+
+
+class MacroStep(NamedTuple):
+    kind: str
+    args: Tuple[Any, ...]
+
+
+def _quote(text: str) -> str:
+    """Single-quote for the device shell"""
+    return "'" + text.replace("'", "'\\''") + "'"
+
+
+def _scaled(value: float, scalar: float) -> int:
+    return int(round(value * scalar))
+
+
+class InputMacro:
+    """Sequence of input steps run on the device as one shell script.
+
+    Coordinates are in base 1920x1080 and scaled by the device's
+    abs_res_scalar_x/y when compiled, like screenInput/screenSwipe. The
+    script is sent in a single `adb shell` call, with waits turned into
+    sleeps on the device, so a flow costs one round trip instead of one
+    per step. Compiled with a TouchInjector (the sendevent backend), taps
+    and swipes are written as raw touchscreen events instead of starting
+    the input tool. Builder methods return the macro so calls can be chained.
+    """
+
+    def __init__(self, name: str = 'macro', steps: Optional[List[MacroStep]] = None) -> None:
+        self.name = name
+        self.steps: List[MacroStep] = list(steps or [])
+
+    def _add(self, kind: str, *args: Any) -> 'InputMacro':
+        self.steps.append(MacroStep(kind, args))
+        return self
+
+    def tap(self, x: float, y: float) -> 'InputMacro':
+        return self._add('tap', x, y)
+
+    def swipe(self, x1: float, y1: float, x2: float, y2: float, duration: Optional[int] = None) -> 'InputMacro':
+        """duration in milliseconds, the input tool's default when None"""
+        return self._add('swipe', x1, y1, x2, y2, duration)
+
+    def wait(self, seconds: float) -> 'InputMacro':
+        return self._add('wait', seconds)
+
+    def text(self, text: str) -> 'InputMacro':
+        return self._add('text', text)
+
+    def keyevent(self, code: Union[int, str]) -> 'InputMacro':
+        return self._add('keyevent', int(code))
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def commands(self, scalar_x: float = 1.0, scalar_y: float = 1.0,
+                 injector: Optional[TouchInjector] = None) -> List[str]:
+        """One device command per step, consecutive waits merged into one sleep"""
+        commands = []
+        pending_wait = 0.0
+        for kind, args in self.steps:
+            if kind == 'wait':
+                pending_wait += args[0]
+                continue
+            if pending_wait > 0:
+                commands.append(f'sleep {pending_wait:g}')
+                pending_wait = 0.0
+            if kind == 'tap':
+                x, y = _scaled(args[0], scalar_x), _scaled(args[1], scalar_y)
+                commands.append(injector.tap_command(x, y) if injector else f'input tap {x} {y}')
+            elif kind == 'swipe':
+                x1, y1, x2, y2, duration = args
+                x1, y1 = _scaled(x1, scalar_x), _scaled(y1, scalar_y)
+                x2, y2 = _scaled(x2, scalar_x), _scaled(y2, scalar_y)
+                if injector:
+                    # The input tool swipes for 300 ms by default
+                    commands.append(injector.swipe_command(x1, y1, x2, y2, (300 if duration is None else duration) / 1000))
+                    continue
+                command = f'input touchscreen swipe {x1} {y1} {x2} {y2}'
+                commands.append(command if duration is None else f'{command} {int(duration)}')
+            elif kind == 'text':
+                commands.append(f'input text {_quote(args[0].replace(" ", "%s"))}')
+            elif kind == 'keyevent':
+                commands.append(f'input keyevent {args[0]}')
+            else:
+                raise ValueError(f"Unknown macro step: {kind}")
+        if pending_wait > 0:
+            commands.append(f'sleep {pending_wait:g}')
+        return commands
+
+    def compile(self, scalar_x: float = 1.0, scalar_y: float = 1.0, injector: Optional[TouchInjector] = None) -> str:
+        """The whole macro as one shell command line"""
+        return '; '.join(self.commands(scalar_x, scalar_y, injector))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': MACRO_VERSION,
+            'name': self.name,
+            'steps': [[kind] + list(args) for kind, args in self.steps],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'InputMacro':
+        if data.get('version') != MACRO_VERSION:
+            raise ValueError(f"Unsupported macro version: {data.get('version')}")
+        return cls(data.get('name', 'macro'), [MacroStep(step[0], tuple(step[1:])) for step in data['steps']])
+
+    def save(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> 'InputMacro':
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,125 @@
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, Optional, Set, Union
+
+from adbshell import ShellResult
+
+logger = logging.getLogger('ADBAPI')
+
+Execute = Callable[[str], Union[ShellResult, 'Future[ShellResult]']]
+
+
+class InputDispatcher:
+    """Ordered, bounded queue of device input commands.
+
+    One dispatcher thread hands commands to execute strictly in submission
+    order. execute runs one command and returns a ShellResult, or a Future
+    when the command was handed to something that completes it later (a
+    persistent shell session, which applies what it is given in order).
+    max_in_flight only limits how many of those handed-off commands may
+    be unacknowledged at once, a command that runs synchronously is always
+    finished before the next one starts. submit blocks when max_queue
+    commands are waiting, which pushes back on callers that tap faster
+    than the device applies them. Every command gets a Future that
+    resolves to a ShellResult with exit code and latency from submission.
+    """
+
+    def __init__(self, execute: Execute, max_in_flight: int = 1, max_queue: int = 64) -> None:
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.execute = execute
+        self.max_in_flight = max_in_flight
+        self._queue: queue.Queue = queue.Queue(max_queue)
+        self._slots = threading.Semaphore(max_in_flight)
+        self._cond = threading.Condition()
+        self._unfinished: Set[int] = set()
+        self._seq = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='adb-input-dispatcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, command: str, timeout: Optional[float] = None) -> 'Future[ShellResult]':
+        """Queue a command, waits up to timeout for room when the queue is full (queue.Full after that)"""
+        future: 'Future[ShellResult]' = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Input dispatcher is closed")
+            self._seq += 1
+            seq = self._seq
+            self._unfinished.add(seq)
+        try:
+            self._queue.put((seq, command, time.time(), future), timeout=timeout)
+        except queue.Full:
+            self._finish(seq)
+            raise
+        return future
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            self._slots.acquire()
+            self._execute(*item)
+
+    def _execute(self, seq: int, command: str, submitted: float, future: 'Future[ShellResult]') -> None:
+        try:
+            result = self.execute(command)
+        except Exception as e:
+            self._complete(seq, future, error=e)
+            return
+        if isinstance(result, Future):
+            result.add_done_callback(lambda done: self._chained(seq, submitted, future, done))
+        else:
+            self._complete(seq, future, result._replace(latency=time.time() - submitted))
+
+    def _chained(self, seq: int, submitted: float, future: 'Future[ShellResult]', done: Future) -> None:
+        error = done.exception()
+        if error is not None:
+            self._complete(seq, future, error=error)
+        else:
+            self._complete(seq, future, done.result()._replace(latency=time.time() - submitted))
+
+    def _complete(self, seq: int, future: 'Future[ShellResult]', result: Optional[ShellResult] = None,
+                  error: Optional[BaseException] = None) -> None:
+        self._slots.release()
+        if error is not None:
+            logger.warning(f"Input command failed: {error}")
+            future.set_exception(error)
+        else:
+            if result.exit_code:
+                logger.warning(f"Input command {result.command!r} exited with {result.exit_code}")
+            future.set_result(result)
+        self._finish(seq)
+
+    def _finish(self, seq: int) -> None:
+        with self._cond:
+            self._unfinished.discard(seq)
+            self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every command submitted before this call has completed, False on timeout"""
+        with self._cond:
+            barrier = self._seq
+            return self._cond.wait_for(
+                lambda: not self._unfinished or min(self._unfinished) > barrier, timeout
+            )
+
+    @property
+    def pending(self) -> int:
+        """Commands queued or running"""
+        with self._cond:
+            return len(self._unfinished)
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Apply what is queued, then stop"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self.flush(timeout)
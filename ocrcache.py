@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import sys
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from lazyimport import LazyModule
+
+np = LazyModule('numpy')
+
+# (text, left, top, width, height, conf) relative to the band it was read from
+Word = Tuple[str, int, int, int, int, float]
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+    max_bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def _row_energy(image: np.ndarray) -> np.ndarray:
+    """Horizontal change per row, 0 for a flat row"""
+    rows = image if image.ndim == 2 else image.reshape(image.shape[0], image.shape[1], -1).max(axis=2)
+    return np.abs(np.diff(rows.astype(np.int16), axis=1)).sum(axis=1)
+
+
+def split_bands(image: np.ndarray, max_height: int = 160, min_gap: int = 2, padding: int = 2,
+                blank_threshold: int = 0) -> List[Tuple[int, int]]:
+    """Split an image into (top, bottom) row bands of text separated by blank rows.
+
+    A row is blank when its horizontal change is at most blank_threshold.
+    Bands taller than max_height are cut at the quietest blank row, taken
+    in the lower half of the limit, else the first one after it. A band
+    with no blank row is left whole rather than cutting through a line of
+    text, whose words would be garbled and cached that way.
+    """
+    height = image.shape[0]
+    energy = _row_energy(image)
+    blank = energy <= blank_threshold
+    bands = []
+    top = None
+    gap = 0
+    for y in range(height):
+        if not blank[y]:
+            if top is None:
+                top = y
+            gap = 0
+        elif top is not None:
+            gap += 1
+            if gap >= min_gap:
+                bands.append((top, y - gap + 1))
+                top = None
+                gap = 0
+    if top is not None:
+        bands.append((top, height - gap))
+
+    result = []
+    for top, bottom in bands:
+        top, bottom = max(top - padding, 0), min(bottom + padding, height)
+        while bottom - top > max_height:
+            lo = top + max_height // 2
+            window = np.flatnonzero(blank[lo:top + max_height])
+            if window.size:
+                cut = lo + int(window[np.argmin(energy[lo + window])])
+            else:
+                later = np.flatnonzero(blank[top + max_height:bottom])
+                if not later.size:
+                    break
+                cut = top + max_height + int(later[0])
+            result.append((top, cut))
+            top = cut
+        result.append((top, bottom))
+    return result
+
+
+class OcrCache:
+    """Band-level OCR result cache keyed by a content hash.
+
+    image_to_data splits the frame into text bands, looks each one up by a
+    blake2b digest of its pixels and OCRs only the bands it has not seen,
+    stacked into a single engine call. Results are kept band-relative, so
+    a band that only moved (scrolling) is still a hit. The LRU is bounded
+    by max_bytes of estimated result size.
+    """
+
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024, max_band_height: int = 160, separator: int = 12) -> None:
+        self.max_bytes = max_bytes
+        self.max_band_height = max_band_height
+        self.separator = separator
+        self._entries: 'OrderedDict[bytes, Tuple[List[Word], int]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(band: np.ndarray, salt: bytes) -> bytes:
+        digest = hashlib.blake2b(salt, digest_size=16)
+        digest.update(str(band.shape).encode())
+        digest.update(np.ascontiguousarray(band).data)
+        return digest.digest()
+
+    @staticmethod
+    def _size(key: bytes, words: List[Word]) -> int:
+        size = sys.getsizeof(key) + sys.getsizeof(words)
+        for word in words:
+            size += sys.getsizeof(word) + sys.getsizeof(word[0]) + 5 * 28
+        return size
+
+    def _get(self, key: bytes) -> Optional[List[Word]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _put(self, key: bytes, words: List[Word]) -> None:
+        size = self._size(key, words)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (words, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def _background(self, image: np.ndarray, bands: List[Tuple[int, int]]) -> np.ndarray:
+        """Fill value for separator rows, taken from a row outside every band"""
+        covered = np.zeros(image.shape[0], dtype=bool)
+        for top, bottom in bands:
+            covered[top:bottom] = True
+        free = np.flatnonzero(~covered)
+        if len(free):
+            return image[free[0], 0]
+        return np.full(image.shape[2:], 255, dtype=image.dtype)
+
+    def _recognize(self, engine, image: np.ndarray, bands: List[Tuple[int, int]],
+                   config: str) -> List[List[Word]]:
+        """OCR the given bands stacked into one image, words are split back per band"""
+        fill = self._background(image, bands)
+        gap = np.empty((self.separator,) + image.shape[1:], dtype=image.dtype)
+        gap[...] = fill
+        parts = []
+        offsets = []
+        y = 0
+        for top, bottom in bands:
+            parts.append(gap)
+            y += self.separator
+            parts.append(image[top:bottom])
+            offsets.append((y, y + bottom - top))
+            y += bottom - top
+        parts.append(gap)
+        data = engine.image_to_data(np.concatenate(parts), config=config)
+
+        words: List[List[Word]] = [[] for _ in bands]
+        conf = data.get('conf') or [-1] * len(data['text'])
+        for i, text in enumerate(data['text']):
+            if not str(text).strip():
+                continue
+            top, height = data['top'][i], data['height'][i]
+            center = top + height / 2
+            for n, (start, end) in enumerate(offsets):
+                if start <= center < end:
+                    words[n].append((text, data['left'][i], top - start, data['width'][i], height, conf[i]))
+                    break
+        return words
+
+    def image_to_data(self, engine, image: np.ndarray, config: str = '') -> Dict[str, list]:
+        """Same result as engine.image_to_data(image, config), with unchanged bands served from the cache"""
+        image = np.asarray(image)
+        salt = f'{type(engine).__name__}|{config}'.encode()
+        bands = split_bands(image, self.max_band_height)
+        keys = [self._key(image[top:bottom], salt) for top, bottom in bands]
+        results: List[Optional[List[Word]]] = [self._get(key) for key in keys]
+
+        dirty = [n for n, words in enumerate(results) if words is None]
+        if dirty:
+            fresh = self._recognize(engine, image, [bands[n] for n in dirty], config)
+            for n, words in zip(dirty, fresh):
+                results[n] = words
+                self._put(keys[n], words)
+
+        data: Dict[str, list] = {'text': [], 'left': [], 'top': [], 'width': [], 'height': [], 'conf': []}
+        for (top, _), words in zip(bands, results):
+            for text, left, y, width, height, conf in words:
+                data['text'].append(text)
+                data['left'].append(left)
+                data['top'].append(y + top)
+                data['width'].append(width)
+                data['height'].append(height)
+                data['conf'].append(conf)
+        return data
+
+    def words(self, engine, image: np.ndarray, config: str = '') -> List[str]:
+        """Recognized words in reading order, like image_to_string(...).split()"""
+        words = []
+        for text in self.image_to_data(engine, image, config)['text']:
+            words.extend(text.split())
+        return words
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self.hits, self.misses, self.evictions, len(self._entries), self._bytes, self.max_bytes)
+
+    @property
+    def hit_rate(self) -> float:
+        return self.stats().hit_rate
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
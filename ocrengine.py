@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import os
+import re
+import queue
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple, Union
+
+from lazyimport import LazyModule
+
+np = LazyModule('numpy')
+Image = LazyModule('PIL.Image')
+pytesseract = LazyModule('pytesseract')
+
+logger = logging.getLogger('ADBAPI')
+
+_OEM_RE = re.compile(r'--oem\s+(\d+)')
+_PSM_RE = re.compile(r'--psm\s+(\d+)')
+
+
+def parse_config(config: str, default_oem: int = 3, default_psm: int = 3) -> Tuple[int, int]:
+    oem = _OEM_RE.search(config)
+    psm = _PSM_RE.search(config)
+    return (int(oem.group(1)) if oem else default_oem), (int(psm.group(1)) if psm else default_psm)
+
+
+class OcrEngine:
+    """Interface ImageOcr talks to, results use the pytesseract Output.DICT layout"""
+
+    def image_to_string(self, image: Union[Image.Image, np.ndarray], config: str = '') -> str:
+        raise NotImplementedError
+
+    def image_to_data(self, image: Union[Image.Image, np.ndarray], config: str = '') -> Dict[str, list]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class PytesseractEngine(OcrEngine):
+    """The original backend: one tesseract process per call"""
+
+    def __init__(self, tesseract_cmd: Optional[str] = None) -> None:
+        self.tesseract_cmd = tesseract_cmd
+
+    @property
+    def tesseract_cmd(self) -> Optional[str]:
+        return self._tesseract_cmd
+
+    @tesseract_cmd.setter
+    def tesseract_cmd(self, path: Optional[str]) -> None:
+        self._tesseract_cmd = path
+        if path:
+            pytesseract.pytesseract.tesseract_cmd = path
+
+    def image_to_string(self, image: Union[Image.Image, np.ndarray], config: str = '') -> str:
+        return pytesseract.image_to_string(image, config=config)
+
+    def image_to_data(self, image: Union[Image.Image, np.ndarray], config: str = '') -> Dict[str, list]:
+        return pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT, config=config)
+
+
+class TesserocrEngine(OcrEngine):
+    """Resident Tesseract instances through the tesserocr bindings.
+
+    The language model is loaded once per instance instead of once per
+    call. Instances are pooled per OCR engine mode because --oem can only
+    be chosen at init, while --psm is switched per call. tesserocr drops
+    the GIL while recognizing, so pool_size threads can OCR in parallel.
+    """
+
+    def __init__(self, lang: str = 'eng', tessdata: Optional[str] = None, pool_size: int = 2) -> None:
+        import tesserocr
+        self._tesserocr = tesserocr
+        self.lang = lang
+        self.tessdata = tessdata or self._default_tessdata()
+        self.pool_size = pool_size
+        self._pools: Dict[int, queue.Queue] = {}
+        self._created: Dict[int, int] = {}
+        self._all: List = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _default_tessdata() -> Optional[str]:
+        prefix = os.environ.get('TESSDATA_PREFIX')
+        return prefix if prefix and os.path.isdir(prefix) else None
+
+    def _acquire(self, oem: int):
+        with self._lock:
+            pool = self._pools.setdefault(oem, queue.Queue())
+            create = pool.empty() and self._created.get(oem, 0) < self.pool_size
+            if create:
+                self._created[oem] = self._created.get(oem, 0) + 1
+        if create:
+            kwargs = {'lang': self.lang, 'oem': self._tesserocr.OEM(oem)}
+            if self.tessdata:
+                kwargs['path'] = self.tessdata
+            api = self._tesserocr.PyTessBaseAPI(**kwargs)
+            with self._lock:
+                self._all.append(api)
+            return api
+        return pool.get()
+
+    def _release(self, oem: int, api) -> None:
+        api.Clear()
+        self._pools[oem].put(api)
+
+    @staticmethod
+    def _to_pil(image: Union[Image.Image, np.ndarray]) -> Image.Image:
+        return image if isinstance(image, Image.Image) else Image.fromarray(image)
+
+    def image_to_string(self, image: Union[Image.Image, np.ndarray], config: str = '') -> str:
+        oem, psm = parse_config(config)
+        api = self._acquire(oem)
+        try:
+            api.SetPageSegMode(self._tesserocr.PSM(psm))
+            api.SetImage(self._to_pil(image))
+            return api.GetUTF8Text()
+        finally:
+            self._release(oem, api)
+
+    def image_to_data(self, image: Union[Image.Image, np.ndarray], config: str = '') -> Dict[str, list]:
+        oem, psm = parse_config(config)
+        level = self._tesserocr.RIL.WORD
+        data: Dict[str, list] = {'text': [], 'left': [], 'top': [], 'width': [], 'height': [], 'conf': []}
+        api = self._acquire(oem)
+        try:
+            api.SetPageSegMode(self._tesserocr.PSM(psm))
+            api.SetImage(self._to_pil(image))
+            api.Recognize()
+            iterator = api.GetIterator()
+            if iterator is None:
+                return data
+            for word in self._tesserocr.iterate_level(iterator, level):
+                box = word.BoundingBox(level)
+                if box is None:
+                    continue
+                x1, y1, x2, y2 = box
+                data['text'].append(word.GetUTF8Text(level) or '')
+                data['left'].append(x1)
+                data['top'].append(y1)
+                data['width'].append(x2 - x1)
+                data['height'].append(y2 - y1)
+                data['conf'].append(word.Confidence(level))
+            return data
+        finally:
+            self._release(oem, api)
+
+    def close(self) -> None:
+        with self._lock:
+            for api in self._all:
+                api.End()
+            self._all = []
+            self._pools = {}
+            self._created = {}
+
+
+_default_engine: Optional[OcrEngine] = None
+_default_lock = threading.Lock()
+
+
+def get_default_engine() -> OcrEngine:
+    """Resident tesserocr engine when the bindings are installed, pytesseract otherwise"""
+    global _default_engine
+    with _default_lock:
+        if _default_engine is None:
+            try:
+                _default_engine = TesserocrEngine()
+            except ImportError:
+                logger.warning("tesserocr is not installed, OCR falls back to one tesseract process per call. "
+                               "pip install -r requirements-optional.txt for the resident engine")
+                _default_engine = PytesseractEngine()
+        return _default_engine
+
+
+def set_default_engine(engine: OcrEngine) -> None:
+    global _default_engine
+    with _default_lock:
+        _default_engine = engine
@@ -0,0 +1,97 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+Box = Tuple[float, float, float, float]
+
+
+def scale_box(box: Sequence[float], scalar_x: float, scalar_y: float) -> Box:
+    x1, y1, x2, y2 = box
+    return (x1 * scalar_x, y1 * scalar_y, x2 * scalar_x, y2 * scalar_y)
+
+
+def clamp_box(box: Sequence[float], width: int, height: int) -> Tuple[int, int, int, int]:
+    """Integer pixel box inside a width x height image"""
+    x1, y1, x2, y2 = box
+    x1 = min(max(int(x1), 0), width)
+    y1 = min(max(int(y1), 0), height)
+    x2 = min(max(int(round(x2)), x1), width)
+    y2 = min(max(int(round(y2)), y1), height)
+    return (x1, y1, x2, y2)
+
+
+def intersect_box(a: Sequence[float], b: Sequence[float]) -> Optional[Box]:
+    """Overlap of two boxes, None when they do not overlap"""
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    if x2 <= x1 or y2 <= y1:
+        return None
+    return (x1, y1, x2, y2)
+
+
+def union_box(boxes: Iterable[Sequence[float]]) -> Optional[Box]:
+    boxes = list(boxes)
+    if not boxes:
+        return None
+    return (
+        min(b[0] for b in boxes), min(b[1] for b in boxes),
+        max(b[2] for b in boxes), max(b[3] for b in boxes)
+    )
+
+
+class HitRegionMemory:
+    """Where each phrase was last found, in base 1920x1080 coordinates.
+
+    locate_text searches the remembered area (plus margin) before falling
+    back to a full pass. Hits only make sense for one device, every
+    BaseDevice has its own memory, and scope(name) gives a separate one
+    per screen.
+    """
+
+    def __init__(self, margin: float = 40, max_entries: int = 256) -> None:
+        self.margin = margin
+        self.max_entries = max_entries
+        self._hits: 'OrderedDict[str, Box]' = OrderedDict()
+        self._scopes: Dict[str, 'HitRegionMemory'] = {}
+        self._lock = threading.Lock()
+
+    def scope(self, name: str) -> 'HitRegionMemory':
+        """Child memory for one screen, created on first use"""
+        with self._lock:
+            memory = self._scopes.get(name)
+            if memory is None:
+                memory = self._scopes[name] = HitRegionMemory(self.margin, self.max_entries)
+            return memory
+
+    def remember(self, phrase: str, box: Sequence[float]) -> None:
+        with self._lock:
+            self._hits[phrase] = tuple(box)
+            self._hits.move_to_end(phrase)
+            while len(self._hits) > self.max_entries:
+                self._hits.popitem(last=False)
+
+    def forget(self, phrase: Optional[str] = None) -> None:
+        with self._lock:
+            if phrase is None:
+                self._hits.clear()
+            else:
+                self._hits.pop(phrase, None)
+
+    def get(self, phrase: str) -> Optional[Box]:
+        with self._lock:
+            return self._hits.get(phrase)
+
+    def region_for(self, phrases: Iterable[str]) -> Optional[Box]:
+        """Area covering the last hit of every phrase, None if any of them was never found"""
+        with self._lock:
+            boxes = []
+            for phrase in phrases:
+                box = self._hits.get(phrase)
+                if box is None:
+                    return None
+                boxes.append(box)
+        region = union_box(boxes)
+        if region is None:
+            return None
+        m = self.margin
+        return (region[0] - m, region[1] - m, region[2] + m, region[3] + m)
@@ -0,0 +1,94 @@
+from typing import Dict, Iterable, List, Optional, Set
+
+Word = Dict[str, object]
+
+
+def edit_distance(a: str, b: str, limit: Optional[int] = None) -> int:
+    """Levenshtein distance, stops early once it exceeds limit (returns limit + 1)"""
+    if a == b:
+        return 0
+    if limit is not None and abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def phrase_box(match: List[Word], padding: int = 5) -> List[int]:
+    """[x1, y1, x2, y2] around a matched run of words, as locate_text returns it"""
+    x1 = match[0]['left']
+    y1 = match[0]['top']
+    x2 = match[-1]['left'] + match[-1]['width']
+    y2 = match[-1]['top'] + match[-1]['height']
+    return [x1 - padding, y1 - padding, x2 + padding, y2 + padding]
+
+
+class PhraseMatcher:
+    """Token index over the OCR words of one frame.
+
+    Built once per frame, then every phrase is looked up through the index
+    of its first token instead of scanning the word list. A phrase matches
+    consecutive words on the same line (top within y_tolerance). With
+    max_distance > 0 tokens may differ by that many edits to absorb OCR
+    noise; tokens of 3 characters or less always have to match exactly.
+    """
+
+    def __init__(self, words_data: List[Word], max_distance: int = 0, y_tolerance: int = 10) -> None:
+        self.words = words_data
+        self.max_distance = max_distance
+        self.y_tolerance = y_tolerance
+        self._index: Dict[str, List[int]] = {}
+        for position, word in enumerate(words_data):
+            self._index.setdefault(word['text'], []).append(position)
+        self._similar: Dict[str, Set[str]] = {}
+
+    def _variants(self, token: str) -> Set[str]:
+        """Indexed words that count as token"""
+        variants = self._similar.get(token)
+        if variants is None:
+            if self.max_distance <= 0 or len(token) <= 3:
+                variants = {token} if token in self._index else set()
+            else:
+                variants = {
+                    text for text in self._index
+                    if edit_distance(token, text, self.max_distance) <= self.max_distance
+                }
+            self._similar[token] = variants
+        return variants
+
+    def find(self, phrase: str) -> List[List[Word]]:
+        """Non-overlapping matches of phrase in reading order, each a list of words"""
+        tokens = phrase.split()
+        if not tokens:
+            return []
+        variants = [self._variants(token) for token in tokens]
+        if not all(variants):
+            return []
+
+        starts = sorted(p for text in variants[0] for p in self._index[text])
+        matches = []
+        end = -1
+        for start in starts:
+            if start <= end or start + len(tokens) > len(self.words):
+                continue
+            run = self.words[start:start + len(tokens)]
+            if all(word['text'] in allowed for word, allowed in zip(run, variants)) and all(
+                abs(run[i]['top'] - run[i - 1]['top']) <= self.y_tolerance for i in range(1, len(run))
+            ):
+                matches.append(run)
+                end = start + len(tokens) - 1
+        return matches
+
+    def find_all(self, phrases: Iterable[str]) -> Dict[str, List[List[Word]]]:
+        return {phrase: self.find(phrase) for phrase in phrases}
+
+    def boxes(self, phrases: Iterable[str], padding: int = 5) -> Dict[str, List[List[int]]]:
+        return {phrase: [phrase_box(m, padding) for m in matches] for phrase, matches in self.find_all(phrases).items()}
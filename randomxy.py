@@ -1,4 +1,13 @@
+from __future__ import annotations
+
 import random
+from typing import TYPE_CHECKING, Callable, Optional, Sequence, Tuple, Union
+
+from lazyimport import LazyModule
+
+np = LazyModule('numpy')
+
+
 def get_random_tap(x1,y1,x2,y2): #for click
     x1_random = random.randint(x1,x2) #randomization 
     y1_random = random.randint(y1,y2)
@@ -12,4 +21,96 @@ def get_random_swipe(x1,y1,x2,y2): #for swipe, plus minus x pixels
     y1 = random.randint(y1-x,y1+x)
     y2 = random.randint(y2-x,y2+x)
 
-    return x1,y1,x2,y2
\ No newline at end of file
+    return x1,y1,x2,y2
+
+
+if TYPE_CHECKING:
+    # A distribution gets the generator and a count and returns (count, 2) values in [0, 1]
+    Distribution = Callable[[np.random.Generator, int], np.ndarray]
+
+
+def uniform_distribution(rng: np.random.Generator, n: int) -> np.ndarray:
+    return rng.random((n, 2))
+
+
+def normal_distribution(rng: np.random.Generator, n: int, spread: float = 6.0) -> np.ndarray:
+    """Centered, the box spans +-spread/2 standard deviations, clipped to the box"""
+    return np.clip(rng.normal(0.5, 1.0 / spread, (n, 2)), 0.0, 1.0)
+
+
+DISTRIBUTIONS = {
+    'uniform': uniform_distribution,
+    'normal': normal_distribution,
+}
+
+
+class GestureGenerator:
+    """Vectorized version of get_random_tap/get_random_swipe.
+
+    Produces arrays of jittered taps and curved, timed swipe paths per call.
+    seed (or rng) makes the output reproducible; distribution picks where
+    taps land inside their box, by name from DISTRIBUTIONS or as a callable.
+    """
+
+    def __init__(self, seed: Optional[int] = None, rng: Optional[np.random.Generator] = None,
+                 distribution: Union[str, Distribution] = 'uniform', jitter: float = 20) -> None:
+        self.rng = rng if rng is not None else np.random.default_rng(seed)
+        self.distribution = DISTRIBUTIONS[distribution] if isinstance(distribution, str) else distribution
+        self.jitter = jitter
+
+    def taps(self, x1: float, y1: float, x2: float, y2: float, n: int = 1) -> np.ndarray:
+        """(n, 2) integer points inside the box"""
+        unit = self.distribution(self.rng, n)
+        low = np.array([x1, y1], dtype=float)
+        size = np.array([x2 - x1, y2 - y1], dtype=float)
+        return np.rint(low + unit * size).astype(int)
+
+    def swipes(self, x1: float, y1: float, x2: float, y2: float, n: int = 1) -> np.ndarray:
+        """(n, 4) start and end points, each moved by up to jitter pixels"""
+        ends = np.array([x1, y1, x2, y2], dtype=float)
+        offsets = self.rng.uniform(-self.jitter, self.jitter, (n, 4))
+        return np.rint(ends + offsets).astype(int)
+
+    def swipe_paths(self, x1: float, y1: float, x2: float, y2: float, n: int = 1, points: int = 20,
+                    duration: float = 0.3, curvature: float = 0.15) -> Tuple[np.ndarray, np.ndarray]:
+        """Curved swipes: paths (n, points, 2) and times (n, points) in seconds from touch down.
+
+        Each path is a quadratic Bezier between jittered end points whose
+        control point is pushed sideways by up to curvature times the swipe
+        length. Points are spaced with ease-in-out timing and the total
+        duration varies by +-20%.
+        """
+        ends = self.swipes(x1, y1, x2, y2, n).astype(float)
+        start, end = ends[:, :2], ends[:, 2:]
+        delta = end - start
+        normal = np.stack([-delta[:, 1], delta[:, 0]], axis=1)
+        bend = self.rng.uniform(-curvature, curvature, (n, 1))
+        control = (start + end) / 2 + normal * bend
+
+        t = np.linspace(0.0, 1.0, points)
+        # smoothstep, the finger speeds up and slows down again
+        s = (t * t * (3 - 2 * t))[None, :, None]
+        paths = ((1 - s) ** 2 * start[:, None] + 2 * (1 - s) * s * control[:, None] + s ** 2 * end[:, None])
+
+        durations = duration * self.rng.uniform(0.8, 1.2, (n, 1))
+        times = t[None, :] * durations
+        return np.rint(paths).astype(int), times
+
+
+def path_command(path: Sequence[Sequence[float]], times: Sequence[float], injector=None) -> str:
+    """One device command that performs a whole path.
+
+    With a touchinput.TouchInjector every point is written as raw events.
+    Otherwise it is one `input touchscreen swipe` from the first to the
+    last point over the total duration: each input call starts a JVM, so a
+    call per point would take far longer than the gesture itself, and the
+    curve is only kept on the sendevent backend. path is in display pixels.
+    """
+    path = np.asarray(path)
+    times = np.asarray(times, dtype=float)
+    if injector is not None:
+        delays = np.diff(times)
+        return injector.path_command([tuple(p) for p in path.tolist()], delays=list(delays) + [0.0])
+    (x1, y1), (x2, y2) = path[0].tolist(), path[-1].tolist()
+    duration = int(round((times[-1] - times[0]) * 1000))
+    return f'input touchscreen swipe {x1} {y1} {x2} {y2} {duration}'
\ No newline at end of file
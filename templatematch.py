@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import os
+import glob
+import logging
+import threading
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from lazyimport import LazyModule
+from ocrregion import clamp_box, scale_box
+
+cv2 = LazyModule('cv2')
+np = LazyModule('numpy')
+Image = LazyModule('PIL.Image')
+
+logger = logging.getLogger('ADBAPI')
+
+BASE_RESOLUTION = (1920, 1080)
+
+
+class TemplateMatch(NamedTuple):
+    name: str
+    box: List[int]
+    score: float
+
+
+def _to_gray(image: Union[Image.Image, np.ndarray]) -> np.ndarray:
+    if isinstance(image, np.ndarray):
+        if image.ndim == 2:
+            return image
+        code = cv2.COLOR_RGBA2GRAY if image.shape[2] == 4 else cv2.COLOR_RGB2GRAY
+        return cv2.cvtColor(image, code)
+    return np.asarray(image.convert('L'))
+
+
+def _pyramid(image: np.ndarray, levels: int) -> List[np.ndarray]:
+    pyramid = [image]
+    for _ in range(levels):
+        pyramid.append(cv2.pyrDown(pyramid[-1]))
+    return pyramid
+
+
+class TemplateMatcher:
+    """Finds fixed icons and buttons with cv2.matchTemplate instead of OCR.
+
+    Templates are cut from 1920x1080 base screenshots. For every device
+    resolution they are scaled once (by the device's abs_res_scalar_x/y)
+    and kept with their downscaled pyramid, so a lookup is a coarse match
+    on the reduced image followed by a full resolution match in small
+    windows around the candidates.
+    """
+
+    def __init__(self, threshold: float = 0.85, levels: int = 2, min_size: int = 12) -> None:
+        self.threshold = threshold
+        self.levels = levels
+        self.min_size = min_size
+        self._templates: Dict[str, np.ndarray] = {}
+        self._index: Dict[Tuple[str, float, float], List[np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, template: Union[str, Image.Image, np.ndarray]) -> None:
+        """Register a template (file path, PIL image or array) in base coordinates"""
+        if isinstance(template, str):
+            loaded = cv2.imread(template, cv2.IMREAD_GRAYSCALE)
+            if loaded is None:
+                raise FileNotFoundError(f"Template not found: {template}")
+            template = loaded
+        with self._lock:
+            self._templates[name] = _to_gray(template)
+            self._index = {key: value for key, value in self._index.items() if key[0] != name}
+
+    def load_dir(self, directory: str, pattern: str = '*.png') -> List[str]:
+        """Add every matching file, named after the file without extension"""
+        names = []
+        for path in sorted(glob.glob(os.path.join(directory, pattern))):
+            name = os.path.splitext(os.path.basename(path))[0]
+            self.add(name, path)
+            names.append(name)
+        return names
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._templates)
+
+    @staticmethod
+    def _scale_key(scalar_x: float, scalar_y: float) -> Tuple[float, float]:
+        return round(scalar_x, 4), round(scalar_y, 4)
+
+    def _scaled(self, name: str, scalar_x: float, scalar_y: float) -> List[np.ndarray]:
+        key = (name,) + self._scale_key(scalar_x, scalar_y)
+        with self._lock:
+            pyramid = self._index.get(key)
+            if pyramid is not None:
+                return pyramid
+            template = self._templates[name]
+        height, width = template.shape[:2]
+        size = (max(1, round(width * scalar_x)), max(1, round(height * scalar_y)))
+        interpolation = cv2.INTER_AREA if scalar_x * scalar_y < 1 else cv2.INTER_LINEAR
+        scaled = cv2.resize(template, size, interpolation=interpolation)
+
+        levels = 0
+        while levels < self.levels and min(scaled.shape[:2]) >> (levels + 1) >= self.min_size:
+            levels += 1
+        pyramid = _pyramid(scaled, levels)
+        with self._lock:
+            self._index[key] = pyramid
+        return pyramid
+
+    def prepare(self, scalar_x: float, scalar_y: float, names: Optional[Sequence[str]] = None) -> None:
+        """Scale templates for one resolution ahead of the first lookup"""
+        for name in names or self.names:
+            self._scaled(name, scalar_x, scalar_y)
+
+    def prepare_device(self, device, names: Optional[Sequence[str]] = None) -> None:
+        self.prepare(device.abs_res_scalar_x, device.abs_res_scalar_y, names)
+
+    def match(
+        self,
+        image: Union[Image.Image, np.ndarray],
+        name: str,
+        region: Optional[Sequence[float]] = None,
+        res_scalar_x: Optional[float] = None,
+        res_scalar_y: Optional[float] = None,
+        threshold: Optional[float] = None,
+        max_results: int = 1
+    ) -> List[TemplateMatch]:
+        """Best matches of a template, boxes in full-image pixel coordinates"""
+        gray = _to_gray(image)
+        height, width = gray.shape[:2]
+        if res_scalar_x is None:
+            res_scalar_x = width / BASE_RESOLUTION[0]
+        if res_scalar_y is None:
+            res_scalar_y = height / BASE_RESOLUTION[1]
+        threshold = self.threshold if threshold is None else threshold
+
+        x0, y0, x1, y1 = (0, 0, width, height)
+        if region is not None:
+            x0, y0, x1, y1 = clamp_box(scale_box(region, res_scalar_x, res_scalar_y), width, height)
+        search = gray[y0:y1, x0:x1]
+
+        pyramid = self._scaled(name, res_scalar_x, res_scalar_y)
+        template = pyramid[0]
+        t_height, t_width = template.shape[:2]
+        if search.shape[0] < t_height or search.shape[1] < t_width:
+            return []
+
+        levels = len(pyramid) - 1
+        if levels:
+            candidates = self._coarse(_pyramid(search, levels)[-1], pyramid[-1], levels, threshold, max_results)
+        else:
+            candidates = [(0, 0, search.shape[1], search.shape[0])]
+
+        matches = []
+        for cx0, cy0, cx1, cy1 in candidates:
+            window = search[cy0:cy1, cx0:cx1]
+            if window.shape[0] < t_height or window.shape[1] < t_width:
+                continue
+            scores = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+            for score, (x, y) in self._peaks(scores, threshold, max_results, t_width, t_height):
+                left, top = x0 + cx0 + x, y0 + cy0 + y
+                matches.append(TemplateMatch(name, [left, top, left + t_width, top + t_height], score))
+
+        matches.sort(key=lambda m: m.score, reverse=True)
+        return self._suppress(matches, max_results)
+
+    def _coarse(self, search: np.ndarray, template: np.ndarray, levels: int,
+                threshold: float, max_results: int) -> List[Tuple[int, int, int, int]]:
+        """Full resolution windows around the peaks found on the reduced images"""
+        if search.shape[0] < template.shape[0] or search.shape[1] < template.shape[1]:
+            return []
+        scores = cv2.matchTemplate(search, template, cv2.TM_CCOEFF_NORMED)
+        factor = 1 << levels
+        margin = 2 * factor
+        t_height, t_width = template.shape[:2]
+        windows = []
+        # the reduced images correlate worse, so candidates get some slack
+        for _, (x, y) in self._peaks(scores, threshold - 0.15, max_results + 2, t_width, t_height):
+            windows.append((
+                max(x * factor - margin, 0), max(y * factor - margin, 0),
+                (x + t_width) * factor + margin, (y + t_height) * factor + margin
+            ))
+        return windows
+
+    @staticmethod
+    def _peaks(scores: np.ndarray, threshold: float, count: int, width: int, height: int) -> List[Tuple[float, Tuple[int, int]]]:
+        peaks = []
+        scores = scores.copy()
+        for _ in range(count):
+            _, best, _, location = cv2.minMaxLoc(scores)
+            if best < threshold:
+                break
+            peaks.append((float(best), location))
+            x, y = location
+            scores[max(y - height // 2, 0):y + height // 2 + 1, max(x - width // 2, 0):x + width // 2 + 1] = -1
+        return peaks
+
+    @staticmethod
+    def _suppress(matches: List[TemplateMatch], count: int) -> List[TemplateMatch]:
+        kept: List[TemplateMatch] = []
+        for match in matches:
+            x1, y1, x2, y2 = match.box
+            overlaps = any(
+                x1 < k.box[2] and k.box[0] < x2 and y1 < k.box[3] and k.box[1] < y2 for k in kept
+            )
+            if not overlaps:
+                kept.append(match)
+            if len(kept) == count:
+                break
+        return kept
+
+    def locate(
+        self,
+        image: Union[Image.Image, np.ndarray],
+        name: str,
+        region: Optional[Sequence[float]] = None,
+        res_scalar_x: Optional[float] = None,
+        res_scalar_y: Optional[float] = None,
+        threshold: Optional[float] = None,
+        max_results: int = 1
+    ) -> List[List[int]]:
+        """[x1, y1, x2, y2] boxes like ImageOcr.locate_text"""
+        return [m.box for m in self.match(image, name, region, res_scalar_x, res_scalar_y, threshold, max_results)]
@@ -0,0 +1,185 @@
+"""Minimal in-process adb server for tests and benchmarks.
+
+Speaks enough of the smart-socket protocol for adbwire: host:version,
+host:devices, host-serial:<serial>:features, host:transport:<serial>,
+shell,v2,raw:, shell:, exec: and sync: (STAT, RECV, SEND, QUIT).
+Device behaviour is plugged in with the shell/exec callables. An
+interactive shell,v2,raw: (no command) runs a local sh, everything
+written to it is kept in shell_input.
+"""
+import socket
+import struct
+import subprocess
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+ShellHandler = Callable[[str], Tuple[bytes, bytes, int]]
+
+
+def _recv_exact(conn: socket.socket, size: int) -> bytes:
+    data = b''
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            raise EOFError
+        data += chunk
+    return data
+
+
+def _default_shell(command: str) -> Tuple[bytes, bytes, int]:
+    return f'ran:{command}\n'.encode(), b'', 0
+
+
+class FakeAdbServer:
+    def __init__(self, serials: Tuple[str, ...] = ('emulator-5554',), features: str = 'shell_v2,cmd',
+                 shell: ShellHandler = _default_shell,
+                 exec_: Optional[Callable[[str], bytes]] = None) -> None:
+        self.serials = serials
+        self.features = features
+        self.shell = shell
+        self.exec = exec_ or (lambda command: b'EXEC:' + command.encode())
+        self.files: Dict[str, bytes] = {}
+        self.requests: List[str] = []
+        self.shell_input = bytearray()
+        self._lock = threading.Lock()
+        self._sock = socket.socket()
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(('127.0.0.1', 0))
+        self._sock.listen(64)
+        self.port = self._sock.getsockname()[1]
+        self._thread = threading.Thread(target=self._accept, daemon=True)
+        self._thread.start()
+
+    def count(self, prefix: str) -> int:
+        with self._lock:
+            return sum(1 for request in self.requests if request.startswith(prefix))
+
+    def close(self) -> None:
+        self._sock.close()
+
+    def __enter__(self) -> 'FakeAdbServer':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    @staticmethod
+    def _fail(conn: socket.socket, message: str) -> None:
+        data = message.encode()
+        conn.sendall(b'FAIL' + b'%04x' % len(data) + data)
+
+    @staticmethod
+    def _okay_string(conn: socket.socket, text: str) -> None:
+        data = text.encode()
+        conn.sendall(b'OKAY' + b'%04x' % len(data) + data)
+
+    def _handle(self, conn: socket.socket) -> None:
+        serial = None
+        try:
+            while True:
+                request = _recv_exact(conn, int(_recv_exact(conn, 4), 16)).decode()
+                with self._lock:
+                    self.requests.append(request)
+                if request == 'host:version':
+                    return self._okay_string(conn, '0029')
+                if request == 'host:devices':
+                    return self._okay_string(conn, ''.join(f'{s}\tdevice\n' for s in self.serials))
+                if request.startswith('host-serial:') and request.endswith(':features'):
+                    if request.split(':')[1] not in self.serials:
+                        return self._fail(conn, f"device '{request.split(':')[1]}' not found")
+                    return self._okay_string(conn, self.features)
+                if request.startswith('host:transport:'):
+                    serial = request.split(':', 2)[2]
+                    if serial not in self.serials:
+                        return self._fail(conn, f"device '{serial}' not found")
+                    conn.sendall(b'OKAY')
+                    continue
+                if serial is None:
+                    return self._fail(conn, f'unknown host service {request}')
+                if request.startswith('shell,v2,raw:'):
+                    if 'shell_v2' not in self.features.split(','):
+                        return self._fail(conn, 'closed')
+                    if request == 'shell,v2,raw:':
+                        conn.sendall(b'OKAY')
+                        return self._interactive(conn)
+                    stdout, stderr, code = self.shell(request[len('shell,v2,raw:'):])
+                    conn.sendall(b'OKAY' + struct.pack('<BI', 1, len(stdout)) + stdout
+                                 + struct.pack('<BI', 2, len(stderr)) + stderr + struct.pack('<BIB', 3, 1, code))
+                    return
+                if request.startswith('shell:'):
+                    stdout, stderr, _ = self.shell(request[len('shell:'):])
+                    conn.sendall(b'OKAY' + stdout + stderr)
+                    return
+                if request.startswith('exec:'):
+                    conn.sendall(b'OKAY' + self.exec(request[len('exec:'):]))
+                    return
+                if request == 'sync:':
+                    conn.sendall(b'OKAY')
+                    return self._sync(conn)
+                return self._fail(conn, f'unknown service {request}')
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def _interactive(self, conn: socket.socket) -> None:
+        proc = subprocess.Popen(['sh'], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+        def forward() -> None:
+            for chunk in iter(lambda: proc.stdout.read1(65536), b''):
+                conn.sendall(struct.pack('<BI', 1, len(chunk)) + chunk)
+            conn.sendall(struct.pack('<BIB', 3, 1, proc.wait() & 0xff))
+
+        output = threading.Thread(target=forward, daemon=True)
+        output.start()
+        try:
+            while True:
+                packet_id, length = struct.unpack('<BI', _recv_exact(conn, 5))
+                data = _recv_exact(conn, length)
+                if packet_id != 0:
+                    break
+                with self._lock:
+                    self.shell_input += data
+                proc.stdin.write(data)
+                proc.stdin.flush()
+        finally:
+            proc.stdin.close()
+            output.join(timeout=2)
+            proc.kill()
+            proc.wait()
+
+    def _sync(self, conn: socket.socket) -> None:
+        while True:
+            command, length = struct.unpack('<4sI', _recv_exact(conn, 8))
+            if command == b'QUIT':
+                return
+            arg = _recv_exact(conn, length).decode()
+            if command == b'STAT':
+                data = self.files.get(arg)
+                mode = 0o100644 if data is not None else 0
+                conn.sendall(b'STAT' + struct.pack('<III', mode, len(data or b''), 0))
+            elif command == b'RECV':
+                data = self.files.get(arg)
+                if data is None:
+                    message = b'No such file or directory'
+                    conn.sendall(b'FAIL' + struct.pack('<I', len(message)) + message)
+                else:
+                    conn.sendall(b'DATA' + struct.pack('<I', len(data)) + data + b'DONE' + struct.pack('<I', 0))
+            elif command == b'SEND':
+                path = arg.rsplit(',', 1)[0]
+                data = b''
+                while True:
+                    kind, size = struct.unpack('<4sI', _recv_exact(conn, 8))
+                    if kind != b'DATA':
+                        break
+                    data += _recv_exact(conn, size)
+                self.files[path] = data
+                conn.sendall(b'OKAY' + struct.pack('<I', 0))
@@ -0,0 +1,39 @@
+import shutil
+import time
+import unittest
+
+from adbshell import ShellSession
+from adbwire import AdbWireClient
+from tests.fakeadb import FakeAdbServer
+
+SERIAL = 'emulator-5554'
+
+
+@unittest.skipIf(shutil.which('sh') is None, 'the fake server runs the interactive shell with sh')
+class ShellSessionTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeAdbServer()
+        # A short client timeout so idling past it does not slow the suite down
+        self.wire = AdbWireClient(port=self.server.port, timeout=0.3)
+        self.session = ShellSession('adb', SERIAL, self.wire)
+
+    def tearDown(self):
+        self.session.close()
+        self.wire.close()
+        self.server.close()
+
+    def test_pipelined_commands(self):
+        futures = [self.session.submit(f'echo {i}') for i in range(20)]
+        self.assertEqual([f.result(5).output.strip() for f in futures], [str(i) for i in range(20)])
+        self.assertEqual(self.session.run('(exit 3)', 5).exit_code, 3)
+
+    def test_idle_past_client_timeout(self):
+        self.assertEqual(self.session.run('echo before', 5).output.strip(), 'before')
+        time.sleep(0.8)
+        self.assertFalse(self.session.closed)
+        self.assertEqual(self.session.run('echo after', 5).output.strip(), 'after')
+        self.assertEqual(self.server.count('shell,v2,raw:'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
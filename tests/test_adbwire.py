@@ -0,0 +1,95 @@
+import time
+import unittest
+
+from adbwire import AdbProtocolError, AdbWireClient
+from tests.fakeadb import FakeAdbServer
+
+SERIAL = 'emulator-5554'
+
+
+def _shell(command):
+    if command == 'fail':
+        return b'', b'boom\n', 3
+    return f'ran:{command}\n'.encode(), b'', 0
+
+
+class AdbWireClientTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeAdbServer(shell=_shell)
+        self.client = AdbWireClient(port=self.server.port)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.close()
+
+    def _wait_for(self, condition, timeout=2.0):
+        deadline = time.time() + timeout
+        while not condition() and time.time() < deadline:
+            time.sleep(0.01)
+        return condition()
+
+    def test_host_services(self):
+        self.assertTrue(self.client.is_available())
+        self.assertEqual(self.client.version(), 0x29)
+        self.assertEqual(self.client.devices(), [(SERIAL, 'device')])
+
+    def test_shell_v2_reports_stderr_and_exit_code(self):
+        self.assertEqual(self.client.shell(SERIAL, 'echo hi'), (b'ran:echo hi\n', b'', 0))
+        self.assertEqual(self.client.shell(SERIAL, 'fail'), (b'', b'boom\n', 3))
+        self.assertEqual(self.server.count('host:transport:'), 2)
+        self.assertEqual(self.server.count('host-serial:'), 1)
+
+    def test_legacy_shell_without_shell_v2_feature(self):
+        self.server.features = 'cmd'
+        self.assertEqual(self.client.shell(SERIAL, 'fail'), (b'boom\n', b'', 0))
+        self.assertEqual(self.server.count('shell,v2'), 0)
+
+    def test_transport_errors_do_not_downgrade_shell(self):
+        with self.assertRaises(AdbProtocolError):
+            self.client.shell('missing', 'true')
+        self.assertNotIn('missing', self.client._shell_v2)
+        self.server.serials = (SERIAL, 'missing')
+        self.assertEqual(self.client.shell('missing', 'fail')[2], 3)
+
+    def test_exec_out(self):
+        self.server.exec = lambda command: bytes(range(256)) * 4
+        self.assertEqual(self.client.exec_out(SERIAL, 'screencap'), bytes(range(256)) * 4)
+
+    def test_sync_push_stat_pull(self):
+        payload = b'x' * 200000
+        self.client.push(SERIAL, payload, '/sdcard/a.bin')
+        mode, size, _ = self.client.stat(SERIAL, '/sdcard/a.bin')
+        self.assertTrue(mode)
+        self.assertEqual(size, len(payload))
+        self.assertEqual(self.client.pull(SERIAL, '/sdcard/a.bin'), payload)
+        self.assertEqual(self.client.stat(SERIAL, '/sdcard/none')[0], 0)
+        with self.assertRaises(AdbProtocolError):
+            self.client.pull(SERIAL, '/sdcard/none')
+        # One sync session is reused until an error drops it
+        self.assertEqual(self.server.count('sync:'), 1)
+
+    def test_warm_pool_is_refilled(self):
+        self.client.warm(SERIAL)
+        self.assertEqual(len(self.client._idle[SERIAL]), self.client.pool_size)
+        opened = self.server.count('host:transport:')
+        for _ in range(5):
+            self.client.exec_out(SERIAL, 'true')
+        self.assertTrue(self._wait_for(lambda: len(self.client._idle[SERIAL]) == self.client.pool_size))
+        # Every command used a pooled socket that was replaced afterwards
+        self.assertEqual(self.server.count('host:transport:'), opened + 5)
+
+    def test_unwarmed_serial_is_not_pooled(self):
+        self.client.exec_out(SERIAL, 'true')
+        time.sleep(0.05)
+        self.assertNotIn(SERIAL, self.client._idle)
+        self.assertEqual(self.server.count('host:transport:'), 1)
+
+    def test_stale_pooled_socket_is_retried(self):
+        self.client.warm(SERIAL)
+        for conn in self.client._idle[SERIAL]:
+            conn.sock.close()
+        self.assertEqual(self.client.exec_out(SERIAL, 'true'), b'EXEC:true')
+
+
+if __name__ == '__main__':
+    unittest.main()
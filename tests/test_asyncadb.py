@@ -0,0 +1,70 @@
+import asyncio
+import unittest
+
+from asyncadb import AsyncAdbClient, AsyncPhone
+from coordspace import CoordinateSpace
+from tests.fakeadb import FakeAdbServer
+from windowstate import parse_window_state
+
+SERIAL = 'R58M'
+
+
+class FakePhone:
+    """Window state with a settable rotation and override size, input commands are recorded"""
+
+    def __init__(self):
+        self.rotation = 'ROTATION_0'
+        self.override = '1080x2400'
+        self.inputs = []
+
+    def window(self):
+        return (f'Physical size: 1080x2400\nOverride size: {self.override}\n'
+                '    mDisplayId=0 rotation=0 app=1080x2340 cur=1080x2340\n'
+                '  mCurrentFocus=Window{1 u0 com.app/.Main}\n'
+                f'    mCurrentRotation={self.rotation}\n')
+
+    def shell(self, command):
+        if command.startswith('wm size;'):
+            return self.window().encode(), b'', 0
+        if command.startswith('input '):
+            self.inputs.append(command)
+        return b'', b'', 0
+
+
+class AsyncPhoneTest(unittest.TestCase):
+    def setUp(self):
+        self.device = FakePhone()
+        self.server = FakeAdbServer(serials=(SERIAL,), shell=self.device.shell)
+
+    def tearDown(self):
+        self.server.close()
+
+    def expected(self, x, y):
+        space = CoordinateSpace(parse_window_state(self.device.window()), portrait_swap=True)
+        return space.to_device(x, y)
+
+    def last_tap(self):
+        _, _, x, y = self.device.inputs[-1].split()
+        return float(x), float(y)
+
+    def test_taps_follow_coordinate_space(self):
+        async def scenario():
+            phone = await AsyncPhone.create(SERIAL, adb_path='adb', transport='wire',
+                                            wire=AsyncAdbClient(port=self.server.port))
+            await phone.tap(960, 540)
+            self.assertEqual(self.last_tap(), self.expected(960, 540))
+
+            # A rotation and a smaller override are picked up after invalidation, like the sync classes
+            self.device.rotation = 'ROTATION_90'
+            self.device.override = '720x1600'
+            phone.invalidate_window_state()
+            await phone.tap(960, 540)
+            self.assertEqual(self.last_tap(), self.expected(960, 540))
+            self.assertEqual(self.last_tap(), (800.0, 360.0))
+            self.assertEqual(phone.ORIENTATION, 'ROTATION_90')
+
+        asyncio.run(scenario())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import gzip
+import os
+import struct
+import unittest
+from unittest import mock
+
+from adbapi2 import Phone
+from adbwire import AdbWireClient, server_port
+from tests.fakeadb import FakeAdbServer
+
+SERIAL = 'R58M'
+
+WINDOW = (b'Physical size: 1080x2400\n'
+          b'    mDisplayId=0 rotation=0 app=1080x2340 cur=1080x2340\n'
+          b'  mCurrentFocus=Window{1 u0 com.app/.Main}\n'
+          b'    mCurrentRotation=ROTATION_0\n')
+
+
+# A 4x2 RGBA_8888 framebuffer with the Android 9+ 16 byte header
+PIXELS = bytes(range(32))
+SCREENCAP = struct.pack('<IIII', 4, 2, 1, 0) + PIXELS
+
+
+def device_shell(command):
+    """Enough of a phone for Phone.__init__ and raw captures, everything else echoed"""
+    if command.startswith('wm size;'):
+        return WINDOW, b'', 0
+    if 'od -An -tu4' in command:
+        return b'34\n 4 2 1\n', b'', 0
+    return f'ran:{command}\n'.encode(), b'', 0
+
+
+class PhoneOnFakeServerTest(unittest.TestCase):
+    def setUp(self):
+        self.gzip_output = gzip.compress(SCREENCAP)
+        self.server = FakeAdbServer(serials=(SERIAL,), shell=device_shell, exec_=self.device_exec)
+        self.wire = AdbWireClient(port=self.server.port)
+        self.phone = Phone(SERIAL, adb_path='adb', transport='wire', wire=self.wire, show_info=False)
+
+    def tearDown(self):
+        self.phone.close_input_queue()
+        self.phone.close_shell_session()
+        self.wire.close()
+        self.server.close()
+
+    def device_exec(self, command):
+        return {'screencap': SCREENCAP, 'screencap | gzip -1': self.gzip_output}[command]
+
+    def test_gzip_capture(self):
+        frame = self.phone.screenshot(compress='gzip')
+        self.assertEqual(frame.tobytes(), PIXELS)
+        self.assertEqual(self.phone.last_capture_stats.mode, 'gzip')
+
+    def test_broken_gzip_falls_back_to_raw(self):
+        full = gzip.compress(SCREENCAP)
+        for output in (b'', full[:len(full) // 2], b'/system/bin/sh: gzip: inaccessible or not found\n'):
+            self.gzip_output = output
+            with self.assertLogs('ADBAPI', 'WARNING') as logs:
+                frame = self.phone.screenshot(compress='gzip')
+            self.assertEqual(frame.tobytes(), PIXELS)
+            self.assertEqual(self.phone.last_capture_stats.mode, 'raw')
+            self.assertIn('capturing uncompressed', logs.output[0])
+
+    def test_injected_client_is_used(self):
+        self.assertIs(self.phone.wire, self.wire)
+        self.assertEqual(self.phone.resolution(), [1080, 2400])
+        self.assertGreater(self.server.count('host:transport:R58M'), 0)
+
+
+class ServerPortTest(unittest.TestCase):
+    def test_environment_overrides_default_port(self):
+        with mock.patch.dict(os.environ, {'ANDROID_ADB_SERVER_PORT': '5038'}):
+            self.assertEqual(server_port(), 5038)
+            self.assertEqual(AdbWireClient().port, 5038)
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertEqual(server_port(), 5037)
+
+
+if __name__ == '__main__':
+    unittest.main()
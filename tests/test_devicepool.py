@@ -0,0 +1,53 @@
+import threading
+import time
+import unittest
+
+from devicepool import DeviceBusyError, DevicePool
+
+
+class FakeDevice:
+    def __init__(self, identifier):
+        self.identifier = identifier
+        self.release = threading.Event()
+        self.release.set()
+
+    def screenInput(self, x, y):
+        self.release.wait(5)
+        return (self.identifier, x, y)
+
+
+class DevicePoolTest(unittest.TestCase):
+    def setUp(self):
+        self.devices = [FakeDevice(f'emulator-{5554 + 2 * i}') for i in range(6)]
+        self.pool = DevicePool(self.devices, max_workers=4, timeout=0.2)
+
+    def tearDown(self):
+        for device in self.devices:
+            device.release.set()
+        self.pool.close()
+
+    def test_every_device_gets_a_result(self):
+        results = self.pool.tap_all(10, 20)
+        self.assertEqual(sorted(results), sorted(d.identifier for d in self.devices))
+        self.assertTrue(all(r.ok and r.value[1:] == (10, 20) for r in results.values()))
+
+    def test_stuck_device_is_busy_not_another_worker(self):
+        stuck = self.devices[0]
+        stuck.release.clear()
+        self.assertIsInstance(self.pool.tap_all(1, 1)[stuck.identifier].error, TimeoutError)
+        self.assertEqual(self.pool.busy, [stuck.identifier])
+        for _ in range(5):
+            results = self.pool.tap_all(1, 1)
+            self.assertIsInstance(results[stuck.identifier].error, DeviceBusyError)
+            self.assertTrue(all(r.ok for k, r in results.items() if k != stuck.identifier))
+        self.assertLessEqual(len([t for t in threading.enumerate() if t.name.startswith('devicepool')]), 4)
+
+        stuck.release.set()
+        deadline = time.time() + 2
+        while self.pool.busy and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(self.pool.tap_all(1, 1)[stuck.identifier].ok)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+from elementlist import ScreenClassifier
+
+
+class ScreenClassifierTest(unittest.TestCase):
+    def setUp(self):
+        self.screens = ScreenClassifier({
+            'home': (['Play', 'Shop', 'Settings'], 2),
+            'shop': (['Shop', 'Buy', 'Coins', 'Back'], 0.5),
+            'login': ['User', 'Password'],
+        })
+
+    def test_thresholds_from_constructor(self):
+        self.assertEqual(self.screens.best(['play', 'shop', 'level']), 'home')
+        self.assertEqual([m.name for m in self.screens.classify(['shop', 'buy'])], ['shop'])
+        self.assertEqual(self.screens.classify(['user']), [])
+
+    def test_invalid_int_thresholds(self):
+        for threshold in (0, 4, -1):
+            with self.assertRaises(ValueError):
+                self.screens.add('home', ['a', 'b', 'c'], threshold)
+        # A rejected signature leaves the registered one in place
+        self.assertEqual(self.screens.best(['play', 'settings']), 'home')
+
+    def test_remove_and_readd(self):
+        self.screens.remove('home')
+        self.assertNotIn('home', self.screens.names)
+        self.assertIsNone(self.screens.best(['play', 'settings']))
+        self.screens.add('home', ['play'])
+        self.assertEqual(self.screens.best(['play']), 'home')
+        self.assertEqual(len(self.screens), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
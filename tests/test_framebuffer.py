@@ -0,0 +1,24 @@
+import struct
+import unittest
+
+from framebuffer import decode_screencap, frame_to_image, parse_screencap_header
+
+
+class FramebufferTest(unittest.TestCase):
+    def test_rgb565_colours(self):
+        # Android RGB_565 keeps red in the high 5 bits
+        pixels = [0xF800, 0x07E0, 0x001F, 0xFFFF]
+        data = struct.pack('<IIII', 2, 2, 4, 0) + struct.pack('<4H', *pixels)
+        self.assertEqual(parse_screencap_header(data).header_size, 16)
+        image = frame_to_image(decode_screencap(data), 4)
+        self.assertEqual([image.getpixel((i % 2, i // 2)) for i in range(4)], [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 255)])
+
+    def test_rgba_shares_memory(self):
+        data = bytearray(struct.pack('<III', 1, 1, 1) + bytes([10, 20, 30, 255]))
+        frame = decode_screencap(data)
+        self.assertEqual(frame.shape, (1, 1, 4))
+        self.assertEqual(frame_to_image(frame, 1).getpixel((0, 0)), (10, 20, 30, 255))
+
+
+if __name__ == '__main__':
+    unittest.main()
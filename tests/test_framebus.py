@@ -0,0 +1,96 @@
+import gc
+import multiprocessing
+import os
+import time
+import unittest
+
+import numpy as np
+
+from framebuffer import decode_pixels, frame_to_image
+from framebus import FrameBus
+
+
+def _hold_and_die(handle):
+    # Takes the newest frame and exits without releasing it, like a crashed worker
+    bus = FrameBus.attach(handle)
+    frame = bus.latest()
+    os._exit(0 if frame is not None else 1)
+
+
+class FrameBusTest(unittest.TestCase):
+
+    def setUp(self):
+        self.bus = FrameBus.create(slots=2, slot_bytes=64 * 32 * 4, lease=0.2)
+
+    def tearDown(self):
+        gc.collect()
+        self.bus.close()
+
+    def frame(self, value):
+        return np.full((32, 64, 4), value, np.uint8)
+
+    def test_publish_and_hold(self):
+        self.bus.publish(self.frame(1), 'R58M')
+        with self.bus.latest() as frame:
+            self.assertEqual(frame.device, 'R58M')
+            self.assertEqual(frame.image.shape, (32, 64, 4))
+            self.assertEqual(self.bus.refcounts(), (2, 0))
+        self.assertEqual(self.bus.refcounts(), (1, 0))
+
+    def test_dropped_while_every_slot_is_held(self):
+        self.bus.lease = None
+        self.bus.publish(self.frame(1))
+        held = self.bus.latest()
+        self.bus.publish(self.frame(2))
+        self.assertIsNone(self.bus.publish(self.frame(3)))
+        self.assertEqual(self.bus.dropped, 1)
+        held.release()
+        self.assertIsNotNone(self.bus.publish(self.frame(3)))
+
+    def test_garbage_collected_frame_is_released(self):
+        self.bus.publish(self.frame(1))
+        self.bus.latest()
+        gc.collect()
+        self.assertEqual(self.bus.refcounts(), (1, 0))
+
+    def test_crashed_consumer_is_reclaimed(self):
+        self.bus.publish(self.frame(1))
+        worker = multiprocessing.Process(target=_hold_and_die, args=(self.bus.handle(),))
+        worker.start()
+        worker.join(10)
+        self.assertEqual(self.bus.refcounts(), (2, 0))
+        self.bus.publish(self.frame(2))
+        self.assertIsNone(self.bus.publish(self.frame(3)))
+        time.sleep(0.3)
+        self.assertIsNotNone(self.bus.publish(self.frame(3)))
+        self.assertEqual(self.bus.reclaimed, 1)
+
+    def test_release_after_reclaim_is_ignored(self):
+        self.bus.publish(self.frame(1))
+        held = self.bus.latest()
+        self.bus.publish(self.frame(2))
+        time.sleep(0.3)
+        self.assertEqual(self.bus.reclaim(), 1)
+        self.bus.publish(self.frame(3))
+        held.release()
+        self.assertEqual(sorted(self.bus.refcounts()), [0, 1])
+
+    def test_rgb565_frame(self):
+        # Red, green, blue and white, Android keeps red in the high 5 bits
+        pixels = np.tile(np.array([0xF800, 0x07E0, 0x001F, 0xFFFF], '<u2'), 32 * 16).tobytes()
+        self.bus.publish(decode_pixels(pixels, 64, 32, 4), pixel_format=4)
+        with self.bus.latest() as frame:
+            self.assertEqual(frame.image.dtype, np.dtype('<u2'))
+            self.assertEqual(frame.image.tobytes(), pixels)
+            image = frame_to_image(frame.image, frame.pixel_format)
+            self.assertEqual(image.size, (64, 32))
+            self.assertEqual([image.getpixel((x, 5)) for x in range(4)],
+                             [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 255)])
+
+    def test_rejects_other_dtypes(self):
+        with self.assertRaises(ValueError):
+            self.bus.publish(np.zeros((32, 64), np.float32))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import random
+import shutil
+import threading
+import time
+import unittest
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from adbshell import ShellResult, ShellSession
+from adbwire import AdbWireClient
+from inputqueue import InputDispatcher
+from tests.fakeadb import FakeAdbServer
+
+
+class JitteryDevice:
+    """Records the order commands are handed over in, completes them later from a pool"""
+
+    def __init__(self):
+        self.order = []
+        self.in_flight = 0
+        self.max_seen = 0
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(8)
+        self.rng = random.Random(0)
+
+    def execute(self, command):
+        time.sleep(self.rng.random() * 0.001)
+        future = Future()
+        with self.lock:
+            self.order.append(command)
+            self.in_flight += 1
+            self.max_seen = max(self.max_seen, self.in_flight)
+        self.pool.submit(self._complete, command, future, self.rng.random() * 0.003)
+        return future
+
+    def _complete(self, command, future, delay):
+        time.sleep(delay)
+        with self.lock:
+            self.in_flight -= 1
+        future.set_result(ShellResult(command, '', 0, 0.0))
+
+
+class InputDispatcherTest(unittest.TestCase):
+    def test_order_with_jittery_executor(self):
+        device = JitteryDevice()
+        dispatcher = InputDispatcher(device.execute, max_in_flight=8)
+        futures = [dispatcher.submit(f'input tap {i} {i}') for i in range(300)]
+        self.assertTrue(dispatcher.flush(10))
+        dispatcher.close()
+        self.assertEqual(device.order, [f'input tap {i} {i}' for i in range(300)])
+        self.assertLessEqual(device.max_seen, 8)
+        self.assertTrue(all(f.result().exit_code == 0 for f in futures))
+
+    def test_synchronous_execute_runs_one_at_a_time(self):
+        running = []
+        overlap = []
+
+        def execute(command):
+            running.append(command)
+            overlap.append(len(running))
+            time.sleep(0.001)
+            running.remove(command)
+            return ShellResult(command, '', 0, 0.0)
+
+        dispatcher = InputDispatcher(execute, max_in_flight=4)
+        for i in range(50):
+            dispatcher.submit(str(i))
+        dispatcher.close()
+        self.assertEqual(max(overlap), 1)
+
+    def test_errors_reach_the_future(self):
+        def execute(command):
+            raise ConnectionError('device offline')
+
+        dispatcher = InputDispatcher(execute)
+        with self.assertRaises(ConnectionError):
+            dispatcher.submit('input tap 1 1').result(2)
+        dispatcher.close()
+
+
+@unittest.skipIf(shutil.which('sh') is None, 'the fake server runs the interactive shell with sh')
+class SessionOrderTest(unittest.TestCase):
+    def test_session_receives_commands_in_order(self):
+        server = FakeAdbServer()
+        wire = AdbWireClient(port=server.port)
+        session = ShellSession('adb', server.serials[0], wire)
+        dispatcher = InputDispatcher(session.submit, max_in_flight=8)
+        try:
+            futures = [dispatcher.submit(f'echo {i}') for i in range(200)]
+            self.assertEqual([f.result(10).output.strip() for f in futures], [str(i) for i in range(200)])
+            written = [line.split()[2] for line in server.shell_input.decode().splitlines() if line.startswith('{ echo')]
+            self.assertEqual(written, [str(i) for i in range(200)])
+        finally:
+            dispatcher.close()
+            session.close()
+            wire.close()
+            server.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from inputmacro import InputMacro
+from touchinput import (ABS_MT_POSITION_X, ABS_MT_POSITION_Y, ABS_MT_TRACKING_ID, BTN_TOUCH, EV_ABS, EV_KEY, EV_SYN,
+                        InputEvent, TouchInjector, decode_events, find_touchscreen)
+
+GETEVENT = '''add device 1: /dev/input/event4
+  name:     "gpio-keys"
+  events:
+    KEY (0001): KEY_VOLUMEDOWN KEY_VOLUMEUP
+add device 2: /dev/input/event2
+  name:     "sec_touchscreen"
+  events:
+    KEY (0001): BTN_TOUCH BTN_TOOL_FINGER
+    ABS (0003): ABS_MT_SLOT           : value 0, min 0, max 9, fuzz 0, flat 0, resolution 0
+                ABS_MT_TOUCH_MAJOR    : value 0, min 0, max 255, fuzz 0, flat 0, resolution 0
+                ABS_MT_POSITION_X     : value 0, min 0, max 4095, fuzz 0, flat 0, resolution 0
+                ABS_MT_POSITION_Y     : value 0, min 0, max 4095, fuzz 0, flat 0, resolution 0
+                ABS_MT_TRACKING_ID    : value 0, min 0, max 65535, fuzz 0, flat 0, resolution 0
+                ABS_MT_PRESSURE       : value 0, min 0, max 255, fuzz 0, flat 0, resolution 0
+__ADBAPI_SECTION__
+arm64-v8a
+'''
+
+
+@unittest.skipIf(shutil.which('sh') is None, 'needs a POSIX shell to run the injection commands')
+class FakeEventDeviceTest(unittest.TestCase):
+    """Runs the generated commands locally against a plain file standing in for /dev/input/eventN"""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(prefix='event')
+        os.close(handle)
+        self.device = find_touchscreen(GETEVENT)._replace(path=self.path)
+        self.injector = TouchInjector(self.device, (1080, 2400), 'ROTATION_0')
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def _run(self, command):
+        # A device node is not truncated by `>`, appending keeps every write of a script
+        subprocess.run(['sh', '-c', command.replace(f'> {self.path}', f'>> {self.path}')], check=True)
+        with open(self.path, 'rb') as f:
+            return decode_events(f.read(), self.device.event_size)
+
+    def test_discovery(self):
+        device = find_touchscreen(GETEVENT)
+        self.assertEqual(device.path, '/dev/input/event2')
+        self.assertEqual(device.x_range, (0, 4095))
+        self.assertTrue(device.has_slot and device.has_pressure and device.has_btn_touch)
+        self.assertEqual(device.event_size, 24)
+
+    def test_tap_event_stream(self):
+        events = self._run(self.injector.tap_command(540, 1200, hold=0))
+        self.assertIn(InputEvent(EV_ABS, ABS_MT_POSITION_X, 2048), events)
+        self.assertIn(InputEvent(EV_ABS, ABS_MT_POSITION_Y, 2048), events)
+        self.assertEqual(events[events.index(InputEvent(EV_KEY, BTN_TOUCH, 1)) + 1], InputEvent(EV_SYN, 0, 0))
+        self.assertEqual(events[-3:], [InputEvent(EV_ABS, ABS_MT_TRACKING_ID, -1),
+                                       InputEvent(EV_KEY, BTN_TOUCH, 0), InputEvent(EV_SYN, 0, 0)])
+
+    def test_rotated_mapping(self):
+        injector = TouchInjector(self.device, (2400, 1080), 'ROTATION_90')
+        # Top left of the rotated display is the panel's bottom left
+        self.assertEqual(injector.map(0, 0), (4095, 0))
+
+    def test_macro_uses_injector(self):
+        macro = InputMacro('flow').tap(960, 540).swipe(0, 0, 1920, 1080, duration=0)
+        script = macro.compile(1080 / 1920, 2400 / 1080, self.injector)
+        self.assertNotIn('input ', script)
+        events = self._run(script)
+        downs = [e for e in events if e.code == ABS_MT_TRACKING_ID and e.value != -1]
+        self.assertEqual(len(downs), 2)
+        xs = [e.value for e in events if e.type == EV_ABS and e.code == ABS_MT_POSITION_X]
+        ys = [e.value for e in events if e.type == EV_ABS and e.code == ABS_MT_POSITION_Y]
+        self.assertEqual((xs[0], ys[0]), (2048, 2048))
+        self.assertEqual((xs[-1], ys[-1]), (4095, 4095))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,197 @@
+import re
+import struct
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+_SECTION = '__ADBAPI_SECTION__'
+
+# getevent -pl lists every input device with its axes, the abi tells the
+# size of struct input_event (two longs of timeval before type/code/value)
+TOUCH_DISCOVERY_COMMAND = f'getevent -pl; echo {_SECTION}; getprop ro.product.cpu.abi'
+
+EV_SYN = 0x00
+EV_KEY = 0x01
+EV_ABS = 0x03
+SYN_REPORT = 0x00
+BTN_TOUCH = 0x14a
+ABS_MT_SLOT = 0x2f
+ABS_MT_TOUCH_MAJOR = 0x30
+ABS_MT_POSITION_X = 0x35
+ABS_MT_POSITION_Y = 0x36
+ABS_MT_TRACKING_ID = 0x39
+ABS_MT_PRESSURE = 0x3a
+
+_DEVICE_RE = re.compile(r'^add device \d+:\s*(\S+)')
+_NAME_RE = re.compile(r'^\s*name:\s*"(.*)"')
+_AXIS_RE = re.compile(r'(ABS_[A-Z_]+|[0-9a-f]{4})\s*:\s*value -?\d+, min (-?\d+), max (-?\d+)')
+_KEY_RE = re.compile(r'\bBTN_TOUCH\b')
+
+
+class TouchDevice(NamedTuple):
+    path: str
+    name: str
+    x_range: Tuple[int, int]
+    y_range: Tuple[int, int]
+    has_slot: bool
+    has_pressure: bool
+    has_btn_touch: bool
+    event_size: int = 24
+
+
+class InputEvent(NamedTuple):
+    type: int
+    code: int
+    value: int
+
+
+def parse_getevent(text: str) -> Dict[str, dict]:
+    """Devices from `getevent -pl` output: path -> {'name', 'axes': {name: (min, max)}, 'keys'}"""
+    devices: Dict[str, dict] = {}
+    current = None
+    for line in text.splitlines():
+        match = _DEVICE_RE.match(line)
+        if match:
+            current = devices.setdefault(match.group(1), {'name': '', 'axes': {}, 'btn_touch': False})
+            continue
+        if current is None:
+            continue
+        name = _NAME_RE.match(line)
+        if name:
+            current['name'] = name.group(1)
+            continue
+        axis = _AXIS_RE.search(line)
+        if axis:
+            current['axes'][axis.group(1)] = (int(axis.group(2)), int(axis.group(3)))
+        if _KEY_RE.search(line):
+            current['btn_touch'] = True
+    return devices
+
+
+def find_touchscreen(text: str) -> Optional[TouchDevice]:
+    """The multi-touch device from TOUCH_DISCOVERY_COMMAND output, None if there is none"""
+    events, _, abi = text.partition(_SECTION)
+    event_size = 24 if '64' in abi else 16
+    for path, device in parse_getevent(events).items():
+        axes = device['axes']
+        if 'ABS_MT_POSITION_X' in axes and 'ABS_MT_POSITION_Y' in axes:
+            return TouchDevice(
+                path, device['name'],
+                axes['ABS_MT_POSITION_X'], axes['ABS_MT_POSITION_Y'],
+                'ABS_MT_SLOT' in axes, 'ABS_MT_PRESSURE' in axes,
+                device['btn_touch'], event_size
+            )
+    return None
+
+
+def encode_events(events: Iterable[InputEvent], event_size: int = 24) -> bytes:
+    """struct input_event records with a zero timeval, the kernel stamps injected events itself"""
+    layout = '<qqHHi' if event_size == 24 else '<iiHHi'
+    return b''.join(struct.pack(layout, 0, 0, e.type, e.code, e.value) for e in events)
+
+
+def decode_events(data: bytes, event_size: int = 24) -> List[InputEvent]:
+    layout = '<qqHHi' if event_size == 24 else '<iiHHi'
+    return [InputEvent(*struct.unpack_from(layout, data, offset)[2:]) for offset in range(0, len(data), event_size)]
+
+
+def _printf(data: bytes) -> str:
+    """printf command writing the bytes, every byte as a three digit octal escape"""
+    return "printf '" + ''.join(f'\\{b:03o}' for b in data) + "'"
+
+
+class TouchInjector:
+    """Builds shell commands that write raw touch events to the touchscreen node.
+
+    Writing input_event records straight to /dev/input/eventN skips the
+    app_process startup of the `input` tool. Coordinates are display
+    pixels in the current rotation and are mapped to the panel's axis
+    ranges, which are in the natural orientation.
+    """
+
+    def __init__(self, device: TouchDevice, display_size: Sequence[int], rotation: str = 'ROTATION_0',
+                 tracking_id: int = 1000) -> None:
+        self.device = device
+        self.display_size = display_size
+        self.rotation = rotation
+        self.tracking_id = tracking_id
+
+    def map(self, x: float, y: float) -> Tuple[int, int]:
+        """Display pixel to panel axis values"""
+        width, height = self.display_size
+        u = min(max(x / width, 0.0), 1.0)
+        v = min(max(y / height, 0.0), 1.0)
+        if self.rotation == 'ROTATION_90':
+            u, v = 1.0 - v, u
+        elif self.rotation == 'ROTATION_180':
+            u, v = 1.0 - u, 1.0 - v
+        elif self.rotation == 'ROTATION_270':
+            u, v = v, 1.0 - u
+        (x_min, x_max), (y_min, y_max) = self.device.x_range, self.device.y_range
+        return int(round(x_min + u * (x_max - x_min))), int(round(y_min + v * (y_max - y_min)))
+
+    def _down(self, x: float, y: float) -> List[InputEvent]:
+        ax, ay = self.map(x, y)
+        events = []
+        if self.device.has_slot:
+            events.append(InputEvent(EV_ABS, ABS_MT_SLOT, 0))
+        events.append(InputEvent(EV_ABS, ABS_MT_TRACKING_ID, self.tracking_id))
+        events.append(InputEvent(EV_ABS, ABS_MT_POSITION_X, ax))
+        events.append(InputEvent(EV_ABS, ABS_MT_POSITION_Y, ay))
+        if self.device.has_pressure:
+            events.append(InputEvent(EV_ABS, ABS_MT_PRESSURE, 50))
+        if self.device.has_btn_touch:
+            events.append(InputEvent(EV_KEY, BTN_TOUCH, 1))
+        events.append(InputEvent(EV_SYN, SYN_REPORT, 0))
+        return events
+
+    def _move(self, x: float, y: float) -> List[InputEvent]:
+        ax, ay = self.map(x, y)
+        return [
+            InputEvent(EV_ABS, ABS_MT_POSITION_X, ax),
+            InputEvent(EV_ABS, ABS_MT_POSITION_Y, ay),
+            InputEvent(EV_SYN, SYN_REPORT, 0),
+        ]
+
+    def _up(self) -> List[InputEvent]:
+        events = [InputEvent(EV_ABS, ABS_MT_TRACKING_ID, -1)]
+        if self.device.has_btn_touch:
+            events.append(InputEvent(EV_KEY, BTN_TOUCH, 0))
+        events.append(InputEvent(EV_SYN, SYN_REPORT, 0))
+        return events
+
+    def path_events(self, points: Sequence[Tuple[float, float]]) -> List[List[InputEvent]]:
+        """Event batches of a touch along points: down at the first, moves, up after the last"""
+        if not points:
+            return []
+        batches = [self._down(*points[0])]
+        batches.extend(self._move(x, y) for x, y in points[1:])
+        batches.append(self._up())
+        return batches
+
+    def _command(self, batches: List[List[InputEvent]], delays: Sequence[float]) -> str:
+        size = self.device.event_size
+        parts = [_printf(encode_events(batches[0], size))]
+        for delay, batch in zip(delays, batches[1:]):
+            if delay > 0:
+                parts.append(f'sleep {delay:.3f}')
+            parts.append(_printf(encode_events(batch, size)))
+        return '{ ' + '; '.join(parts) + f'; }} > {self.device.path}'
+
+    def path_command(self, points: Sequence[Tuple[float, float]], duration: float = 0.3,
+                     delays: Optional[Sequence[float]] = None) -> str:
+        """One shell command touching down at points[0], moving through the rest and lifting.
+
+        duration (seconds) is spread evenly over the moves unless per-point delays are given.
+        """
+        batches = self.path_events(points)
+        if delays is None:
+            moves = max(len(points) - 1, 1)
+            delays = [duration / moves] * (len(points) - 1) + [0.0]
+        return self._command(batches, list(delays) + [0.0])
+
+    def tap_command(self, x: float, y: float, hold: float = 0.03) -> str:
+        return self.path_command([(x, y)], delays=[hold])
+
+    def swipe_command(self, x1: float, y1: float, x2: float, y2: float, duration: float = 0.3,
+                      steps: int = 10) -> str:
+        points = [(x1 + (x2 - x1) * i / steps, y1 + (y2 - y1) * i / steps) for i in range(steps + 1)]
+        return self.path_command(points, duration)
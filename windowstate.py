@@ -0,0 +1,66 @@
+import re
+import time
+from typing import NamedTuple, Optional, Tuple, List
+
+# One round trip: wm size plus only the dumpsys window lines we parse,
+# filtered on the device so the full dump never crosses the wire
+WINDOW_STATE_COMMAND = 'wm size; dumpsys window | grep -E "mCurrentRotation|mCurrentFocus|app=[0-9]"'
+
+_SIZE_RE = re.compile(r'(Physical|Override) size:\s*(\d+)x(\d+)')
+_ROTATION_RE = re.compile(r'mCurrentRotation=(\S+)')
+_FOCUS_RE = re.compile(r'mCurrentFocus=(.*)')
+_APP_RE = re.compile(r'\bapp=(\d+)x(\d+)')
+
+
+class WindowState(NamedTuple):
+    physical_size: Tuple[int, int]
+    override_size: Optional[Tuple[int, int]]
+    rotation: str
+    focus: str
+    app_size: Optional[Tuple[float, float]]
+    timestamp: float
+
+    @property
+    def rotated(self) -> bool:
+        return self.rotation in ('ROTATION_90', 'ROTATION_270')
+
+    @property
+    def display_size(self) -> Tuple[int, int]:
+        """Size reported by wm size, the override wins over the physical size"""
+        return self.override_size or self.physical_size
+
+    @property
+    def resolution(self) -> List[int]:
+        """Display size in the current orientation, as BaseDevice.resolution returns it"""
+        width, height = self.display_size
+        if self.rotated:
+            return [height, width]
+        return [width, height]
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.timestamp
+
+
+def parse_window_state(text: str, timestamp: Optional[float] = None) -> WindowState:
+    physical_size = None
+    override_size = None
+    for kind, width, height in _SIZE_RE.findall(text):
+        if kind == 'Physical':
+            physical_size = (int(width), int(height))
+        else:
+            override_size = (int(width), int(height))
+    if physical_size is None:
+        raise ValueError(f"No display size in window state output: {text!r}")
+
+    rotation = _ROTATION_RE.search(text)
+    focus = _FOCUS_RE.search(text)
+    app = _APP_RE.search(text)
+    return WindowState(
+        physical_size,
+        override_size,
+        rotation.group(1) if rotation else 'ROTATION_0',
+        focus.group(1).strip() if focus else '',
+        (float(app.group(1)), float(app.group(2))) if app else None,
+        time.time() if timestamp is None else timestamp
+    )